@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -8,8 +9,32 @@ app = Flask(__name__)
 
 # Configure your database URI
 app.config['SECRET_KEY'] = 'redyellowparrot26oct'  # 🔑 Required for CSRF
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mydatabase.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("BRE_DATABASE_URI", 'sqlite:///mydatabase.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# "interpreter" (BREEngine) or "codegen" (generated Python, used when trace is "off")
+app.config['BRE_BACKEND'] = os.getenv("BRE_BACKEND", "interpreter")
+# Count condition outcomes and evaluate the most selective conditions first
+app.config['BRE_SELECTIVITY'] = os.getenv("BRE_SELECTIVITY", "0") == "1"
+# Memoize /run_policy decisions for repeated applicants (seconds; 0 disables)
+app.config['BRE_DECISION_CACHE_TTL'] = float(os.getenv("BRE_DECISION_CACHE_TTL", "0"))
+app.config['BRE_DECISION_CACHE_SIZE'] = int(os.getenv("BRE_DECISION_CACHE_SIZE", "10000"))
+# Stream-parse /run_policy bodies keeping only the applicant fields the policy reads (needs ijson)
+app.config['BRE_PROJECTION'] = os.getenv("BRE_PROJECTION", "0") == "1"
+# Background threads and queue bound for shadow_policy_ids evaluation on /run_policy
+app.config['BRE_SHADOW_WORKERS'] = int(os.getenv("BRE_SHADOW_WORKERS", "1"))
+app.config['BRE_SHADOW_MAX_PENDING'] = int(os.getenv("BRE_SHADOW_MAX_PENDING", "1000"))
+# Fraction of decisions timed per chain/rule for /metrics (0 disables instrumentation)
+app.config['BRE_METRICS_SAMPLE_RATE'] = float(os.getenv("BRE_METRICS_SAMPLE_RATE", "0"))
+# Threads evaluating a decision's chains concurrently (0 runs chains one after another)
+app.config['BRE_PARALLEL_CHAINS'] = int(os.getenv("BRE_PARALLEL_CHAINS", "0"))
+# Comma-separated modules imported at startup to register lazy field resolvers
+app.config['BRE_FIELD_RESOLVERS'] = os.getenv("BRE_FIELD_RESOLVERS", "")
+# Seconds a cached policy is trusted before its row is re-read, catching edits made by other workers
+app.config['BRE_POLICY_CACHE_TTL'] = float(os.getenv("BRE_POLICY_CACHE_TTL", "5"))
+# Key signing the compiled plans stored with published policies (defaults to SECRET_KEY)
+app.config['BRE_ARTIFACT_KEY'] = os.getenv("BRE_ARTIFACT_KEY", app.config['SECRET_KEY'])
+# Load published policies' stored compiled plans into the policy cache on ASGI startup
+app.config['BRE_PRELOAD_POLICIES'] = os.getenv("BRE_PRELOAD_POLICIES", "1") == "1"
 
 db.init_app(app)
 migrate = Migrate(app, db)  # Initialize Flask-Migrate
@@ -0,0 +1,194 @@
+"""
+ASGI entry point for the decision service.
+
+    uvicorn asgi:application --workers 4
+
+POST /run_policy is served directly on the event loop: a cached compiled
+policy is evaluated without leaving the loop, and only a cache miss goes to
+the DB, on a small bounded thread pool. Decisions that can block (chains
+run on BRE_PARALLEL_CHAINS threads, lazy field resolvers) are evaluated on
+a bounded decision pool instead. Every other route (copilot, editor,
+batch) runs the Flask app on its own bounded thread pool, so a slow Gemini
+call or SQLite query can never hold up a decision.
+"""
+import asyncio
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgiInstance
+
+from app import app
+from bre_engine.cache import policy_cache
+from bre_engine.projection import stream_envelope
+from bre_engine.resolvers import field_resolvers
+from routes import (
+    bind_fields, check_run_policy_envelope, resolve_run_policy, execute_run_policy, referenced_paths,
+    chain_pool, preload_policy_cache, shadow_runner, submit_shadow_runs,
+)
+
+
+DB_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BRE_DB_THREADS", "4")), thread_name_prefix="bre-db"
+)
+DECISION_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BRE_DECISION_THREADS", "8")), thread_name_prefix="bre-decision"
+)
+WSGI_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BRE_WSGI_THREADS", "16")), thread_name_prefix="bre-wsgi"
+)
+
+
+# ----------------------------------------------------------------------
+# Flask bridge
+# ----------------------------------------------------------------------
+
+# The undecorated body of WsgiToAsgiInstance.run_wsgi_app (a sync_to_async wrapper).
+# This and sync_send below are asgiref internals: asgiref is pinned exactly in
+# requirements.txt and tests/test_asgi.py drives bridged routes, so check both
+# before upgrading it.
+_run_wsgi_app_sync = WsgiToAsgiInstance.__dict__["run_wsgi_app"].func
+
+
+class PooledWsgiInstance(WsgiToAsgiInstance):
+    """
+    asgiref's WsgiToAsgi runs every request on one shared thread; this runs
+    each request on WSGI_POOL instead so slow Flask views don't queue
+    behind each other.
+    """
+
+    async def __call__(self, scope, receive, send):
+        self._loop = asyncio.get_running_loop()
+        self._send = send
+        await super().__call__(scope, receive, send)
+
+    async def run_wsgi_app(self, body):
+        # Replace the AsyncToSync sender with one bound to this loop
+        self.sync_send = lambda message: asyncio.run_coroutine_threadsafe(
+            self._send(message), self._loop
+        ).result()
+        await self._loop.run_in_executor(WSGI_POOL, _run_wsgi_app_sync, self, body)
+
+
+# ----------------------------------------------------------------------
+# Native decision endpoint
+# ----------------------------------------------------------------------
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def send_json(send, body, status):
+    payload = json.dumps(body).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _resolve_after_miss(policy_id):
+    with app.app_context():
+        return resolve_run_policy(policy_id, lookup_cache=False)
+
+
+def cached_policy(policy_id):
+    try:
+        return policy_cache.get(int(policy_id))
+    except (TypeError, ValueError):
+        return None
+
+
+async def run_policy(scope, receive, send):
+    looked_up = {}
+
+    def paths_for(envelope):
+        # Cache only: the loop never waits on the DB. On a miss the applicant is kept whole.
+        if envelope.get("policy_id") is None:
+            return None
+        looked_up["policy_id"] = envelope["policy_id"]
+        looked_up["plan"] = cached_policy(envelope["policy_id"])
+        if envelope.get("shadow_policy_ids"):
+            return None   # shadow policies read other fields
+        paths = referenced_paths(looked_up["plan"])
+        looked_up["projected"] = paths is not None
+        return paths
+
+    try:
+        body = await read_body(receive)
+        if app.config.get("BRE_PROJECTION"):
+            envelope = stream_envelope(io.BytesIO(body), paths_for)
+        else:
+            envelope = json.loads(body)
+    except ValueError:
+        return await send_json(send, {"status": "error", "message": "Invalid JSON"}, 400)
+
+    error = check_run_policy_envelope(envelope)
+    if error:
+        return await send_json(send, *error)
+
+    policy_id = envelope["policy_id"]
+    if looked_up:
+        if looked_up["policy_id"] != policy_id:
+            return await send_json(send, {"status": "error", "message": "policy_id given more than once"}, 400)
+        policy_obj = looked_up["plan"]
+    else:
+        policy_obj = cached_policy(policy_id)
+    if policy_obj is None:
+        loop = asyncio.get_running_loop()
+        policy_obj, error = await loop.run_in_executor(DB_POOL, _resolve_after_miss, policy_id)
+        if error:
+            return await send_json(send, *error)
+
+    fields = bind_fields(envelope["applicant"])
+    if chain_pool is not None or fields is not None:
+        # Waiting on chain futures or resolver I/O would stall every request on the loop
+        loop = asyncio.get_running_loop()
+        # Async batch resolvers fetched mid-decision run back on this loop
+        field_resolvers.loop = loop
+        body, status = await loop.run_in_executor(DECISION_POOL, execute_run_policy, envelope, policy_obj, fields)
+    else:
+        body, status = execute_run_policy(envelope, policy_obj, fields)
+    await send_json(send, body, status)
+    # Shadow policies run on their own threads, after the response is out
+    submit_shadow_runs(envelope, body, looked_up.get("projected", False), fields)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if app.config.get("BRE_PRELOAD_POLICIES"):
+                try:
+                    loaded = await asyncio.get_running_loop().run_in_executor(DB_POOL, preload_policy_cache)
+                    app.logger.info("Preloaded %d published policies", loaded)
+                except Exception:
+                    app.logger.exception("Policy preload failed; policies will load on first use")
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            DB_POOL.shutdown(wait=False)
+            DECISION_POOL.shutdown(wait=False)
+            WSGI_POOL.shutdown(wait=False)
+            shadow_runner.shutdown(wait=False)
+            if chain_pool is not None:
+                chain_pool.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/run_policy":
+        return await run_policy(scope, receive, send)
+    await PooledWsgiInstance(app)(scope, receive, send)
@@ -0,0 +1,83 @@
+import random
+
+
+def _rule(rule_id, name, conditions, next_rules, reason):
+    on_true = {"decision": "PASS"}
+    if next_rules:
+        on_true["next_rules"] = next_rules
+    return {
+        "id": rule_id,
+        "name": name,
+        "conditions": conditions,
+        "action": {
+            "on_true": on_true,
+            "on_false": {"decision": "FAIL", "reason": reason},
+        },
+    }
+
+
+def synthetic_policy(chains=3, rulesets=4, rules=5, conditions=2, fanout=2, fields=20,
+                     fail_rate=0.002, seed=0):
+    """
+    Build a LoanBREGraph-shaped policy dict.
+
+    Every chain starts with a router rule whose on_true has `fanout` branches
+    on applicant.segment, each leading to one of the chain's rulesets. Rules
+    inside a ruleset run in sequence; each has `conditions` ">=" checks on
+    random applicant.f<k> fields that fail with probability ~fail_rate for
+    applicants from synthetic_applicants().
+    """
+    rnd = random.Random(seed)
+    threshold = int(fail_rate * 1000)
+    policy = {"id": f"synthetic_{chains}x{rulesets}x{rules}", "name": "Synthetic Policy",
+              "chains": [], "terminal_nodes": [{"id": "final", "decision": "ELIGIBLE"}]}
+
+    for c in range(chains):
+        ruleset_list = []
+        first_rule_ids = []
+        for rs in range(rulesets):
+            rule_list = []
+            ids = [f"c{c}_rs{rs}_r{r}" for r in range(rules)]
+            first_rule_ids.append(ids[0])
+            for r, rule_id in enumerate(ids):
+                conds = [
+                    {"field": f"applicant.f{rnd.randrange(fields)}", "operator": ">=", "value": threshold}
+                    for _ in range(conditions)
+                ]
+                next_rules = [ids[r + 1]] if r + 1 < rules else ["final"]
+                rule_list.append(_rule(rule_id, f"Rule {rule_id}", conds, next_rules, f"{rule_id} failed"))
+            ruleset_list.append({"id": f"c{c}_rs{rs}", "name": f"Ruleset {c}.{rs}", "rules": rule_list})
+
+        branches = []
+        for b in range(fanout):
+            target = b % rulesets
+            branches.append({
+                "name": f"Chain {c} Segment {b}",
+                "conditions": [{"field": "applicant.segment", "operator": "==", "value": f"S{b}"}],
+                "next_ruleset": f"c{c}_rs{target}",
+                "next_rules": [first_rule_ids[target]],
+            })
+        router = {
+            "id": f"c{c}_router",
+            "name": f"Chain {c} Router",
+            "conditions": [],
+            "action": {"on_true": {"decision": "PASS", "branches": branches,
+                                   "next_rules": [first_rule_ids[0]]}},
+        }
+        ruleset_list.insert(0, {"id": f"c{c}_routing", "name": f"Routing {c}", "rules": [router]})
+        policy["chains"].append({"id": f"chain_{c}", "name": f"Chain {c}", "rulesets": ruleset_list})
+
+    return policy
+
+
+def synthetic_applicants(n, fields=20, fanout=2, seed=0):
+    """Applicant payloads matching synthetic_policy(): f<k> uniform in [0, 1000), a segment."""
+    rnd = random.Random(seed)
+    for _ in range(n):
+        applicant = {f"f{k}": rnd.randrange(1000) for k in range(fields)}
+        applicant["segment"] = f"S{rnd.randrange(fanout)}"
+        yield {"applicant": applicant}
+
+
+def policy_rule_count(policy):
+    return sum(len(rs["rules"]) for chain in policy["chains"] for rs in chain["rulesets"])
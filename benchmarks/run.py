@@ -0,0 +1,203 @@
+"""
+Benchmark suite for the BRE engine.
+
+    python -m benchmarks.run                       # all sizes, writes bench_results.json
+    python -m benchmarks.run --sizes small --applicants 500
+    python -m benchmarks.run --compare old.json    # print ratios against an earlier run
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from bre_engine import BREEngine, compile_policy
+from .generators import synthetic_policy, synthetic_applicants, policy_rule_count
+
+
+SIZES = {
+    "small": dict(chains=2, rulesets=2, rules=3, conditions=1, fanout=2),
+    "medium": dict(chains=3, rulesets=5, rules=8, conditions=2, fanout=3),
+    "large": dict(chains=5, rulesets=10, rules=8, conditions=3, fanout=4),
+}
+
+MEMORY_SAMPLE = 200
+
+
+class _Policy:
+    """CreditPolicy stand-in: the fields BREEngine and PolicyCache read."""
+
+    def __init__(self, id, policyJSON):
+        self.id = id
+        self.policyJSON = policyJSON
+        self.version = 1
+        self.updated_at = None
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(name, size, fn, inputs, **extra):
+    """
+    Time fn(x) for every x; returns throughput, latency percentiles and peak memory.
+    Memory is traced in a separate, shorter pass so tracemalloc doesn't skew timings.
+    """
+    gc.collect()
+    latencies = []
+    start = time.perf_counter()
+    for x in inputs:
+        t0 = time.perf_counter_ns()
+        fn(x)
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    for x in inputs[:MEMORY_SAMPLE]:
+        fn(x)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "name": name,
+        "size": size,
+        "count": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed if elapsed else None,
+        "p50_us": _percentile(latencies, 50) / 1000,
+        "p99_us": _percentile(latencies, 99) / 1000,
+        "peak_memory_kb": peak / 1024,
+        **extra,
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+def bench_engine(size, policy, applicants):
+    policy_json = json.dumps(policy)
+    credit_policy = _Policy(0, policy_json)
+    plan = compile_policy(policy_json)
+    rules = policy_rule_count(policy)
+    return [
+        measure("compile_policy", size, compile_policy, [policy_json] * 50, rules=rules),
+        measure("engine.run (parse per call)", size,
+                lambda a: BREEngine(credit_policy, a).run(), applicants, rules=rules),
+        measure("engine.run (compiled)", size,
+                lambda a: BREEngine(plan, a).run(), applicants, rules=rules),
+        measure("engine.run (compiled, trace off)", size,
+                lambda a: BREEngine(plan, a, trace="off").run(), applicants, rules=rules),
+    ]
+
+
+def bench_d3(size, policy):
+    try:
+        from bre_models import LoanBREGraph, bre_to_d3
+    except ImportError as exc:
+        print(f"skipping bre_to_d3: {exc}", file=sys.stderr)
+        return []
+    graph = LoanBREGraph(**policy)
+    return [measure("bre_to_d3", size, bre_to_d3, [graph] * 50, rules=policy_rule_count(policy))]
+
+
+def bench_route(size, policy, applicants):
+    """/run_policy through the Flask test client; the policy is served from the cache, not the DB."""
+    try:
+        from app import app
+        from bre_engine.cache import policy_cache
+    except ImportError as exc:
+        print(f"skipping /run_policy: {exc}", file=sys.stderr)
+        return []
+
+    policy_id = -(list(SIZES).index(size) + 1)   # never collides with a real row
+    # The planted entry has no DB row to revalidate against: keep it for the whole run
+    ttl, policy_cache.ttl = policy_cache.ttl, None
+    policy_cache.put(_Policy(policy_id, json.dumps(policy)))
+    client = app.test_client()
+    bodies = [{"policy_id": policy_id, "applicant": a, "trace": "off"} for a in applicants]
+
+    def call(body):
+        response = client.post("/run_policy", json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    try:
+        return [measure("/run_policy", size, call, bodies, rules=policy_rule_count(policy))]
+    finally:
+        policy_cache.invalidate(policy_id)
+        policy_cache.ttl = ttl
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, n_applicants, include_route=True):
+    results = []
+    for size in sizes:
+        params = SIZES[size]
+        policy = synthetic_policy(**params)
+        applicants = list(synthetic_applicants(n_applicants, fanout=params["fanout"]))
+        results += bench_engine(size, policy, applicants)
+        results += bench_d3(size, policy)
+        if include_route:
+            results += bench_route(size, policy, applicants)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "applicants": n_applicants,
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    """Print ops/sec and p50 ratios (current / baseline) for matching benchmarks."""
+    old = {(r["name"], r["size"]): r for r in baseline["results"]}
+    print(f"\ncompared with {baseline.get('commit')}:")
+    for r in current["results"]:
+        b = old.get((r["name"], r["size"]))
+        if not b:
+            continue
+        print(f"  {r['name']:<36} {r['size']:<7} "
+              f"ops/s x{r['ops_per_sec'] / b['ops_per_sec']:.2f}  p50 x{r['p50_us'] / b['p50_us']:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BRE engine benchmarks")
+    parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated subset of: " + ", ".join(SIZES))
+    parser.add_argument("--applicants", type=int, default=2000)
+    parser.add_argument("--no-route", action="store_true", help="Skip the Flask /run_policy benchmark")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes.split(","), args.applicants, include_route=not args.no_route)
+    for r in report["results"]:
+        print(f"{r['name']:<36} {r['size']:<7} rules={r['rules']:<4} "
+              f"{r['ops_per_sec']:>10.0f} ops/s  p50={r['p50_us']:.1f}us  p99={r['p99_us']:.1f}us  "
+              f"peak={r['peak_memory_kb']:.0f}KB")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
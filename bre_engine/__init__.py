@@ -1 +1,2 @@
 from .bre_engine import BREEngine
+from .compiler import CompiledPolicy, PolicyCompileError, compile_policy
@@ -0,0 +1,304 @@
+import json
+
+from .compiler import PolicyCompileError, compile_policy
+
+
+# Operators whose runtime comparison against a JSON number needs a number
+_BOUNDS = (">", ">=", "<", "<=")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float))
+
+
+def _holds(cond, value):
+    try:
+        return bool(cond.op(value, cond.value))
+    except TypeError:
+        # The engine would raise here, which is not a pass either
+        return False
+
+
+def _field_satisfiable(conds):
+    """Can a single value make every condition on one field true?"""
+    for cond in conds:
+        if cond.operator == "==":
+            candidates = [cond.value]
+        elif cond.operator == "in" and isinstance(cond.value, (list, tuple)):
+            candidates = cond.value
+        else:
+            continue
+        # The value is pinned to one of a few candidates: just try them
+        return any(all(_holds(c, x) for c in conds) for x in candidates)
+
+    lo = hi = None
+    lo_strict = hi_strict = False
+    for cond in conds:
+        if cond.operator not in _BOUNDS:
+            continue
+        if not _is_number(cond.value):
+            return True   # string/other ordering: not analysed
+        v = cond.value
+        if cond.operator in (">", ">="):
+            if lo is None or v > lo or (v == lo and cond.operator == ">"):
+                lo, lo_strict = v, cond.operator == ">"
+        else:
+            if hi is None or v < hi or (v == hi and cond.operator == "<"):
+                hi, hi_strict = v, cond.operator == "<"
+    if lo is None or hi is None or lo < hi:
+        return True
+    if lo > hi or lo_strict or hi_strict:
+        return False
+    return all(_holds(c, lo) for c in conds)
+
+
+def satisfiable(conditions):
+    """
+    False only when the conditions (ANDed) provably never all hold, e.g.
+    age < 18 and age > 65, or type == "A" and type == "B".
+    """
+    by_field = {}
+    for cond in conditions:
+        by_field.setdefault(cond.path, []).append(cond)
+    return all(_field_satisfiable(conds) for conds in by_field.values())
+
+
+# ----------------------------------------------------------------------
+# Graph shape
+# ----------------------------------------------------------------------
+
+def _successors(rule):
+    """Every (rule_id, rule) a passing rule may enqueue, whichever branch matches."""
+    targets = list(rule.on_true.targets)
+    for br in rule.on_true.branches:
+        targets.extend(br.targets)
+    return targets
+
+
+def _alternatives(rule):
+    """(alternative, targets) pairs; a passing rule enqueues exactly one of them."""
+    yield -1, rule.on_true.targets
+    for branch_index, br in enumerate(rule.on_true.branches):
+        yield branch_index, br.targets
+
+
+def _exclusive(path_a, path_b):
+    """
+    Can two arrivals never happen in the same run? True when their paths
+    first part at a rule that took different alternatives (branches).
+    """
+    for step_a, step_b in zip(path_a, path_b):
+        if step_a != step_b:
+            return step_a[1] != step_b[1]
+    return False   # one path extends the other: a rule reaching itself
+
+
+def is_tree_shaped(chain, max_arrivals=10000):
+    """
+    True when no rule id can be enqueued twice in one walk of the chain,
+    whatever the applicant: then the engine's visited set never fires.
+    Rules reached again only through mutually exclusive branches are fine.
+    Very branchy graphs beyond max_arrivals are conservatively reported False.
+    """
+    if chain.entry is None:
+        return True
+    arrivals = {chain.entry.id: [()]}
+    stack = [(chain.entry, ())]
+    count = 0
+    while stack:
+        rule, path = stack.pop()
+        for alternative, targets in _alternatives(rule):
+            for position, (rule_id, target) in enumerate(targets):
+                step_path = path + ((rule.id, alternative, position),)
+                earlier = arrivals.setdefault(rule_id, [])
+                if any(not _exclusive(step_path, p) for p in earlier):
+                    return False
+                earlier.append(step_path)
+                count += 1
+                if count > max_arrivals:
+                    return False
+                if target is not None:
+                    stack.append((target, step_path))
+    return True
+
+
+def prove_plan(plan):
+    """Mark the chains of plan that BREEngine may walk without a visited set."""
+    for chain in plan.chains:
+        chain.tree_shaped = is_tree_shaped(chain)
+    return plan
+
+
+def _cycles(plan):
+    """Strongly connected rule groups that loop back on themselves (Tarjan, iterative)."""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    cycles = []
+    counter = 0
+
+    for root in plan.rules:
+        if root.id in index:
+            continue
+        work = [(root, iter(_successors(root)))]
+        index[root.id] = low[root.id] = counter
+        counter += 1
+        stack.append(root.id)
+        on_stack.add(root.id)
+        while work:
+            rule, successors = work[-1]
+            advanced = False
+            for target_id, target in successors:
+                if target is None:
+                    continue
+                if target_id not in index:
+                    index[target_id] = low[target_id] = counter
+                    counter += 1
+                    stack.append(target_id)
+                    on_stack.add(target_id)
+                    work.append((target, iter(_successors(target))))
+                    advanced = True
+                    break
+                if target_id in on_stack:
+                    low[rule.id] = min(low[rule.id], index[target_id])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent.id] = min(low[parent.id], low[rule.id])
+            if low[rule.id] == index[rule.id]:
+                group = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    group.append(member)
+                    if member == rule.id:
+                        break
+                self_loop = any(t == rule.id for t, _ in _successors(rule))
+                if len(group) > 1 or self_loop:
+                    cycles.append(sorted(group))
+    return cycles
+
+
+# ----------------------------------------------------------------------
+# Analysis
+# ----------------------------------------------------------------------
+
+class PolicyAnalysis:
+    """
+    Static findings for one policy. Errors (dangling references, cycles)
+    make a policy unsound; the rest are warnings for the author.
+    """
+
+    def __init__(self):
+        self.reachable = []       # rule ids some chain can execute, authoring order
+        self.unreachable = []     # rule ids no chain can execute
+        self.dead_rules = []      # rule ids whose conditions can never all hold
+        self.dead_branches = []   # (rule id, branch name)
+        self.dangling = []        # (rule id, field, target id)
+        self.ignored = []         # (rule id, target id): on_false next_rules, never followed
+        self.cycles = []          # sorted rule id groups
+        self.tree_chains = []     # chain ids walked without a visited set
+
+    @property
+    def sound(self):
+        return not self.dangling and not self.cycles
+
+    def findings(self):
+        """Human-readable messages, errors first."""
+        messages = [f"Rule '{r}' {field} points at unknown '{t}'" for r, field, t in self.dangling]
+        messages += [f"Rules form a cycle: {' -> '.join(group)}" for group in self.cycles]
+        messages += [f"Rule '{r}' can never pass: its conditions contradict each other" for r in self.dead_rules]
+        messages += [f"Branch '{b}' of rule '{r}' can never match" for r, b in self.dead_branches]
+        messages += [f"Rule '{r}' is unreachable from every chain" for r in self.unreachable]
+        messages += [f"Rule '{r}' on_false next_rules '{t}' is never followed" for r, t in self.ignored]
+        return messages
+
+    def to_dict(self):
+        return {
+            "sound": self.sound,
+            "reachable": self.reachable,
+            "unreachable": self.unreachable,
+            "dead_rules": self.dead_rules,
+            "dead_branches": [list(x) for x in self.dead_branches],
+            "dangling": [list(x) for x in self.dangling],
+            "ignored": [list(x) for x in self.ignored],
+            "cycles": self.cycles,
+            "tree_chains": self.tree_chains,
+            "findings": self.findings(),
+        }
+
+
+def _policy_dict(policy):
+    if hasattr(policy, "model_dump"):  # bre_models.LoanBREGraph
+        return policy.model_dump(exclude_unset=True)
+    if isinstance(policy, (str, bytes, bytearray)):
+        try:
+            return json.loads(policy)
+        except json.JSONDecodeError as exc:
+            raise PolicyCompileError(f"Invalid policy JSON: {exc}") from exc
+    return policy
+
+
+def analyze_policy(policy):
+    """
+    Analyse a policy without running it.
+    policy: validated LoanBREGraph, dict or JSON string.
+    """
+    data = _policy_dict(policy)
+    plan = compile_policy(data)
+    analysis = PolicyAnalysis()
+
+    terminals = {t.get("id") for t in data.get("terminal_nodes") or ()}
+    rulesets = {rs.get("id") for chain in data["chains"] for rs in chain["rulesets"]}
+    subgraphs = rulesets | {chain.get("id") for chain in data["chains"]}
+
+    # Dangling references, including the ruleset links only the editor graph uses
+    for chain in data["chains"]:
+        for ruleset in chain["rulesets"]:
+            for rule in ruleset["rules"]:
+                action = rule.get("action") or {}
+                on_true = action.get("on_true") or {}
+                for target in on_true.get("next_rules") or ():
+                    if target not in plan.rule_index and target not in terminals:
+                        analysis.dangling.append((rule["id"], "next_rules", target))
+                for br in on_true.get("branches") or ():
+                    for target in br.get("next_rules") or ():
+                        if target not in plan.rule_index and target not in terminals:
+                            analysis.dangling.append((rule["id"], "next_rules", target))
+                    if br.get("next_ruleset") and br["next_ruleset"] not in rulesets:
+                        analysis.dangling.append((rule["id"], "next_ruleset", br["next_ruleset"]))
+                    if br.get("next_subgraph") and br["next_subgraph"] not in subgraphs:
+                        analysis.dangling.append((rule["id"], "next_subgraph", br["next_subgraph"]))
+                on_false = action.get("on_false") or {}
+                for target in on_false.get("next_rules") or ():
+                    analysis.ignored.append((rule["id"], target))
+
+    # Reachability over edges that can actually be taken
+    dead = {rule.id for rule in plan.rules if not satisfiable(rule.conditions)}
+    reached = set()
+    for chain in plan.chains:
+        stack = [chain.entry] if chain.entry is not None else []
+        while stack:
+            rule = stack.pop()
+            if rule.id in reached:
+                continue
+            reached.add(rule.id)
+            if rule.id in dead:
+                continue
+            targets = list(rule.on_true.targets)
+            for br in rule.on_true.branches:
+                if satisfiable(br.conditions):
+                    targets.extend(br.targets)
+                else:
+                    analysis.dead_branches.append((rule.id, br.name))
+            stack.extend(target for _, target in targets if target is not None)
+
+    analysis.reachable = [rule.id for rule in plan.rules if rule.id in reached]
+    analysis.unreachable = [rule.id for rule in plan.rules if rule.id not in reached]
+    analysis.dead_rules = [rule.id for rule in plan.rules if rule.id in dead]
+    analysis.cycles = _cycles(plan)
+    analysis.tree_chains = [chain.id for chain in plan.chains if is_tree_shaped(chain)]
+    return analysis
@@ -0,0 +1,74 @@
+import hashlib
+import hmac
+import pickle
+import struct
+
+from .compiler import CompiledPolicy, compile_policy, uses_reference_lists
+
+
+ARTIFACT_MAGIC = b"BREPLAN"
+# Bump whenever the compiled plan classes change shape, so older artifacts are ignored
+ARTIFACT_FORMAT = 2
+
+# HMAC-SHA256 key signing artifacts; set by configure_signing (the app passes
+# BRE_ARTIFACT_KEY). Without one, artifacts are neither written nor loaded.
+_signing_key = None
+
+
+def configure_signing(key):
+    global _signing_key
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    _signing_key = key or None
+
+
+def _header(policy_json):
+    digest = hashlib.sha256(policy_json.encode("utf-8")).digest()
+    return ARTIFACT_MAGIC + struct.pack("<H", ARTIFACT_FORMAT) + digest
+
+
+def _signature(header, payload):
+    return hmac.new(_signing_key, bytes(header) + bytes(payload), hashlib.sha256).digest()
+
+
+def build_artifact(policy_json, plan=None):
+    """
+    The stored form of a compiled policy (CreditPolicy.compiled_plan):
+    a header naming the artifact format and the policyJSON it was built
+    from, an HMAC of header and payload, then the pickled CompiledPolicy.
+    Returns None for policies that must be compiled afresh (reference
+    lists) and when no signing key is configured. Raises PolicyCompileError.
+    """
+    if _signing_key is None:
+        return None
+    if plan is None:
+        plan = compile_policy(policy_json)
+    if uses_reference_lists(plan):
+        return None
+    header = _header(policy_json)
+    payload = pickle.dumps(plan, protocol=pickle.HIGHEST_PROTOCOL)
+    return header + _signature(header, payload) + payload
+
+
+def load_artifact(artifact, policy_json):
+    """
+    The CompiledPolicy stored in artifact, or None if there is none or it
+    is stale: built from other policy text or by another artifact format.
+    The payload is only unpickled once its HMAC checks out, so a row
+    written by anyone without the signing key is ignored, not executed.
+    """
+    if not artifact or not policy_json or _signing_key is None:
+        return None
+    header = _header(policy_json)
+    view = memoryview(artifact)
+    signed = len(header) + hashlib.sha256().digest_size
+    if view[:len(header)] != header:
+        return None
+    payload = view[signed:]
+    if not hmac.compare_digest(view[len(header):signed].tobytes(), _signature(header, payload)):
+        return None
+    try:
+        plan = pickle.loads(payload)
+    except Exception:
+        return None
+    return plan if isinstance(plan, CompiledPolicy) else None
@@ -0,0 +1,221 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .bre_engine import BREEngine
+from .compiler import CompiledPolicy, compile_policy
+from .resolvers import evaluate_batch_async, field_resolvers, load_resolver_modules
+from .trace import TRACE_OFF, TRACE_VERBOSE
+
+
+def _parse_applicant(applicant, decode=None):
+    if decode is not None:
+        applicant = decode(applicant)
+    if isinstance(applicant, (str, bytes, bytearray)):
+        applicant = json.loads(applicant)
+    if not isinstance(applicant, dict):
+        raise TypeError("applicant must be a JSON object")
+    return applicant
+
+
+def _error_item(exc):
+    return {"status": "error", "message": "BRE execution failed", "detail": str(exc)}
+
+
+def evaluate_one(policy, applicant, include_log=False, decode=None):
+    """
+    Run one applicant through a policy and return a result item.
+    Never raises: a bad applicant yields {"status": "error", ...} so a single
+    failure cannot sink a whole batch.
+    applicant may be a dict or an unparsed JSON line (str / bytes), or
+    anything decode(applicant) turns into one (e.g. a CSV row).
+    Fields served by field_resolvers are fetched as rules read them.
+    """
+    try:
+        applicant = _parse_applicant(applicant, decode)
+        trace = TRACE_VERBOSE if include_log else TRACE_OFF
+        fields = field_resolvers.bind(applicant) if len(field_resolvers) else None
+        result = BREEngine(policy, applicant, trace=trace, fields=fields).run()
+    except Exception as exc:
+        return _error_item(exc)
+    return _result_item(result, include_log)
+
+
+def _result_item(result, include_log):
+    item = {
+        "status": "ok",
+        "final_decision": result.get("final_decision"),
+        "reason": result.get("reason"),
+    }
+    if include_log:
+        item["execution_log"] = result.get("execution_log", [])
+    return item
+
+
+def evaluate_many(policy, applicants, include_log=False, decode=None):
+    """
+    Evaluate an iterable of applicants against one policy.
+    Yields result items in input order, each tagged with its input index.
+    policy should be a CompiledPolicy so it is parsed only once.
+    """
+    for index, applicant in enumerate(applicants):
+        item = evaluate_one(policy, applicant, include_log, decode)
+        item["index"] = index
+        yield item
+
+
+def evaluate_many_batched(policy, applicants, include_log=False, decode=None, chunk_size=1000):
+    """
+    evaluate_many for policies reading field_resolvers prefixes: applicants
+    are taken chunk_size at a time and each chunk's lazy fields are fetched
+    in batches (evaluate_batch_async), one fetch_many per prefix rather than
+    one fetch per applicant. Yields the same items in the same order.
+    """
+    trace = TRACE_VERBOSE if include_log else TRACE_OFF
+    for start, chunk in _chunks(applicants, chunk_size):
+        items = [None] * len(chunk)
+        parsed = []   # (offset, applicant)
+        for offset, applicant in enumerate(chunk):
+            try:
+                parsed.append((offset, _parse_applicant(applicant, decode)))
+            except Exception as exc:
+                items[offset] = _error_item(exc)
+
+        outcomes = field_resolvers.run(
+            evaluate_batch_async(policy, [applicant for _, applicant in parsed], field_resolvers, trace)
+        )
+        for (offset, _), (result, error) in zip(parsed, outcomes):
+            items[offset] = _error_item(error) if error is not None else _result_item(result, include_log)
+
+        for offset, item in enumerate(items):
+            item["index"] = start + offset
+            yield item
+
+
+def evaluator_for(policy):
+    """evaluate_many, or evaluate_many_batched if policy reads fields served by field_resolvers."""
+    if isinstance(policy, CompiledPolicy) and field_resolvers.reads_any(policy.field_paths):
+        return evaluate_many_batched
+    return evaluate_many
+
+
+def iter_ndjson_lines(lines):
+    """Yield the non-blank lines of an NDJSON stream, left unparsed."""
+    for line in lines:
+        if line.strip():
+            yield line
+
+
+# ----------------------------------------------------------------------
+# Multi-core Batch Runner
+# ----------------------------------------------------------------------
+
+# Set once per worker process by _init_worker
+_worker_policy = None
+_worker_include_log = False
+_worker_decode = None
+_worker_encode = None
+
+
+def _init_worker(policy, include_log, decode=None, encode=None, resolver_modules=None):
+    global _worker_policy, _worker_include_log, _worker_decode, _worker_encode
+    load_resolver_modules(resolver_modules)
+    _worker_policy = policy
+    _worker_include_log = include_log
+    _worker_decode = decode
+    _worker_encode = encode
+
+
+def _evaluate_chunk(start, chunk):
+    """Score a chunk; returns (results, error count), results encoded if an encoder is set."""
+    results = []
+    errors = 0
+    evaluate = evaluator_for(_worker_policy)
+    for item in evaluate(_worker_policy, chunk, _worker_include_log, _worker_decode):
+        item["index"] += start
+        if item["status"] != "ok":
+            errors += 1
+        results.append(item if _worker_encode is None else _worker_encode(item))
+    return results, errors
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    start = 0
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+class BatchRunner:
+    """
+    Scores applicants across a pool of worker processes.
+
+    The compiled policy is shipped to each worker once, through the pool
+    initializer, instead of with every task. Applicants are sent in chunks of
+    chunk_size and results are yielded in input order. At most
+    workers * max_pending_per_worker chunks are in flight, so memory stays
+    bounded however long the input is.
+    workers=1 runs in-process without a pool.
+
+    decode and encode (picklable callables) run in the workers too: decode
+    turns each input record into an applicant, encode turns each result item
+    into what run() yields (e.g. an output line), keeping the parent process
+    down to reading and writing.
+
+    resolver_modules (comma-separated, like BRE_FIELD_RESOLVERS) are imported
+    here and in every worker, so their field_resolvers serve the decisions.
+    """
+
+    def __init__(self, policy, workers=None, chunk_size=1000, include_log=False, max_pending_per_worker=2,
+                 decode=None, encode=None, resolver_modules=None):
+        self.policy = policy if isinstance(policy, CompiledPolicy) else compile_policy(policy)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.include_log = include_log
+        self.max_pending = self.workers * max_pending_per_worker
+        self.decode = decode
+        self.encode = encode
+        self.resolver_modules = resolver_modules
+        load_resolver_modules(resolver_modules)
+        # Running totals, for progress reporting
+        self.scored = 0
+        self.errors = 0
+
+    def run(self, applicants):
+        """
+        applicants: iterable of applicant dicts or unparsed NDJSON lines.
+        Yields result items (see evaluate_one) in input order.
+        """
+        if self.workers == 1:
+            evaluate = evaluator_for(self.policy)
+            for item in evaluate(self.policy, applicants, self.include_log, self.decode):
+                self.scored += 1
+                if item["status"] != "ok":
+                    self.errors += 1
+                yield item if self.encode is None else self.encode(item)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.policy, self.include_log, self.decode, self.encode, self.resolver_modules),
+        ) as pool:
+            pending = deque()
+            for start, chunk in _chunks(applicants, self.chunk_size):
+                pending.append(pool.submit(_evaluate_chunk, start, chunk))
+                if len(pending) >= self.max_pending:
+                    yield from self._collect(pending.popleft())
+            while pending:
+                yield from self._collect(pending.popleft())
+
+    def _collect(self, future):
+        results, errors = future.result()
+        self.scored += len(results)
+        self.errors += errors
+        return results
@@ -1,41 +1,75 @@
-import json
-import operator
+from collections import deque
+
+from .compiler import OPERATORS, CompiledPolicy, compile_cached
+from .trace import (
+    TRACE_LEVELS, TRACE_VERBOSE, TRACE_STRUCTURED, TRACE_DECISION_ONLY,
+    EVENT_CHAIN, EVENT_RULE, EVENT_MISSING,
+    ExecutionTrace, final_decision_line,
+)
 
 
 class BREEngine:
     """
     Executes a JSON-based Credit Policy (BRE) against an applicant.
-    First parameter: CreditPolicy SQLAlchemy model instance
+    First parameter: CreditPolicy SQLAlchemy model instance, or a CompiledPolicy
     Second parameter: applicant data dictionary
+
+    Pass a CompiledPolicy to skip parsing the policy JSON on every run; one
+    plan can be shared by any number of engines.
+
+    trace controls what is recorded about the run:
+      "off"            nothing; execution_log is empty
+      "decision-only"  only the final decision line
+      "structured"     compact event tuples, returned as result["trace"]
+                       (an ExecutionTrace; call render() for the text log)
+      "verbose"        the full human-readable execution_log (default)
     """
 
-    OPERATORS = {
-        "==": operator.eq,
-        "!=": operator.ne,
-        ">": operator.gt,
-        ">=": operator.ge,
-        "<": operator.lt,
-        "<=": operator.le,
-        "in": lambda a, b: a in b,
-        "not in": lambda a, b: a not in b,
-    }
-
-    def __init__(self, credit_policy, applicant_data):
+    OPERATORS = OPERATORS
+
+    def __init__(self, credit_policy, applicant_data, trace=TRACE_VERBOSE, selectivity=None, fields=None):
         """
-        credit_policy: SQLAlchemy CreditPolicy model
+        credit_policy: SQLAlchemy CreditPolicy model or CompiledPolicy
         applicant_data: Python dict
+        trace: one of TRACE_LEVELS
+        selectivity: optional SelectivityProfile for the policy; counts condition
+                     outcomes and evaluates rule conditions in its learned order
+        fields: optional field source with get(field_path), e.g. a
+                resolvers.ResolvedFields fetching expensive fields lazily
         """
-        self.policy = json.loads(credit_policy.policyJSON)
+        if trace not in TRACE_LEVELS:
+            raise ValueError(f"Unknown trace level '{trace}', expected one of {TRACE_LEVELS}")
+        if isinstance(credit_policy, CompiledPolicy):
+            self.policy = credit_policy
+        else:
+            key = (getattr(credit_policy, "id", None), getattr(credit_policy, "version", None),
+                   getattr(credit_policy, "updated_at", None))
+            self.policy = compile_cached(credit_policy.policyJSON, key if key[0] is not None else None)
         self.applicant_data = applicant_data
-        self.execution_log = []
+        self.trace_level = trace
+        self.selectivity = selectivity
+        self.fields = fields
+        self.trace = ExecutionTrace(self.policy) if trace in (TRACE_STRUCTURED, TRACE_VERBOSE) else None
+        # Outcomes of the policy's shared predicates, filled in as they are evaluated
+        shared = self.policy.shared_predicates
+        self.predicate_results = [None] * shared if shared else None
+        # threading.Event set to abandon execute_chain (see parallel.run_chains_parallel)
+        self.cancelled = None
+
+    @property
+    def execution_log(self):
+        """Human-readable log of the run so far (rendered from the trace on demand)."""
+        return self.trace.render() if self.trace is not None else []
 
     # ----------------------------------------------------------------------
     # Utility Methods
     # ----------------------------------------------------------------------
 
     def get_value(self, field_path):
-        """Extract nested values (e.g. applicant.age)"""
-        parts = field_path.split(".")
+        """Extract nested values (e.g. applicant.age or ("applicant", "age"))"""
+        if self.fields is not None:
+            return self.fields.get(field_path)
+        parts = field_path.split(".") if isinstance(field_path, str) else field_path
         value = self.applicant_data
         for p in parts:
             if value is None or p not in value:
@@ -43,73 +77,109 @@ class BREEngine:
             value = value[p]
         return value
 
+    def evaluate_condition(self, cond):
+        """Evaluate one condition; a shared predicate only the first time it is reached."""
+        results = self.predicate_results
+        if results is not None:
+            slot = self.policy.predicate_slots[cond.index]
+            if slot < len(results):
+                passed = results[slot]
+                if passed is None:
+                    passed = results[slot] = bool(cond.op(self.get_value(cond.path), cond.value))
+                return passed
+        return cond.op(self.get_value(cond.path), cond.value)
+
     def evaluate_conditions(self, conditions):
         """Evaluate all conditions of a rule."""
+        results = self.predicate_results
+        if results is None:
+            for cond in conditions:
+                if not cond.op(self.get_value(cond.path), cond.value):
+                    return False
+            return True
+
+        slots = self.policy.predicate_slots
+        shared = len(results)
         for cond in conditions:
-            left = self.get_value(cond["field"])
-            op = self.OPERATORS[cond["operator"]]
-            right = cond["value"]
-            if not op(left, right):
+            slot = slots[cond.index]
+            if slot < shared:
+                passed = results[slot]
+                if passed is None:
+                    passed = results[slot] = bool(cond.op(self.get_value(cond.path), cond.value))
+            else:
+                passed = cond.op(self.get_value(cond.path), cond.value)
+            if not passed:
                 return False
         return True
 
     def find_rule(self, rule_id):
-        """Find rule anywhere in the policy."""
-        for chain in self.policy["chains"]:
-            for ruleset in chain["rulesets"]:
-                for rule in ruleset["rules"]:
-                    if rule["id"] == rule_id:
-                        return rule
-        return None
+        """Find rule anywhere in the policy (O(1) via the compiled rule-id index)."""
+        return self.policy.rule_index.get(rule_id)
 
     # ----------------------------------------------------------------------
     # Rule Evaluation Logic
     # ----------------------------------------------------------------------
 
     def execute_rule(self, rule):
-        """Execute a single rule and return next rules if applicable."""
-        self.execution_log.append(f"Evaluating rule: {rule['id']} — {rule.get('name', '')}")
-
-        passed = self.evaluate_conditions(rule.get("conditions", []))
-        action = rule["action"]["on_true"] if passed else rule["action"]["on_false"]
+        """
+        Execute a single rule and return next rules if applicable.
+        next_rules holds resolved (rule_id, rule) pairs; rule is None when missing.
+        """
+        trace = self.trace
+        if self.selectivity is None:
+            passed = self.evaluate_conditions(rule.conditions)
+        else:
+            passed = self.selectivity.evaluate_rule(self, rule)
 
         if not passed:
-            reason = action.get("reason", "Failed condition")
-            self.execution_log.append(f"❌ FAIL: {reason}")
-            return {"status": "FAIL", "reason": reason, "next_rules": []}
+            if trace is not None:
+                trace.events.append((EVENT_RULE, rule.index, False, -1))
+            return {"status": "FAIL", "reason": rule.on_false.reason, "next_rules": ()}
 
-        self.execution_log.append("✅ PASS")
+        action = rule.on_true
 
         # Handle branching
-        if passed and action.get("branches"):
-            for br in action["branches"]:
-                if self.evaluate_conditions(br.get("conditions", [])):
-                    self.execution_log.append(f"➡ Branch taken: {br['name']}")
-                    return {"status": "PASS", "next_rules": br.get("next_rules", [])}
+        for branch_index, br in enumerate(action.branches):
+            if self.evaluate_conditions(br.conditions):
+                if trace is not None:
+                    trace.events.append((EVENT_RULE, rule.index, True, branch_index))
+                return {"status": "PASS", "next_rules": br.targets}
+
+        if trace is not None:
+            trace.events.append((EVENT_RULE, rule.index, True, -1))
 
         # Normal transitions
-        return {"status": "PASS", "next_rules": action.get("next_rules", [])}
+        return {"status": "PASS", "next_rules": action.targets}
 
     # ----------------------------------------------------------------------
     # Chain Execution
     # ----------------------------------------------------------------------
 
     def execute_chain(self, chain):
-        """Execute a chain by BFS traversal starting from first rule."""
-        rulesets = chain["rulesets"]
-        first_rule = rulesets[0]["rules"][0]
-        queue = [first_rule["id"]]
-        visited = set()
+        """
+        Execute a chain by BFS traversal starting from first rule.
+        next_rules are already resolved, so each visited rule costs O(1).
+        """
+        if chain.entry is None:
+            return {"status": "PASS"}
 
-        while queue:
-            rule_id = queue.pop(0)
-            if rule_id in visited:
-                continue
-            visited.add(rule_id)
+        queue = deque([(chain.entry.id, chain.entry)])
+        # A chain proven tree-shaped at publish time never reaches a rule twice
+        visited = None if chain.tree_shaped else set()
+        cancelled = self.cancelled
 
-            rule = self.find_rule(rule_id)
-            if not rule:
-                self.execution_log.append(f"⚠ Missing rule: {rule_id}")
+        while queue:
+            if cancelled is not None and cancelled.is_set():
+                return {"status": "CANCELLED"}
+            rule_id, rule = queue.popleft()
+            if visited is not None:
+                if rule_id in visited:
+                    continue
+                visited.add(rule_id)
+
+            if rule is None:
+                if self.trace is not None:
+                    self.trace.events.append((EVENT_MISSING, rule_id))
                 continue
 
             result = self.execute_rule(rule)
@@ -117,8 +187,7 @@ class BREEngine:
             if result["status"] == "FAIL":
                 return result
 
-            for nxt in result["next_rules"]:
-                queue.append(nxt)
+            queue.extend(result["next_rules"])
 
         return {"status": "PASS"}
 
@@ -128,28 +197,33 @@ class BREEngine:
 
     def run(self):
         """Execute all BRE chains and return final decision."""
-        self.execution_log.append("========== EXECUTING LOAN BRE ==========")
+        trace = self.trace
 
-        for chain in self.policy["chains"]:
-            self.execution_log.append(f"\n=== Executing chain: {chain['name']} ===")
+        for chain_index, chain in enumerate(self.policy.chains):
+            if trace is not None:
+                trace.events.append((EVENT_CHAIN, chain_index))
             result = self.execute_chain(chain)
 
             if result["status"] == "FAIL":
-                self.execution_log.append("\nFINAL DECISION: ❌ REJECTED")
-                return {
-                    "final_decision": "REJECTED",
-                    "reason": result.get("reason"),
-                    "execution_log": self.execution_log
-                }
+                return self._result("REJECTED", result.get("reason"), rejected=True)
 
         # All chains passed → return terminal node decision
-        terminal = self.policy["terminal_nodes"][0]
-        final_decision = terminal.get("decision", "ELIGIBLE")
-
-        self.execution_log.append(f"\nFINAL DECISION: ✅ {final_decision}")
-
-        return {
-            "final_decision": final_decision,
-            "reason": None,
-            "execution_log": self.execution_log
-        }
+        return self._result(self.policy.terminal_decision, None, rejected=False)
+
+    def _result(self, final_decision, reason, rejected):
+        result = {"final_decision": final_decision, "reason": reason}
+        trace = self.trace
+        if trace is not None:
+            trace.final_decision = final_decision
+            trace.rejected = rejected
+
+        if self.trace_level == TRACE_VERBOSE:
+            result["execution_log"] = trace.render()
+        elif self.trace_level == TRACE_DECISION_ONLY:
+            result["execution_log"] = [final_decision_line(final_decision, rejected)]
+        else:
+            result["execution_log"] = []
+
+        if self.trace_level == TRACE_STRUCTURED:
+            result["trace"] = trace
+        return result
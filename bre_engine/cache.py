@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from time import perf_counter
+
+from .analyzer import prove_plan
+from .artifact import load_artifact
+from .compiler import compile_policy
+from .metrics import metrics
+
+
+logger = logging.getLogger("bre.cache")
+
+def _is_published(credit_policy):
+    # StatusEnum.PUBLISHED, or its value or name as a form submits it
+    status = getattr(credit_policy, "status", None)
+    status = getattr(status, "value", status)
+    return isinstance(status, str) and status.lower() == "published"
+
+
+class PolicyCache:
+    """
+    Process-wide LRU cache of compiled policies.
+
+    Entries are keyed on (policy id, version, updated_at) so an edited policy
+    never matches a stale plan. The latest key seen for each policy id is
+    remembered too, which lets get() answer without touching the DB; the
+    CreditPolicy listeners call invalidate() when an update or delete is
+    committed in this process. Edits committed by other processes are
+    picked up by revalidation: get() trusts a key for ttl seconds, then
+    misses so the caller reloads the row, and put() finds the cached plan
+    again if its key is unchanged (no recompile). ttl=None never revalidates.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key -> CompiledPolicy
+        self._latest = {}               # policy id -> (key, time it was last read from the DB)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key_for(credit_policy):
+        return (credit_policy.id, credit_policy.version, credit_policy.updated_at)
+
+    def get(self, policy_id):
+        """Return the cached plan for policy_id, or None (counted as a miss)."""
+        with self._lock:
+            latest = self._latest.get(policy_id)
+            if latest is not None and latest[0] in self._entries:
+                key, checked = latest
+                if self.ttl is None or self.clock() - checked < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                self.revalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, credit_policy, compiled=None):
+        """
+        Compile credit_policy (unless already cached) and return its plan.
+        A current compiled_plan artifact stored with the policy is loaded
+        instead of compiling.
+        compiled: a plan already built for this exact policy text, e.g. by
+        incremental editing, to store instead of compiling.
+        """
+        key = self.key_for(credit_policy)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and compiled is None:
+                self._entries.move_to_end(key)
+                self._latest[credit_policy.id] = (key, self.clock())
+                return cached
+
+        start = perf_counter()
+        if compiled is None:
+            compiled = load_artifact(getattr(credit_policy, "compiled_plan", None), credit_policy.policyJSON)
+        if compiled is None:
+            # Compile outside the lock; a concurrent put of the same key is harmless
+            compiled = compile_policy(credit_policy.policyJSON)
+        compiled.version = credit_policy.version
+        if _is_published(credit_policy):
+            # Published policies are analysed once here, not on every decision
+            prove_plan(compiled)
+        if metrics.enabled:
+            metrics.observe_compile(compiled, perf_counter() - start)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            self._latest[credit_policy.id] = (key, self.clock())
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                latest = self._latest.get(old_key[0])
+                if latest is not None and latest[0] == old_key:
+                    del self._latest[old_key[0]]
+                self.evictions += 1
+        return compiled
+
+    def get_or_load(self, policy_id, loader, lookup=True):
+        """
+        Return the plan for policy_id, calling loader(policy_id) on a miss.
+        loader returns a CreditPolicy-like object or None.
+        lookup=False skips the cache lookup, for callers that already missed.
+        """
+        if lookup:
+            compiled = self.get(policy_id)
+            if compiled is not None:
+                return compiled
+        start = perf_counter()
+        credit_policy = loader(policy_id)
+        if metrics.enabled:
+            metrics.observe_load(policy_id, perf_counter() - start)
+        if credit_policy is None:
+            return None
+        return self.put(credit_policy)
+
+    def preload(self, credit_policies):
+        """
+        Warm the cache with credit_policies (e.g. every published policy, read
+        in one query when a worker boots). A policy that fails to load is
+        logged and skipped. Returns the number of plans cached.
+        """
+        loaded = 0
+        for credit_policy in credit_policies:
+            try:
+                self.put(credit_policy)
+            except Exception:
+                logger.exception("Policy %s failed to preload", credit_policy.id)
+                continue
+            loaded += 1
+        return loaded
+
+    def invalidate(self, policy_id):
+        """Drop every cached version of a policy."""
+        with self._lock:
+            self._latest.pop(policy_id, None)
+            for key in [k for k in self._entries if k[0] == policy_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "revalidations": self.revalidations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# Shared by routes (lookups) and models.events (invalidation)
+policy_cache = PolicyCache()
@@ -0,0 +1,245 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from .batch import BatchRunner, iter_ndjson_lines
+from .compiler import compile_policy
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+INPUT_FORMATS = ("auto", "ndjson", "csv")
+OUTPUT_FIELDS = ("index", "status", "final_decision", "reason", "detail")
+
+
+def load_policy_file(path):
+    """Compile a policy JSON file such as policy-samples/sample1.json."""
+    with open(path) as f:
+        return compile_policy(f.read())
+
+
+def load_policy_db(policy_id):
+    """Compile a stored CreditPolicy by id, using the web app's database settings."""
+    # Imported lazily: file scoring shouldn't need Flask or a database
+    from app import app
+    from models.credit_policy import CreditPolicy
+
+    with app.app_context():
+        credit_policy = CreditPolicy.query.get(policy_id)
+        if credit_policy is None:
+            raise SystemExit(f"bre: policy {policy_id} not found")
+        return compile_policy(credit_policy.policyJSON)
+
+
+# ----------------------------------------------------------------------
+# Input / output
+# ----------------------------------------------------------------------
+
+def open_input(path, csv_format=False):
+    """
+    Open an input file (or stdin for "-") as text, decompressing gzip
+    transparently. Detection uses the magic bytes, so piped .gz works too.
+    Returns (text stream, raw file to close, or None for stdin).
+    """
+    raw = sys.stdin.buffer if path == "-" else open(path, "rb")
+    buffered = raw if hasattr(raw, "peek") else io.BufferedReader(raw)
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        buffered = gzip.GzipFile(fileobj=buffered, mode="rb")
+    # csv wants newline="" so quoted fields may hold line breaks
+    text = io.TextIOWrapper(buffered, encoding="utf-8", newline="" if csv_format else None)
+    return text, None if path == "-" else raw
+
+
+def open_output(path):
+    """Open an output file (or stdout for "-") for text; a .gz name is gzip-compressed."""
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _base_name(path):
+    return path[:-3] if path.endswith(".gz") else path
+
+
+def input_format(path, fmt="auto"):
+    if fmt != "auto":
+        return fmt
+    return "csv" if _base_name(path).lower().endswith(".csv") else "ndjson"
+
+
+# JSON number syntax, so CSV cells coerce the same way NDJSON values parse
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+def csv_value(cell):
+    """Coerce a CSV cell: numbers, true/false/null, otherwise the string."""
+    match = _NUMBER.fullmatch(cell)
+    if match:
+        return float(cell) if match.group(1) or match.group(2) else int(cell)
+    return _LITERALS.get(cell, cell)
+
+
+class CsvRowDecoder:
+    """
+    Turns a csv.reader row into an applicant dict. Dotted column names nest
+    ("applicant.age" -> {"applicant": {"age": ...}}); prefix is prepended to
+    every column. Empty cells are left out, as a missing field.
+    Picklable, so it runs inside batch workers.
+    """
+
+    def __init__(self, header, prefix=None):
+        names = [name.strip() for name in header]
+        if prefix:
+            names = [f"{prefix}.{name}" for name in names]
+        self.columns = [tuple(name.split(".")) for name in names]
+
+    def __call__(self, row):
+        if len(row) > len(self.columns):
+            raise ValueError(f"Row has {len(row)} cells, header has {len(self.columns)}")
+        applicant = {}
+        for path, cell in zip(self.columns, row):
+            if cell == "":
+                continue
+            node = applicant
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = csv_value(cell)
+        return applicant
+
+
+def encode_ndjson(item):
+    return json.dumps(item) + "\n"
+
+
+def encode_csv(item):
+    out = io.StringIO()
+    csv.writer(out).writerow(item.get(field) for field in OUTPUT_FIELDS)
+    return out.getvalue()
+
+
+class Progress:
+    """Periodic "rows, rows/s, errors" readout on stderr."""
+
+    def __init__(self, runner, stream=None, interval=2.0, clock=time.monotonic):
+        self.runner = runner
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.clock = clock
+        self.started = self.last = clock()
+
+    def tick(self):
+        now = self.clock()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.report(now)
+
+    def report(self, now=None, final=False):
+        elapsed = max((now or self.clock()) - self.started, 1e-9)
+        scored = self.runner.scored
+        self.stream.write(
+            f"bre score: {scored:,} rows  {scored / elapsed:,.0f} rows/s  "
+            f"{self.runner.errors:,} errors  {elapsed:,.1f}s{' done' if final else ''}\n"
+        )
+        self.stream.flush()
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def cmd_score(args):
+    policy = load_policy_file(args.policy) if args.policy else load_policy_db(args.policy_id)
+    fmt = input_format(args.input, args.format)
+    source, raw = open_input(args.input, csv_format=fmt == "csv")
+
+    decode = None
+    if fmt == "csv":
+        reader = csv.reader(source)
+        header = next(reader, None)
+        if header is None:
+            raise SystemExit("bre: CSV input has no header row")
+        decode = CsvRowDecoder(header, args.csv_prefix)
+        records = (row for row in reader if row)   # skip blank lines
+    else:
+        records = iter_ndjson_lines(source)
+
+    csv_output = _base_name(args.output).lower().endswith(".csv")
+    runner = BatchRunner(
+        policy,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        include_log=args.include_log,
+        decode=decode,
+        encode=encode_csv if csv_output else encode_ndjson,
+        resolver_modules=args.resolvers,
+    )
+    progress = None if args.quiet else Progress(runner, interval=args.progress_interval)
+
+    sink = open_output(args.output)
+    try:
+        if csv_output:
+            csv.writer(sink).writerow(OUTPUT_FIELDS)
+        for line in runner.run(records):
+            sink.write(line)
+            if progress is not None:
+                progress.tick()
+    finally:
+        if raw is not None:
+            source.close()
+            raw.close()
+        if sink is not sys.stdout:
+            sink.close()
+    if progress is not None:
+        progress.report(final=True)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bre", description="Open BRE command line tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    score = sub.add_parser(
+        "score",
+        help="Score a file of applicants against a policy",
+        description="Stream NDJSON or CSV applicants (optionally gzipped) through a compiled "
+                    "policy, writing one decision per row as it goes. Memory stays constant "
+                    "whatever the input size.",
+    )
+    source = score.add_mutually_exclusive_group(required=True)
+    source.add_argument("--policy", help="Policy JSON file, e.g. policy-samples/sample1.json")
+    source.add_argument("--policy-id", type=int, help="CreditPolicy id in the app database")
+    score.add_argument("--input", default="-", help="Applicants, NDJSON or CSV, .gz allowed (default: stdin)")
+    score.add_argument("--format", choices=INPUT_FORMATS, default="auto",
+                       help="Input format (default: from the file name, NDJSON for stdin)")
+    score.add_argument("--csv-prefix", default=None,
+                       help="Prefix for CSV column names, e.g. 'applicant' for an 'age' column")
+    score.add_argument("--output", default="-",
+                       help="Decisions: NDJSON, or CSV for a .csv name; .gz compresses (default: stdout)")
+    score.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    score.add_argument("--chunk-size", type=int, default=1000, help="Applicants per worker task")
+    score.add_argument("--resolvers", default=os.getenv("BRE_FIELD_RESOLVERS", ""),
+                       help="Comma-separated modules registering lazy field resolvers "
+                            "(default: $BRE_FIELD_RESOLVERS)")
+    score.add_argument("--include-log", action="store_true", help="Include execution_log in each result")
+    score.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress lines")
+    score.add_argument("--quiet", action="store_true", help="No progress readout on stderr")
+    score.set_defaults(func=cmd_score)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
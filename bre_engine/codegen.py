@@ -0,0 +1,176 @@
+import weakref
+from collections import deque
+
+from .compiler import OPERATORS, CompiledPolicy, compile_policy
+
+
+# Source templates for the operators in compiler.OPERATORS
+_INLINE_OPERATORS = {
+    "==": "{v} == {c}",
+    "!=": "{v} != {c}",
+    ">": "{v} > {c}",
+    ">=": "{v} >= {c}",
+    "<": "{v} < {c}",
+    "<=": "{v} <= {c}",
+    "in": "{v} in {c}",
+    "not in": "{v} not in {c}",
+}
+
+_LITERAL_TYPES = (bool, int, str, type(None))
+
+
+class _Emitter:
+    """Accumulates source lines and a constant pool for one policy."""
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+
+    def emit(self, depth, line):
+        self.lines.append("    " * depth + line)
+
+    def const(self, value):
+        """Literal for simple values, otherwise a module-level constant."""
+        if isinstance(value, _LITERAL_TYPES):
+            return repr(value)
+        name = f"_K{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def field_access(self, depth, path):
+        """Inline BREEngine.get_value: v ends up as the value at path or None."""
+        self.emit(depth, "v = d")
+        for p in path:
+            key = repr(p)
+            self.emit(depth, f"v = v[{key}] if v is not None and {key} in v else None")
+
+    def condition(self, depth, cond):
+        """Emit the field access and return the comparison expression."""
+        self.field_access(depth, cond.path)
+        if cond.op is not OPERATORS[cond.operator]:
+            # Bound to a prebuilt lookup (compiler.Membership)
+            return f"{self.const(cond.op)}(v, None)"
+        return _INLINE_OPERATORS[cond.operator].format(v="v", c=self.const(cond.value))
+
+    def test(self, depth, cond, plan):
+        """
+        Emit what a condition needs and return its test expression. A shared
+        predicate is computed once per decision into m[slot].
+        """
+        slot = plan.predicate_slots[cond.index]
+        if slot >= plan.shared_predicates:
+            return self.condition(depth, cond)
+        self.emit(depth, f"p = m[{slot}]")
+        self.emit(depth, "if p is None:")
+        expr = self.condition(depth + 1, cond)
+        self.emit(depth + 1, f"p = m[{slot}] = bool({expr})")
+        return "p"
+
+
+def _policy_from(policy):
+    if isinstance(policy, CompiledPolicy):
+        return policy
+    if hasattr(policy, "model_dump"):  # bre_models.LoanBREGraph
+        policy = policy.model_dump(exclude_unset=True)
+    return compile_policy(policy)
+
+
+def generate_source(policy):
+    """
+    Generate Python source for a policy.
+    policy: CompiledPolicy, validated LoanBREGraph, dict or JSON string.
+    Returns (source, constants); constants must be the module globals of the code.
+
+    Each rule becomes a function with its field accesses and comparisons
+    inlined; it returns (False, reason) on failure or (True, next_rule_ids).
+    Predicates shared between conditions are memoized per decision.
+    The chain driver keeps BREEngine's BFS and visited-set semantics so the
+    result is identical to BREEngine.run.
+    """
+    plan = _policy_from(policy)
+    out = _Emitter()
+
+    out.emit(0, f"# Generated from policy {plan.id!r} ({plan.name!r})")
+    for rule in plan.rules:
+        out.emit(0, "")
+        out.emit(0, f"def _rule_{rule.index}(d, m):")
+        out.emit(1, f"# {rule.id!r}: {rule.name!r}")
+        for cond in rule.conditions:
+            expr = out.test(1, cond, plan)
+            out.emit(1, f"if not ({expr}):")
+            out.emit(2, f"return (False, {out.const(rule.on_false.reason)})")
+        for br in rule.on_true.branches:
+            out.emit(1, f"# branch: {br.name!r}")
+            depth = 1
+            for cond in br.conditions:
+                expr = out.test(depth, cond, plan)
+                out.emit(depth, f"if {expr}:")
+                depth += 1
+            out.emit(depth, f"return (True, {out.const(tuple(br.next_rules))})")
+        out.emit(1, f"return (True, {out.const(tuple(rule.on_true.next_rules))})")
+
+    out.emit(0, "")
+    out.emit(0, "_RULES = {")
+    for rule_id, rule in plan.rule_index.items():
+        out.emit(1, f"{rule_id!r}: _rule_{rule.index},")
+    out.emit(0, "}")
+
+    out.emit(0, "")
+    out.emit(0, "def _chain(d, m, entry):")
+    out.emit(1, "queue = _deque((entry,))")
+    out.emit(1, "visited = set()")
+    out.emit(1, "while queue:")
+    out.emit(2, "rule_id = queue.popleft()")
+    out.emit(2, "if rule_id in visited:")
+    out.emit(3, "continue")
+    out.emit(2, "visited.add(rule_id)")
+    out.emit(2, "fn = _RULES.get(rule_id)")
+    out.emit(2, "if fn is None:")
+    out.emit(3, "continue")
+    out.emit(2, "passed, out = fn(d, m)")
+    out.emit(2, "if not passed:")
+    out.emit(3, "return (out,)")
+    out.emit(2, "queue.extend(out)")
+    out.emit(1, "return None")
+
+    out.emit(0, "")
+    out.emit(0, "def decide(d):")
+    # Outcomes of shared predicates for this decision
+    out.emit(1, f"m = [None] * {plan.shared_predicates}" if plan.shared_predicates else "m = None")
+    for chain in plan.chains:
+        if chain.entry is None:
+            continue
+        out.emit(1, f"failed = _chain(d, m, {chain.entry.id!r})")
+        out.emit(1, "if failed is not None:")
+        out.emit(2, "return {'final_decision': 'REJECTED', 'reason': failed[0], 'execution_log': []}")
+    out.emit(1, f"return {{'final_decision': {out.const(plan.terminal_decision)}, 'reason': None, 'execution_log': []}}")
+
+    return "\n".join(out.lines) + "\n", dict(out.constants)
+
+
+def compile_decider(policy):
+    """
+    Generate, compile() and exec the source for a policy.
+    Returns decide(applicant_data), equivalent to BREEngine(policy, applicant_data, trace="off").run().
+    """
+    plan = _policy_from(policy)
+    source, constants = generate_source(plan)
+    namespace = {"_deque": deque, **constants}
+    code = compile(source, f"<bre-policy {plan.id}>", "exec")
+    exec(code, namespace)
+    decide = namespace["decide"]
+    decide.source = source
+    return decide
+
+
+# One generated function per compiled plan; plans are per policy version
+# (see PolicyCache), and entries go away with the plan.
+_deciders = weakref.WeakKeyDictionary()
+
+
+def get_decider(plan):
+    """Cached compile_decider() for a CompiledPolicy."""
+    decide = _deciders.get(plan)
+    if decide is None:
+        decide = _deciders[plan] = compile_decider(plan)
+    return decide
@@ -0,0 +1,505 @@
+import json
+import operator
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+
+from .reference import reference_lists, reference_name
+
+
+def contains(a, b):
+    return a in b
+
+
+def not_contains(a, b):
+    return a not in b
+
+
+def in_ranges(a, ranges):
+    return any(lo <= a <= hi for lo, hi in ranges)
+
+
+def not_in_ranges(a, ranges):
+    return not in_ranges(a, ranges)
+
+
+# Module-level callables (no lambdas) so compiled plans can be pickled
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "in": contains,
+    "not in": not_contains,
+    # value: [[lo, hi], ...] inclusive numeric ranges
+    "in range": in_ranges,
+    "not in range": not_in_ranges,
+}
+
+DEFAULT_FAIL_REASON = "Failed condition"
+DEFAULT_TERMINAL_DECISION = "ELIGIBLE"
+
+# Shorter `in` lists are scanned; a hash lookup only pays off past this
+MEMBERSHIP_SET_MIN = 16
+
+
+class PolicyCompileError(ValueError):
+    """Raised when a policy JSON cannot be compiled into an executable plan."""
+
+
+# ----------------------------------------------------------------------
+# Value Lookups
+# ----------------------------------------------------------------------
+# Built once per policy version (or per reference list file) so `in` and
+# `in range` checks against 10k-100k entries don't scan a list.
+
+class ValueSet:
+    """A JSON list as a hash set, giving the same `in` answers as the list."""
+
+    def __init__(self, values):
+        members = set()
+        unhashable = []
+        for v in values:
+            try:
+                members.add(v)
+            except TypeError:
+                unhashable.append(v)
+        self.members = frozenset(members)
+        # Lists / objects in the list, compared by scanning as before
+        self.unhashable = tuple(unhashable)
+
+    def __contains__(self, a):
+        try:
+            if a in self.members:
+                return True
+        except TypeError:
+            pass  # unhashable a, e.g. a list-valued field
+        return a in self.unhashable
+
+    def __len__(self):
+        return len(self.members) + len(self.unhashable)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class RangeSet:
+    """
+    Inclusive [lo, hi] numeric ranges, merged and sorted for bisect.
+    Same answers (and TypeErrors) as in_ranges.
+    """
+
+    def __init__(self, ranges):
+        if not isinstance(ranges, (list, tuple)):
+            raise ValueError("expected a list of [lo, hi] ranges")
+        pairs = []
+        for pair in ranges:
+            if not (isinstance(pair, (list, tuple)) and len(pair) == 2
+                    and _is_number(pair[0]) and _is_number(pair[1]) and pair[0] <= pair[1]):
+                raise ValueError(f"bad range {pair!r}, expected [lo, hi] numbers with lo <= hi")
+            pairs.append((pair[0], pair[1]))
+        self.starts = []
+        self.ends = []
+        for lo, hi in sorted(pairs):
+            if self.ends and lo <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], hi)
+            else:
+                self.starts.append(lo)
+                self.ends.append(hi)
+
+    def __contains__(self, a):
+        i = bisect_right(self.starts, a) - 1
+        return i >= 0 and a <= self.ends[i]
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class Membership:
+    """Condition operator bound to a prebuilt ValueSet / RangeSet; ignores the raw value."""
+
+    def __init__(self, lookup, negate=False):
+        self.lookup = lookup
+        self.negate = negate
+
+    def __call__(self, a, _value):
+        if self.negate:
+            return a not in self.lookup
+        return a in self.lookup
+
+
+def _reference_lookup(name, build, field):
+    try:
+        return reference_lists.load(name, build)
+    except FileNotFoundError as exc:
+        raise PolicyCompileError(f"Reference list '{name}' on field '{field}' not found") from exc
+    except ValueError as exc:
+        raise PolicyCompileError(f"Reference list '{name}' on field '{field}': {exc}") from exc
+
+
+def _bind_operator(operator_name, value, field):
+    """The callable a condition runs: a prebuilt lookup for large membership and range tests."""
+    ref = reference_name(value)
+    if operator_name in ("in", "not in"):
+        if ref is not None:
+            lookup = _reference_lookup(ref, ValueSet, field)
+        elif isinstance(value, list) and len(value) >= MEMBERSHIP_SET_MIN:
+            lookup = ValueSet(value)
+        else:
+            return OPERATORS[operator_name]
+        return Membership(lookup, negate=operator_name == "not in")
+    if operator_name in ("in range", "not in range"):
+        if ref is not None:
+            lookup = _reference_lookup(ref, RangeSet, field)
+        else:
+            try:
+                lookup = RangeSet(value)
+            except ValueError as exc:
+                raise PolicyCompileError(f"Field '{field}' {operator_name}: {exc}") from exc
+        return Membership(lookup, negate=operator_name == "not in range")
+    if ref is not None:
+        raise PolicyCompileError(f"Reference list on field '{field}' needs an in / in range operator")
+    return OPERATORS[operator_name]
+
+
+# ----------------------------------------------------------------------
+# Plan Nodes
+# ----------------------------------------------------------------------
+# The plan is built once by compile_policy() and then shared by every
+# BREEngine run, so none of these objects may be mutated after compilation.
+# Nodes use __slots__ and interned strings / shared path tuples: many
+# policy versions stay loaded per worker, and most of their ids, field
+# names and reasons repeat from one version to the next.
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+@lru_cache(maxsize=4096)
+def _field_path(field):
+    """One shared, interned path tuple per field name across all plans."""
+    return tuple(sys.intern(p) for p in field.split("."))
+
+
+def _slot_state(obj):
+    # A plain tuple in __slots__ order: smaller and faster to unpickle than a dict
+    return tuple([getattr(obj, name) for name in obj.__slots__])
+
+
+def _set_slots(obj, state):
+    for name, value in zip(obj.__slots__, state):
+        setattr(obj, name, value)
+
+
+class CompiledCondition:
+    """A condition with its field path pre-split and operator pre-resolved."""
+
+    __slots__ = ("field", "path", "operator", "op", "value", "index")
+
+    def __init__(self, field, operator_name, value):
+        if operator_name not in OPERATORS:
+            raise PolicyCompileError(f"Unknown operator '{operator_name}' on field '{field}'")
+        self.field = sys.intern(field)
+        self.path = _field_path(field)
+        self.operator = sys.intern(operator_name)
+        self.op = _bind_operator(operator_name, value, field)
+        # As written in the policy; a {"ref": name} list stays a reference
+        self.value = _intern(value)
+        # Position in CompiledPolicy.conditions, assigned after compilation
+        self.index = 0
+
+    __getstate__ = _slot_state
+    __setstate__ = _set_slots
+
+
+class CompiledBranch:
+    """A conditional branch of a rule's on_true outcome."""
+
+    __slots__ = ("name", "conditions", "next_rules", "targets")
+
+    def __init__(self, name, conditions, next_rules):
+        self.name = _intern(name)
+        self.conditions = conditions
+        self.next_rules = next_rules
+        # (rule_id, CompiledRule or None) pairs, filled in by the link step
+        self.targets = ()
+
+    def __getstate__(self):
+        # Pickle ids only; following targets (the last slot) would recurse through the whole graph
+        return _slot_state(self)[:-1]
+
+    def __setstate__(self, state):
+        _set_slots(self, state)
+        self.targets = ()
+
+
+class CompiledOutcome:
+    """The on_true / on_false side of a rule's action."""
+
+    __slots__ = ("decision", "reason", "next_rules", "branches", "targets")
+
+    def __init__(self, decision=None, reason=DEFAULT_FAIL_REASON, next_rules=(), branches=()):
+        self.decision = _intern(decision)
+        self.reason = _intern(reason)
+        self.next_rules = next_rules
+        self.branches = branches
+        # (rule_id, CompiledRule or None) pairs, filled in by the link step
+        self.targets = ()
+
+    __getstate__ = CompiledBranch.__getstate__
+    __setstate__ = CompiledBranch.__setstate__
+
+
+class CompiledRule:
+    __slots__ = ("index", "id", "name", "conditions", "on_true", "on_false")
+
+    def __init__(self, rule_id, name, conditions, on_true, on_false, index=0):
+        # Position in CompiledPolicy.rules, used by compact execution traces
+        self.index = index
+        self.id = _intern(rule_id)
+        self.name = _intern(name)
+        self.conditions = conditions
+        self.on_true = on_true
+        self.on_false = on_false
+
+    __getstate__ = _slot_state
+    __setstate__ = _set_slots
+
+
+class CompiledChain:
+    __slots__ = ("id", "name", "entry", "tree_shaped")
+
+    def __init__(self, chain_id, name, entry):
+        self.id = _intern(chain_id)
+        self.name = _intern(name)
+        # First rule of the first ruleset; None for an empty chain
+        self.entry = entry
+        # Set by analyzer.prove_plan() when no rule can be reached twice
+        self.tree_shaped = False
+
+    __getstate__ = _slot_state
+    __setstate__ = _set_slots
+
+
+class CompiledPolicy:
+    """
+    Immutable, executable form of a Credit Policy.
+    Holds the chains in execution order, every rule in authoring order and
+    a rule-id index. All next_rules references are already resolved.
+    """
+
+    def __init__(self, policy_id, name, chains, rules, rule_index, terminal_decision):
+        self.id = policy_id
+        self.name = name
+        self.chains = chains
+        self.rules = rules
+        self.rule_index = rule_index
+        self.terminal_decision = terminal_decision
+        # Every rule and branch condition, indexed by CompiledCondition.index
+        self.conditions = _number_conditions(rules)
+        # Distinct applicant field paths the policy reads; nothing else affects a decision
+        self.field_paths = tuple(sorted({cond.path for cond in self.conditions}))
+        # Predicate slot per condition index; identical (field, operator, value)
+        # predicates share one. Slots below shared_predicates occur more than
+        # once and are evaluated at most once per decision.
+        self.predicate_slots, self.shared_predicates = _predicate_slots(self.conditions)
+        # CreditPolicy.version of the source, when known (set by PolicyCache)
+        self.version = None
+
+    def __setstate__(self, state):
+        # Plans are pickled without resolved targets (e.g. for worker processes)
+        self.__dict__.update(state)
+        _link(self.rules, self.rule_index)
+
+    def __repr__(self):
+        return f"<CompiledPolicy {self.id} rules={len(self.rules)}>"
+
+
+# ----------------------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------------------
+
+def _compile_conditions(conditions):
+    return tuple(
+        CompiledCondition(cond["field"], cond["operator"], cond["value"])
+        for cond in conditions or ()
+    )
+
+
+def _rule_ids(next_rules):
+    return tuple(_intern(rule_id) for rule_id in next_rules or ())
+
+
+def _compile_outcome(outcome):
+    if not outcome:
+        return CompiledOutcome()
+    branches = tuple(
+        CompiledBranch(
+            br["name"],
+            _compile_conditions(br.get("conditions")),
+            _rule_ids(br.get("next_rules")),
+        )
+        for br in outcome.get("branches") or ()
+    )
+    return CompiledOutcome(
+        decision=outcome.get("decision"),
+        reason=outcome.get("reason", DEFAULT_FAIL_REASON),
+        next_rules=_rule_ids(outcome.get("next_rules")),
+        branches=branches,
+    )
+
+
+def _compile_rule(rule, index):
+    action = rule.get("action") or {}
+    return CompiledRule(
+        rule["id"],
+        rule.get("name", ""),
+        _compile_conditions(rule.get("conditions")),
+        _compile_outcome(action.get("on_true")),
+        _compile_outcome(action.get("on_false")),
+        index,
+    )
+
+
+def _resolve(next_rules, rule_index):
+    return tuple((rule_id, rule_index.get(rule_id)) for rule_id in next_rules)
+
+
+def _link(rules, rule_index):
+    """Resolve every next_rules reference to its rule object."""
+    for rule in rules:
+        for outcome in (rule.on_true, rule.on_false):
+            outcome.targets = _resolve(outcome.next_rules, rule_index)
+            for br in outcome.branches:
+                br.targets = _resolve(br.next_rules, rule_index)
+
+
+def _number_conditions(rules):
+    conditions = []
+    for rule in rules:
+        groups = [rule.conditions] + [br.conditions for br in rule.on_true.branches]
+        for group in groups:
+            for cond in group:
+                cond.index = len(conditions)
+                conditions.append(cond)
+    return tuple(conditions)
+
+
+def _predicate_key(cond):
+    # JSON form keeps 1, 1.0 and True apart and makes list values hashable
+    return cond.path, cond.operator, json.dumps(cond.value, sort_keys=True, default=repr)
+
+
+def _predicate_slots(conditions):
+    """Number the distinct predicates, the repeated ones first."""
+    keys = [_predicate_key(cond) for cond in conditions]
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    slots = {}
+    for key, count in counts.items():
+        if count > 1:
+            slots[key] = len(slots)
+    shared = len(slots)
+    for key in counts:
+        if key not in slots:
+            slots[key] = len(slots)
+    return tuple(slots[key] for key in keys), shared
+
+
+def compile_policy(policy):
+    """
+    Compile a policy into a CompiledPolicy.
+    policy: JSON string (e.g. CreditPolicy.policyJSON) or an already parsed dict
+    """
+    if isinstance(policy, (str, bytes, bytearray)):
+        try:
+            policy = json.loads(policy)
+        except json.JSONDecodeError as exc:
+            raise PolicyCompileError(f"Invalid policy JSON: {exc}") from exc
+
+    try:
+        rules = []
+        rule_index = {}
+        duplicates = []
+        chains = []
+        for chain in policy["chains"]:
+            entry = None
+            for ruleset in chain["rulesets"]:
+                for rule_data in ruleset["rules"]:
+                    rule = _compile_rule(rule_data, len(rules))
+                    rules.append(rule)
+                    if rule.id in rule_index:
+                        duplicates.append(rule.id)
+                    else:
+                        rule_index[rule.id] = rule
+                    if entry is None and ruleset is chain["rulesets"][0]:
+                        entry = rule
+            chains.append((chain.get("id"), chain.get("name"), entry))
+
+        terminals = policy.get("terminal_nodes") or []
+        terminal_decision = (
+            terminals[0].get("decision", DEFAULT_TERMINAL_DECISION)
+            if terminals else DEFAULT_TERMINAL_DECISION
+        )
+    except (KeyError, TypeError, AttributeError) as exc:
+        raise PolicyCompileError(f"Malformed policy: {exc!r}") from exc
+
+    if duplicates:
+        raise PolicyCompileError(f"Duplicate rule ids: {', '.join(sorted(set(duplicates)))}")
+
+    _link(rules, rule_index)
+
+    return CompiledPolicy(
+        policy_id=policy.get("id"),
+        name=policy.get("name"),
+        chains=tuple(
+            CompiledChain(cid, name, entry) for cid, name, entry in chains
+        ),
+        rules=tuple(rules),
+        rule_index=rule_index,
+        terminal_decision=terminal_decision,
+    )
+
+
+def uses_reference_lists(plan):
+    """Does plan read {"ref": name} lists? Those files can change, so such plans are not kept."""
+    return any(reference_name(cond.value) is not None for cond in plan.conditions)
+
+
+# Plans for callers that hold policy text rather than a plan (BREEngine given
+# a CreditPolicy, VectorizedPolicy given JSON), so they compile once per policy
+# version instead of on every call. policy_cache remains the cache for serving.
+PLAN_MEMO_SIZE = 32
+_plan_memo = OrderedDict()   # key -> (policy text, CompiledPolicy)
+_plan_memo_lock = threading.Lock()
+
+
+def compile_cached(policy_json, key=None):
+    """
+    compile_policy(policy_json) for JSON text, memoized under key, e.g.
+    (policy id, version, updated_at); the text itself by default. An entry
+    only matches the text it was compiled from, so a reused key recompiles.
+    Plans reading reference lists are compiled afresh every time.
+    """
+    if key is None:
+        key = policy_json
+    with _plan_memo_lock:
+        entry = _plan_memo.get(key)
+        if entry is not None and entry[0] == policy_json:
+            _plan_memo.move_to_end(key)
+            return entry[1]
+
+    plan = compile_policy(policy_json)
+    if not uses_reference_lists(plan):
+        with _plan_memo_lock:
+            _plan_memo[key] = (policy_json, plan)
+            _plan_memo.move_to_end(key)
+            while len(_plan_memo) > PLAN_MEMO_SIZE:
+                _plan_memo.popitem(last=False)
+    return plan
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .trace import TRACE_OFF, TRACE_DECISION_ONLY, TRACE_VERBOSE
+
+
+# Levels whose results are plain data; structured results carry a live ExecutionTrace
+MEMO_TRACE_LEVELS = (TRACE_OFF, TRACE_DECISION_ONLY, TRACE_VERBOSE)
+
+
+def _field_value(applicant, path):
+    # Same lookup as BREEngine.get_value, so the key sees exactly what the engine sees
+    value = applicant
+    for p in path:
+        if value is None or p not in value:
+            return None
+        value = value[p]
+    return value
+
+
+def applicant_fingerprint(plan, applicant):
+    """
+    Canonical hash of the values at the field paths plan reads.
+    Raises TypeError/ValueError for payloads that can't be fingerprinted
+    (the engine would raise on them, or they aren't JSON values).
+    """
+    values = [_field_value(applicant, path) for path in plan.field_paths]
+    canonical = json.dumps(values, sort_keys=True, separators=(",", ":"), allow_nan=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class DecisionCache:
+    """
+    TTL- and size-bounded memo of decision results.
+
+    Keyed on the compiled plan (i.e. the policy version), the trace level
+    and a fingerprint of only the applicant fields the policy reads, so
+    retries and refreshes that differ in unread fields still hit. Failed
+    evaluations are never stored.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        # key -> (expires_at, plan, result); holding the plan keeps id(plan) unique
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.bypassed = 0
+
+    def get_or_run(self, plan, applicant, trace, run):
+        """
+        Return the memoized result for (plan, applicant, trace), or call run()
+        and remember what it returns. Results are copied on the way out.
+        """
+        if trace not in MEMO_TRACE_LEVELS:
+            with self._lock:
+                self.bypassed += 1
+            return run()
+        try:
+            key = (id(plan), trace, applicant_fingerprint(plan, applicant))
+        except (TypeError, ValueError):
+            with self._lock:
+                self.bypassed += 1
+            return run()
+
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _copy_result(entry[2])
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        result = run()
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, plan, _copy_result(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def _copy_result(result):
+    result = dict(result)
+    if "execution_log" in result:
+        result["execution_log"] = list(result["execution_log"])
+    return result
@@ -0,0 +1,192 @@
+import random
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from .bre_engine import BREEngine
+
+
+# Seconds; decisions and rules run in microseconds, policy loads in milliseconds
+DEFAULT_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.series = {}   # label values -> count
+
+    def inc(self, labels=(), amount=1):
+        # Callers hold the registry lock
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.series = {}   # label values -> [per-bucket counts (+Inf last), sum]
+
+    def observe(self, value, labels=()):
+        # Callers hold the registry lock
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _number(float(bound)))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def plan_labels(plan):
+    """(policy, version) labels for a CompiledPolicy: its JSON id and CreditPolicy version."""
+    return str(plan.id), "" if plan.version is None else str(plan.version)
+
+
+class Metrics:
+    """
+    Decision-service metrics in the Prometheus text format.
+
+    Policy loads and compiles are always timed when enabled (they are rare).
+    Decisions are sampled: with sample_rate 0.01 one decision in a hundred
+    runs on a TimedEngine that records per-chain and per-rule latency and
+    rule pass/fail counts. Disabled (sample_rate 0), sampled() is one
+    attribute check and the engine is never wrapped.
+    """
+
+    def __init__(self, sample_rate=0.0, rand=random.random):
+        self._lock = threading.Lock()
+        self.rand = rand
+        self.configure(sample_rate)
+
+        version = ("policy", "version")
+        self.policy_load = Histogram(
+            "bre_policy_load_seconds", "Time to fetch a policy from the database", ("policy_id",)
+        )
+        self.policy_compile = Histogram("bre_policy_compile_seconds", "Time to compile and analyse a policy", version)
+        self.decisions = Counter("bre_decisions_total", "Decisions evaluated (sampled)", version + ("decision",))
+        self.decision_time = Histogram("bre_decision_seconds", "Decision evaluation time (sampled)", version)
+        self.chain_time = Histogram("bre_chain_seconds", "Chain evaluation time (sampled)", version + ("chain",))
+        self.rule_time = Histogram("bre_rule_seconds", "Rule evaluation time (sampled)", version + ("rule",))
+        self.rule_outcomes = Counter(
+            "bre_rule_evaluations_total", "Rule outcomes (sampled)", version + ("rule", "outcome")
+        )
+        self._all = (
+            self.policy_load, self.policy_compile, self.decisions, self.decision_time,
+            self.chain_time, self.rule_time, self.rule_outcomes,
+        )
+
+    def configure(self, sample_rate):
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.enabled = self.sample_rate > 0
+
+    def sampled(self):
+        """Should this decision be instrumented?"""
+        return self.enabled and (self.sample_rate >= 1.0 or self.rand() < self.sample_rate)
+
+    def observe_load(self, policy_id, seconds):
+        with self._lock:
+            self.policy_load.observe(seconds, (str(policy_id),))
+
+    def observe_compile(self, plan, seconds):
+        with self._lock:
+            self.policy_compile.observe(seconds, plan_labels(plan))
+
+    def record_run(self, plan, decision, seconds, chains, rules):
+        """chains: [(chain id, seconds)]; rules: [(rule id, seconds, passed)]."""
+        labels = plan_labels(plan)
+        with self._lock:
+            self.decisions.inc(labels + (str(decision),))
+            self.decision_time.observe(seconds, labels)
+            for chain_id, elapsed in chains:
+                self.chain_time.observe(elapsed, labels + (str(chain_id),))
+            for rule_id, elapsed, passed in rules:
+                self.rule_time.observe(elapsed, labels + (rule_id,))
+                self.rule_outcomes.inc(labels + (rule_id, "pass" if passed else "fail"))
+
+    def render(self):
+        lines = [
+            "# HELP bre_metrics_sample_rate Fraction of decisions instrumented",
+            "# TYPE bre_metrics_sample_rate gauge",
+            f"bre_metrics_sample_rate {_number(self.sample_rate)}",
+        ]
+        with self._lock:
+            for metric in self._all:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            for metric in self._all:
+                metric.series.clear()
+
+
+class TimedEngine(BREEngine):
+    """BREEngine that times every chain and rule and reports the run to a Metrics."""
+
+    def __init__(self, credit_policy, applicant_data, metrics, **kwargs):
+        super().__init__(credit_policy, applicant_data, **kwargs)
+        self.metrics = metrics
+        self._chains = []
+        self._rules = []
+
+    def execute_rule(self, rule):
+        start = perf_counter()
+        result = super().execute_rule(rule)
+        self._rules.append((rule.id, perf_counter() - start, result["status"] == "PASS"))
+        return result
+
+    def execute_chain(self, chain):
+        start = perf_counter()
+        result = super().execute_chain(chain)
+        self._chains.append((chain.id, perf_counter() - start))
+        return result
+
+    def run(self):
+        start = perf_counter()
+        result = super().run()
+        self.metrics.record_run(
+            self.policy, result["final_decision"], perf_counter() - start, self._chains, self._rules
+        )
+        return result
+
+
+# Process-wide metrics, configured from app.config (BRE_METRICS_SAMPLE_RATE)
+metrics = Metrics()
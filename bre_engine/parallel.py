@@ -0,0 +1,68 @@
+import copy
+import threading
+
+from .trace import EVENT_CHAIN, ExecutionTrace
+
+
+def _chain_engine(engine, cancelled):
+    """
+    A copy of engine for one chain: same policy, applicant, field lookups and
+    shared-predicate results, but its own trace.
+    """
+    child = copy.copy(engine)
+    child.trace = ExecutionTrace(engine.policy) if engine.trace is not None else None
+    child.cancelled = cancelled
+    return child
+
+
+def run_chains_parallel(engine, executor):
+    """
+    engine.run(), with the policy's chains evaluated concurrently on
+    executor (e.g. a ThreadPoolExecutor). Pays off when field lookups block,
+    e.g. an engine whose get_value calls out to bureau or fraud services.
+
+    Chains only read the applicant, so they can run in any order. The result
+    is still that of the sequential run: chains are consumed in policy order
+    and the first FAIL (or exception) decides. As soon as any chain fails,
+    the chains after it are cancelled; they stop before their next rule.
+    Traces are merged in chain order, so they match a sequential run too.
+    executor must not be the pool engine itself runs on, or it can deadlock.
+    """
+    chains = engine.policy.chains
+    if len(chains) < 2:
+        return engine.run()
+
+    cancel = [threading.Event() for _ in chains]
+
+    def cancel_after(index):
+        for event in cancel[index + 1:]:
+            event.set()
+
+    def on_done(index, future):
+        if future.cancelled() or future.exception() is not None or future.result()["status"] == "FAIL":
+            cancel_after(index)
+
+    children = []
+    futures = []
+    try:
+        for index, chain in enumerate(chains):
+            child = _chain_engine(engine, cancel[index])
+            future = executor.submit(child.execute_chain, chain)
+            future.add_done_callback(lambda f, index=index: on_done(index, f))
+            children.append(child)
+            futures.append(future)
+
+        trace = engine.trace
+        for index, (child, future) in enumerate(zip(children, futures)):
+            result = future.result()
+            if trace is not None:
+                trace.events.append((EVENT_CHAIN, index))
+                trace.events.extend(child.trace.events)
+            if result["status"] == "FAIL":
+                return engine._result("REJECTED", result.get("reason"), rejected=True)
+        return engine._result(engine.policy.terminal_decision, None, rejected=False)
+    finally:
+        # Whatever decided the run, nothing still queued or running matters now
+        for future in futures:
+            future.cancel()
+        cancel_after(-1)
@@ -0,0 +1,331 @@
+import re
+
+from .compiler import (
+    CompiledChain, CompiledPolicy, PolicyCompileError, _compile_rule, _link, compile_policy,
+)
+
+
+class PolicyPatchError(ValueError):
+    """Raised when a diff does not apply cleanly to a policy."""
+
+
+# ----------------------------------------------------------------------
+# Paths
+# ----------------------------------------------------------------------
+
+_TOKEN = re.compile(r"\[([^\]]*)\]|([^.\[\]]+)")
+
+
+def parse_path(path):
+    """
+    Split a diff path into its keys. Accepts JSON pointers
+    ("/chains/0/rulesets/1/rules/2/conditions/0/value") and the dotted form
+    the copilot tends to produce ("chains[0].rulesets[1].rules[2].conditions[0].value").
+    List positions may also be given as an element id ("rules[age_check]").
+    """
+    if isinstance(path, (list, tuple)):
+        return tuple(path)
+    if not isinstance(path, str):
+        raise PolicyPatchError(f"Invalid path: {path!r}")
+    if path.startswith("/"):
+        return tuple(p.replace("~1", "/").replace("~0", "~") for p in path[1:].split("/"))
+    if path in ("", "$"):
+        return ()
+    tokens = []
+    for bracket, bare in _TOKEN.findall(path.lstrip("$.")):
+        tokens.append(bracket.strip("'\"") if bracket else bare)
+    return tuple(tokens)
+
+
+def _list_index(items, key, allow_end=False):
+    if isinstance(key, int):
+        index = key
+    elif key == "-" and allow_end:
+        return len(items)
+    elif isinstance(key, str) and key.lstrip("-").isdigit():
+        index = int(key)
+    else:
+        # Address list elements by their id, e.g. rules[age_check]
+        for i, item in enumerate(items):
+            if isinstance(item, dict) and item.get("id") == key:
+                return i
+        raise PolicyPatchError(f"No element with id '{key}'")
+    if index < 0:
+        index += len(items)
+    if not 0 <= index < len(items) + (1 if allow_end else 0):
+        raise PolicyPatchError(f"Index {key} out of range")
+    return index
+
+
+def _resolve(policy, keys):
+    """Return the container holding the last key, and the normalized keys leading to it."""
+    node = policy
+    normalized = []
+    for key in keys[:-1]:
+        if isinstance(node, list):
+            key = _list_index(node, key)
+        elif not isinstance(node, dict) or key not in node:
+            raise PolicyPatchError(f"Path not found: {'/'.join(map(str, keys))}")
+        normalized.append(key)
+        node = node[key]
+    return node, normalized
+
+
+# ----------------------------------------------------------------------
+# Scopes
+# ----------------------------------------------------------------------
+# The smallest part of the policy an edit can affect: a single rule, a
+# ruleset (its rule list changed), a chain (its ruleset list changed) or
+# the whole policy.
+
+SCOPE_POLICY = ()
+
+
+def scope_for(path, structural):
+    """
+    path: normalized keys of the edited value.
+    structural: True when an element was added to or removed from a list,
+    which widens the scope to the list's owner.
+    """
+    depth = len(path) - 1 if structural else len(path)
+    if len(path) >= 6 and depth >= 6 and path[:5:2] == ("chains", "rulesets", "rules"):
+        return ("rule", path[1], path[3], path[5])
+    if len(path) >= 4 and depth >= 4 and path[:3:2] == ("chains", "rulesets"):
+        return ("ruleset", path[1], path[3])
+    if len(path) >= 2 and depth >= 2 and path[0] == "chains":
+        return ("chain", path[1])
+    return SCOPE_POLICY
+
+
+def minimal_scopes(scopes):
+    """Drop scopes already covered by a wider one."""
+    scopes = set(scopes)
+    if SCOPE_POLICY in scopes:
+        return {SCOPE_POLICY}
+    chains = {s[1] for s in scopes if s[0] == "chain"}
+    rulesets = {s[1:] for s in scopes if s[0] == "ruleset"}
+    return {
+        s for s in scopes
+        if s[0] == "chain"
+        or (s[0] == "ruleset" and s[1] not in chains)
+        or (s[0] == "rule" and s[1] not in chains and s[1:3] not in rulesets)
+    }
+
+
+# ----------------------------------------------------------------------
+# Applying diffs
+# ----------------------------------------------------------------------
+
+_MISSING = object()
+
+
+class AppliedDiff:
+    """The scopes a diff touched, and enough state to undo it."""
+
+    def __init__(self):
+        self.scopes = set()
+        self._undo = []
+
+    def revert(self):
+        while self._undo:
+            self._undo.pop()()
+
+
+def _normalize_op(change):
+    """Map a copilot {path, old, new} entry or an RFC 6902 entry to (op, path, value, old)."""
+    if not isinstance(change, dict) or "path" not in change:
+        raise PolicyPatchError(f"Invalid diff entry: {change!r}")
+    if "op" in change:
+        op = change["op"]
+        if op not in ("add", "remove", "replace"):
+            raise PolicyPatchError(f"Unsupported diff op '{op}'")
+        return op, change["path"], change.get("value", _MISSING), _MISSING
+    old = change.get("old", _MISSING)
+    new = change.get("new", _MISSING)
+    if old is _MISSING or old is None:
+        op = "add" if new is not _MISSING else "remove"
+    elif new is _MISSING:
+        op = "remove"
+    else:
+        op = "replace"
+    return op, change["path"], new, old
+
+
+def _apply_one(policy, change, applied):
+    op, path, value, old = _normalize_op(change)
+    keys = parse_path(path)
+    if not keys:
+        raise PolicyPatchError("Cannot replace the whole policy with a diff")
+    parent, prefix = _resolve(policy, keys)
+    key = keys[-1]
+
+    if isinstance(parent, list):
+        key = _list_index(parent, key, allow_end=(op == "add"))
+        exists = key < len(parent)
+    elif isinstance(parent, dict):
+        exists = key in parent
+    else:
+        raise PolicyPatchError(f"Path not found: {path}")
+
+    current = parent[key] if exists else _MISSING
+    if old is not _MISSING and current is not _MISSING and current != old:
+        raise PolicyPatchError(f"Stale diff at {path}: expected {old!r}, found {current!r}")
+    if op in ("remove", "replace") and not exists:
+        raise PolicyPatchError(f"Path not found: {path}")
+    if op in ("add", "replace") and value is _MISSING:
+        raise PolicyPatchError(f"No value given for {path}")
+
+    structural = isinstance(parent, list) and op != "replace"
+    if op == "remove":
+        if isinstance(parent, list):
+            del parent[key]
+            applied._undo.append(lambda: parent.insert(key, current))
+        else:
+            # Restore key order too, so a reverted policy serializes identically
+            items = list(parent.items())
+            del parent[key]
+            applied._undo.append(lambda: (parent.clear(), parent.update(items)))
+    elif isinstance(parent, list) and op == "add":
+        parent.insert(key, value)
+        applied._undo.append(lambda: parent.pop(key))
+    else:
+        parent[key] = value
+        if current is _MISSING:
+            applied._undo.append(lambda: parent.pop(key))
+        else:
+            applied._undo.append(lambda: parent.__setitem__(key, current))
+
+    applied.scopes.add(scope_for(tuple(prefix) + (key,), structural))
+
+
+def apply_diff(policy, diff):
+    """
+    Apply diff entries to a parsed policy dict in place, all or nothing.
+    Returns an AppliedDiff whose scopes say what needs re-validating.
+    """
+    if not isinstance(diff, (list, tuple)):
+        raise PolicyPatchError("A diff must be a list of changes")
+    applied = AppliedDiff()
+    try:
+        for change in diff:
+            _apply_one(policy, change, applied)
+    except Exception:
+        applied.revert()
+        raise
+    applied.scopes = minimal_scopes(applied.scopes)
+    return applied
+
+
+# ----------------------------------------------------------------------
+# Compiled plans
+# ----------------------------------------------------------------------
+
+def rule_spans(policy):
+    """Position in CompiledPolicy.rules of the first rule of every ruleset, per chain."""
+    spans = []
+    position = 0
+    for chain in policy["chains"]:
+        starts = []
+        for ruleset in chain["rulesets"]:
+            starts.append(position)
+            position += len(ruleset["rules"])
+        spans.append(starts)
+    return spans
+
+
+def _copy(obj, **changes):
+    # Plan nodes use __slots__
+    clone = object.__new__(type(obj))
+    for name in obj.__slots__:
+        setattr(clone, name, changes[name] if name in changes else getattr(obj, name))
+    return clone
+
+
+def _condition_count(rule):
+    return len(rule.conditions) + sum(len(br.conditions) for br in rule.on_true.branches)
+
+
+def _clone_rule(rule, index, condition_offset):
+    """
+    A copy of an unchanged rule for the new plan; nothing is re-parsed.
+    Rules and outcomes are copied because their targets are relinked;
+    conditions are shared unless the edit shifted their index.
+    """
+    if rule.conditions:
+        first = rule.conditions[0]
+    else:
+        first = next((br.conditions[0] for br in rule.on_true.branches if br.conditions), None)
+    if first is None or first.index == condition_offset:
+        conditions = lambda conds: conds
+    else:
+        conditions = lambda conds: tuple(_copy(c) for c in conds)
+
+    def outcome(o):
+        branches = tuple(_copy(br, conditions=conditions(br.conditions)) for br in o.branches)
+        return _copy(o, branches=branches)
+
+    return _copy(
+        rule,
+        index=index,
+        conditions=conditions(rule.conditions),
+        on_true=outcome(rule.on_true),
+        on_false=outcome(rule.on_false),
+    )
+
+
+def patch_compiled(plan, policy, spans, scopes):
+    """
+    Build the plan for an edited policy from the previous one.
+
+    policy: the edited policy dict; spans: rule_spans() of the policy before
+    the edit; scopes: AppliedDiff.scopes. Only rules inside the touched scopes
+    are compiled again, the rest are copied from plan. Plans are shared by
+    concurrent runs, so the old one is left untouched.
+    """
+    if SCOPE_POLICY in scopes:
+        return compile_policy(policy)
+
+    chains_touched = {s[1] for s in scopes if s[0] == "chain"}
+    rulesets_touched = {s[1:] for s in scopes if s[0] == "ruleset"}
+    rules_touched = {s[1:] for s in scopes if s[0] == "rule"}
+
+    try:
+        rules = []
+        rule_index = {}
+        duplicates = []
+        chains = []
+        condition_offset = 0
+        for ci, chain in enumerate(policy["chains"]):
+            entry = None
+            for rsi, ruleset in enumerate(chain["rulesets"]):
+                reuse = ci not in chains_touched and (ci, rsi) not in rulesets_touched
+                for ri, rule_data in enumerate(ruleset["rules"]):
+                    if reuse and (ci, rsi, ri) not in rules_touched:
+                        rule = _clone_rule(plan.rules[spans[ci][rsi] + ri], len(rules), condition_offset)
+                    else:
+                        rule = _compile_rule(rule_data, len(rules))
+                    condition_offset += _condition_count(rule)
+                    rules.append(rule)
+                    if rule.id in rule_index:
+                        duplicates.append(rule.id)
+                    else:
+                        rule_index[rule.id] = rule
+                    if entry is None and rsi == 0:
+                        entry = rule
+            chains.append(CompiledChain(chain.get("id"), chain.get("name"), entry))
+    except (KeyError, TypeError, AttributeError) as exc:
+        raise PolicyCompileError(f"Malformed policy: {exc!r}") from exc
+
+    if duplicates:
+        raise PolicyCompileError(f"Duplicate rule ids: {', '.join(sorted(set(duplicates)))}")
+
+    _link(rules, rule_index)
+
+    return CompiledPolicy(
+        policy_id=policy.get("id"),
+        name=policy.get("name"),
+        chains=tuple(chains),
+        rules=tuple(rules),
+        rule_index=rule_index,
+        terminal_decision=plan.terminal_decision,
+    )
@@ -0,0 +1,150 @@
+try:
+    import ijson
+except ImportError:  # optional dependency, only needed for streaming projection
+    ijson = None
+
+
+# Marks a trie node whose whole value is kept
+_WHOLE = None
+
+
+def _require_ijson():
+    if ijson is None:
+        raise ImportError("Streaming projection requires ijson (pip install ijson)")
+
+
+def field_trie(paths):
+    """
+    Nest field paths into {key: subtrie}; a path's last key maps to _WHOLE.
+    A path that is a prefix of another keeps the whole value.
+    """
+    trie = {}
+    for path in sorted(paths, key=len):
+        node = trie
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+            if node is _WHOLE:
+                break
+        else:
+            node[path[-1]] = _WHOLE
+    return trie
+
+
+def _project(value, trie):
+    if trie is _WHOLE or not isinstance(value, dict):
+        # Non-objects are kept as they are: BREEngine.get_value behaves the
+        # same on them (None, or the same TypeError) as on the original.
+        return value
+    return {key: _project(value[key], sub) for key, sub in trie.items() if key in value}
+
+
+def project(data, paths):
+    """
+    Copy of data holding only what BREEngine.get_value can read at paths
+    (e.g. CompiledPolicy.field_paths); decisions on the copy are identical.
+    """
+    return _project(data, field_trie(paths))
+
+
+# ----------------------------------------------------------------------
+# Streaming
+# ----------------------------------------------------------------------
+# Works on ijson.basic_parse events, so skipped subtrees (bureau reports,
+# documents) are never turned into Python objects.
+
+_OPEN = ("start_map", "start_array")
+_CLOSE = ("end_map", "end_array")
+
+
+def _skip(events, first):
+    if first[0] not in _OPEN:
+        return
+    depth = 1
+    for event, _ in events:
+        if event in _OPEN:
+            depth += 1
+        elif event in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _build(events, first):
+    event, value = first
+    if event not in _OPEN:
+        return value
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for event, value in events:
+        builder.event(event, value)
+        if event in _OPEN:
+            depth += 1
+        elif event in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return builder.value
+
+
+def _stream_project(events, first, trie):
+    if trie is _WHOLE or first[0] != "start_map":
+        return _build(events, first)
+    out = {}
+    for event, key in events:
+        if event == "end_map":
+            return out
+        nxt = next(events)
+        sub = trie.get(key, False)
+        if sub is False:
+            _skip(events, nxt)
+        else:
+            out[key] = _stream_project(events, nxt, sub)
+    return out
+
+
+class _Reader:
+    """
+    ijson probes its input with read(0); werkzeug's request stream takes an
+    empty read as a client disconnect, so answer that probe here.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size=-1):
+        if size == 0:
+            return b""
+        return self.stream.read(size)
+
+
+def stream_envelope(stream, paths_for, field="applicant"):
+    """
+    Parse a JSON object from a binary file-like object, projecting the value
+    of field to the paths returned by paths_for(envelope_so_far).
+    paths_for returns None when the paths are unknown (e.g. policy_id comes
+    after the applicant, or the policy isn't compiled); the value is then
+    kept whole. Every other top-level member is kept as is.
+    Raises ValueError on malformed JSON.
+    """
+    _require_ijson()
+    events = ijson.basic_parse(_Reader(stream), use_float=True)
+    try:
+        first = next(events)
+        if first[0] != "start_map":
+            return _build(events, first)
+        envelope = {}
+        for event, key in events:
+            if event == "end_map":
+                break
+            nxt = next(events)
+            if key == field:
+                paths = paths_for(envelope)
+                if paths is not None:
+                    envelope[key] = _stream_project(events, nxt, field_trie(paths))
+                    continue
+            envelope[key] = _build(events, nxt)
+        for _ in events:
+            raise ValueError("Extra data after JSON object")
+        return envelope
+    except (ijson.JSONError, StopIteration) as exc:
+        raise ValueError(f"Invalid JSON: {exc}") from exc
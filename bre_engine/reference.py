@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+
+
+# Directory holding reference lists named by {"ref": "<name>"} condition values
+REFERENCE_DIR = os.getenv("BRE_REFERENCE_DIR", "reference-lists")
+
+
+def reference_name(value):
+    """The list name if value is a {"ref": name} reference, else None."""
+    if isinstance(value, dict) and set(value) == {"ref"} and isinstance(value["ref"], str):
+        return value["ref"]
+    return None
+
+
+def _read_values(path):
+    """One JSON value per line; blank lines are skipped. Streamed line by line."""
+    values = []
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                values.append(json.loads(line))
+            except ValueError as exc:
+                raise ValueError(f"{path}:{number}: {exc}") from exc
+    return values
+
+
+class ReferenceLists:
+    """
+    Loads reference lists (pincode allow-lists, employer deny-lists, ...)
+    kept outside policyJSON. Each list is parsed once per file version and
+    built into a lookup structure once, then shared by every policy version
+    that names it.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._entries = {}   # (path, builder) -> (mtime_ns, size, built)
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        if not name or os.path.basename(name) != name or name in (".", ".."):
+            raise ValueError(f"Invalid reference list name '{name}'")
+        return os.path.join(self.directory or REFERENCE_DIR, name)
+
+    def load(self, name, build=tuple):
+        """
+        build(values) for the named list, cached until the file changes.
+        Raises FileNotFoundError or ValueError.
+        """
+        path = self.path(name)
+        stat = os.stat(path)
+        key = (path, build)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                return entry[2]
+        built = build(_read_values(path))
+        with self._lock:
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, built)
+        return built
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide lists used by compile_policy
+reference_lists = ReferenceLists()
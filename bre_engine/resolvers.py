@@ -0,0 +1,294 @@
+import asyncio
+import importlib
+import threading
+from concurrent.futures import Future
+
+from .bre_engine import BREEngine
+from .trace import TRACE_OFF
+
+
+def _parts(field_path):
+    return tuple(field_path.split(".")) if isinstance(field_path, str) else tuple(field_path)
+
+
+def _walk(value, parts):
+    for p in parts:
+        if value is None or p not in value:
+            return None
+        value = value[p]
+    return value
+
+
+class FieldResolvers:
+    """
+    Lazy resolvers for expensive applicant attributes, registered per
+    field-path prefix ("applicant.bureau", "applicant.bank_statement", ...).
+
+    A resolver returns the whole subtree under its prefix, e.g.
+    {"score": 745, "enquiries": 2} for "applicant.bureau". It runs the first
+    time a decision reads a field under the prefix and is memoized for the
+    rest of that decision, so applicants rejected before any rule reads the
+    prefix never trigger the fetch. Values already present in the applicant
+    (pre-fetched by the caller) are used as-is.
+
+      register(prefix, resolve)              resolve(applicant) -> value
+      register_batch(prefix, resolve_many)   async resolve_many(applicants) -> [value, ...]
+
+    inputs lists the applicant paths a resolver reads (e.g. ["applicant.pan"])
+    so request projection keeps them; None (unknown) keeps whole applicants.
+
+    Batch resolvers serve evaluate_batch_async, which fetches each prefix once
+    for every applicant that needs it; a single decision calls them with a
+    one-applicant batch. Set loop to the server's event loop to run those
+    calls there (decisions must then be evaluated on other threads).
+    """
+
+    def __init__(self):
+        self._resolvers = {}   # prefix parts -> resolve
+        self._batch = {}       # prefix parts -> async resolve_many
+        self._inputs = {}      # prefix parts -> input path parts, or None if unknown
+        self._matches = {}     # field path parts -> registered prefix, or None
+        self._lock = threading.Lock()
+        self.loop = None
+
+    def __len__(self):
+        return len(self._resolvers.keys() | self._batch.keys())
+
+    def register(self, prefix, resolve, inputs=None):
+        self._add(self._resolvers, prefix, resolve, inputs)
+
+    def register_batch(self, prefix, resolve_many, inputs=None):
+        self._add(self._batch, prefix, resolve_many, inputs)
+
+    def _add(self, registry, prefix, resolver, inputs):
+        parts = _parts(prefix)
+        if not parts or not all(parts):
+            raise ValueError(f"Invalid resolver prefix '{prefix}'")
+        with self._lock:
+            registry[parts] = resolver
+            self._inputs[parts] = None if inputs is None else tuple(_parts(path) for path in inputs)
+            self._matches = {}
+
+    def clear(self):
+        with self._lock:
+            self._resolvers.clear()
+            self._batch.clear()
+            self._inputs.clear()
+            self._matches = {}
+
+    def match(self, parts):
+        """The longest registered prefix of parts, or None."""
+        try:
+            return self._matches[parts]
+        except KeyError:
+            pass
+        match = None
+        for n in range(len(parts), 0, -1):
+            if parts[:n] in self._resolvers or parts[:n] in self._batch:
+                match = parts[:n]
+                break
+        self._matches[parts] = match
+        return match
+
+    def reads_any(self, field_paths):
+        """Is any of field_paths (e.g. a plan's field_paths) served by a resolver?"""
+        return any(self.match(parts) is not None for parts in field_paths)
+
+    def with_inputs(self, field_paths):
+        """
+        field_paths plus the inputs of the resolvers serving them: the
+        applicant paths a decision needs. None if any of those resolvers
+        didn't declare its inputs.
+        """
+        paths = set(field_paths)
+        for parts in field_paths:
+            prefix = self.match(parts)
+            if prefix is not None:
+                inputs = self._inputs.get(prefix)
+                if inputs is None:
+                    return None
+                paths.update(inputs)
+        return tuple(sorted(paths))
+
+    def fetch(self, prefix, applicant):
+        resolve = self._resolvers.get(prefix)
+        if resolve is not None:
+            return resolve(applicant)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(f"Resolver for '{'.'.join(prefix)}' is async; evaluate the decision off the event loop")
+        return self.run(self.fetch_many(prefix, [applicant]))[0]
+
+    def run(self, coroutine):
+        """Run coroutine (e.g. evaluate_batch_async) to completion from a thread without a running loop."""
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            # On the server's loop, where the resolver's clients and connections live
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+        return asyncio.run(coroutine)
+
+    async def fetch_many(self, prefix, applicants):
+        resolve_many = self._batch.get(prefix)
+        if resolve_many is not None:
+            values = list(await resolve_many(applicants))
+            if len(values) != len(applicants):
+                raise ValueError(f"Resolver for '{'.'.join(prefix)}' returned {len(values)} values "
+                                 f"for {len(applicants)} applicants")
+            return values
+        # Plain resolvers may block: run them off the event loop, concurrently
+        loop = asyncio.get_running_loop()
+        resolve = self._resolvers[prefix]
+        return await asyncio.gather(*(loop.run_in_executor(None, resolve, a) for a in applicants))
+
+    def bind(self, applicant):
+        """Field lookups on applicant for one decision; pass as BREEngine(fields=...)."""
+        return ResolvedFields(self, applicant)
+
+
+class ResolvedFields:
+    """
+    One decision's view of an applicant: plain fields are read from the
+    applicant, resolver prefixes are fetched on first access and memoized.
+    Thread-safe, so chains evaluated concurrently share each fetch.
+    """
+
+    def __init__(self, resolvers, applicant):
+        self.resolvers = resolvers
+        self.applicant = applicant
+        self.values = {}      # prefix -> fetched value
+        self._pending = {}    # prefix -> Future, while being fetched
+        self._lock = threading.Lock()
+
+    def get(self, field_path):
+        parts = _parts(field_path)
+        prefix = self.resolvers.match(parts)
+        if prefix is None:
+            return _walk(self.applicant, parts)
+        value = _walk(self.applicant, prefix)
+        if value is None:
+            value = self.resolve(prefix)
+        return _walk(value, parts[len(prefix):])
+
+    def lazy(self, field_path):
+        """Would reading field_path fetch a resolver prefix not fetched yet?"""
+        prefix = self.resolvers.match(_parts(field_path))
+        return prefix is not None and prefix not in self.values and _walk(self.applicant, prefix) is None
+
+    def resolve(self, prefix):
+        with self._lock:
+            if prefix in self.values:
+                return self.values[prefix]
+            future = self._pending.get(prefix)
+            owner = future is None
+            if owner:
+                future = self._pending[prefix] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = self.resolvers.fetch(prefix, self.applicant)
+        except BaseException as exc:
+            with self._lock:
+                del self._pending[prefix]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            self.values[prefix] = value
+            del self._pending[prefix]
+        future.set_result(value)
+        return value
+
+
+# ----------------------------------------------------------------------
+# Batched async evaluation
+# ----------------------------------------------------------------------
+
+class FieldPending(Exception):
+    """Raised mid-decision when a resolver prefix has not been fetched yet."""
+
+    def __init__(self, prefix):
+        super().__init__(".".join(prefix))
+        self.prefix = prefix
+
+
+class _DeferredFields(ResolvedFields):
+    """ResolvedFields that never fetches inline; evaluate_batch_async fills values."""
+
+    def resolve(self, prefix):
+        try:
+            return self.values[prefix]
+        except KeyError:
+            raise FieldPending(prefix) from None
+
+
+def _evaluate_round(policy, applicants, fields, indexes, results, errors, trace):
+    """Run applicants[indexes] until each decides or waits; returns {prefix: [waiting indexes]}."""
+    waiting = {}
+    for i in indexes:
+        try:
+            results[i] = BREEngine(policy, applicants[i], trace=trace, fields=fields[i]).run()
+        except FieldPending as pending:
+            waiting.setdefault(pending.prefix, []).append(i)
+        except Exception as exc:
+            errors[i] = exc
+    return waiting
+
+
+async def evaluate_batch_async(policy, applicants, resolvers, trace=TRACE_OFF, executor=None):
+    """
+    Decide a batch of applicants, fetching lazy fields in batches.
+
+    Evaluation goes in rounds. Each round runs the applicants until they
+    decide or read a prefix not fetched yet; the applicants waiting on each
+    prefix are then fetched together (one fetch_many per prefix, prefixes
+    concurrently) and go into the next round. Applicants rejected early
+    never reach a fetch. Decisions are the same as running each applicant
+    with resolvers.bind().
+
+    A waiting decision can't be resumed, so each round re-runs it from the
+    start (fetched prefixes are kept): a decision reading k prefixes in turn
+    is evaluated up to k+1 times. Rounds run on executor (None: the loop's
+    default executor), never on the event loop itself.
+    policy should be a CompiledPolicy; returns [(result, error)] in input
+    order, exactly one of each pair None.
+    """
+    loop = asyncio.get_running_loop()
+    fields = [_DeferredFields(resolvers, applicant) for applicant in applicants]
+    results = [None] * len(applicants)
+    errors = [None] * len(applicants)
+
+    todo = range(len(applicants))
+    while todo:
+        waiting = await loop.run_in_executor(
+            executor, _evaluate_round, policy, applicants, fields, todo, results, errors, trace
+        )
+        batches = list(waiting.items())
+        fetched = await asyncio.gather(
+            *(resolvers.fetch_many(prefix, [applicants[i] for i in indexes]) for prefix, indexes in batches),
+            return_exceptions=True,
+        )
+        todo = []
+        for (prefix, indexes), values in zip(batches, fetched):
+            if isinstance(values, BaseException):
+                for i in indexes:
+                    errors[i] = values
+                continue
+            for i, value in zip(indexes, values):
+                fields[i].values[prefix] = value
+                todo.append(i)
+        todo.sort()
+
+    return list(zip(results, errors))
+
+
+# Process-wide resolvers used by decisions; see BRE_FIELD_RESOLVERS
+field_resolvers = FieldResolvers()
+
+
+def load_resolver_modules(names):
+    """Import the comma-separated modules in names, which register resolvers on field_resolvers."""
+    for name in filter(None, (name.strip() for name in (names or "").split(","))):
+        importlib.import_module(name)
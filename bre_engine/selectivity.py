@@ -0,0 +1,168 @@
+import weakref
+
+from .compiler import Membership
+
+
+# Operators that never raise on JSON values; ordering comparisons (None > 21)
+# and `in` against a string can, so they are never moved.
+_NON_RAISING = ("==", "!=")
+_MEMBERSHIP = ("in", "not in")
+
+
+def _is_reorderable(cond):
+    if cond.operator in _NON_RAISING:
+        return True
+    if cond.operator not in _MEMBERSHIP:
+        return False
+    # A hash-set lookup never raises either; a list scan only compares
+    return isinstance(cond.op, Membership) or isinstance(cond.value, (list, tuple, set, frozenset))
+
+
+def _cost(cond):
+    """Rough relative cost: one unit per path step plus the comparison."""
+    if cond.operator in _MEMBERSHIP and isinstance(cond.value, (list, tuple)) \
+            and not isinstance(cond.op, Membership):
+        return len(cond.path) + len(cond.value)
+    return len(cond.path) + 1
+
+
+def _runs(conditions):
+    """
+    Split a rule's conditions into (parent_path, run) groups, in order.
+    A run is a maximal stretch of reorderable conditions reading fields under
+    the same parent path; parent_path is None for a condition that stays put.
+    """
+    runs = []
+    for cond in conditions:
+        parent = cond.path[:-1] if _is_reorderable(cond) else None
+        if parent is not None and runs and runs[-1][0] == parent:
+            runs[-1][1].append(cond)
+        else:
+            runs.append((parent, [cond]))
+    return runs
+
+
+class SelectivityProfile:
+    """
+    Per-condition pass/fail counters for one compiled policy, and a rule
+    condition order derived from them.
+
+    reorder() sorts each run of reorderable conditions so the ones most
+    likely to fail per unit of cost run first. Only == / != / list
+    membership are moved, and only among siblings under one parent path;
+    before using a new order the engine checks that parent is an object
+    (or missing), which makes every moved lookup and comparison unable to
+    raise. AND of such predicates does not depend on order, so decisions,
+    reasons and exceptions are exactly those of the authoring order.
+
+    Counters are plain ints updated without a lock; under threads they are
+    approximate, which is fine for ordering.
+    """
+
+    def __init__(self, policy, reorder_every=None):
+        self.policy = policy
+        self.passed = [0] * len(policy.conditions)
+        self.failed = [0] * len(policy.conditions)
+        self.reorder_every = reorder_every
+        self.evaluations = 0
+        # rule index -> (reordered conditions, parent paths to check)
+        self.order = {}
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def _parents_are_objects(self, engine, parents):
+        lazy = getattr(engine.fields, "lazy", None)
+        for parent in parents:
+            if lazy is not None and lazy(parent):
+                # Probing would fetch it now, not when a condition needs it: keep authoring order
+                return False
+            try:
+                value = engine.get_value(parent)
+            except TypeError:
+                return False
+            if value is not None and not isinstance(value, dict):
+                return False
+        return True
+
+    def evaluate_rule(self, engine, rule):
+        """Evaluate rule.conditions for engine, counting outcomes and using the learned order."""
+        conditions = rule.conditions
+        planned = self.order.get(rule.index)
+        if planned is not None and self._parents_are_objects(engine, planned[1]):
+            conditions = planned[0]
+
+        passed_counts = self.passed
+        failed_counts = self.failed
+        result = True
+        for cond in conditions:
+            if engine.evaluate_condition(cond):
+                passed_counts[cond.index] += 1
+            else:
+                failed_counts[cond.index] += 1
+                result = False
+                break
+
+        self.evaluations += 1
+        if self.reorder_every and self.evaluations % self.reorder_every == 0:
+            self.reorder()
+        return result
+
+    # ------------------------------------------------------------------
+    # Ordering
+    # ------------------------------------------------------------------
+
+    def _score(self, cond):
+        # Laplace-smoothed failure rate; lower score runs first
+        passed, failed = self.passed[cond.index], self.failed[cond.index]
+        fail_rate = (failed + 1) / (passed + failed + 2)
+        return _cost(cond) / fail_rate
+
+    def reorder(self):
+        """Recompute the condition order of every rule from the current counters."""
+        order = {}
+        for rule in self.policy.rules:
+            if len(rule.conditions) < 2:
+                continue
+            ordered = []
+            parents = []
+            for parent, run in _runs(rule.conditions):
+                if parent is not None and len(run) > 1:
+                    run = sorted(run, key=self._score)
+                    parents.append(parent)
+                ordered.extend(run)
+            if parents and tuple(ordered) != rule.conditions:
+                order[rule.index] = (tuple(ordered), tuple(parents))
+        self.order = order
+
+    def snapshot(self):
+        """Counters per rule condition, for inspection."""
+        rows = []
+        for rule in self.policy.rules:
+            planned = self.order.get(rule.index)
+            position = {c.index: i for i, c in enumerate(planned[0])} if planned else {}
+            for i, cond in enumerate(rule.conditions):
+                passed, failed = self.passed[cond.index], self.failed[cond.index]
+                total = passed + failed
+                rows.append({
+                    "rule": rule.id,
+                    "field": cond.field,
+                    "operator": cond.operator,
+                    "passed": passed,
+                    "failed": failed,
+                    "pass_rate": passed / total if total else None,
+                    "position": position.get(cond.index, i),
+                })
+        return rows
+
+
+# One profile per compiled plan (i.e. per policy version)
+_profiles = weakref.WeakKeyDictionary()
+
+
+def profile_for(plan, reorder_every=10000):
+    profile = _profiles.get(plan)
+    if profile is None:
+        profile = _profiles[plan] = SelectivityProfile(plan, reorder_every=reorder_every)
+    return profile
@@ -0,0 +1,177 @@
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .bre_engine import BREEngine
+from .compiler import CompiledPolicy
+from .trace import TRACE_OFF
+
+
+# Upper bound on shadow policies per decision
+MAX_SHADOW_POLICIES = 8
+
+logger = logging.getLogger("bre.shadow")
+
+
+class FieldValues:
+    """
+    Memoized field lookups on one applicant. Shared by every engine that
+    evaluates it, so each field path is walked once per applicant.
+    """
+
+    def __init__(self, applicant):
+        self.applicant = applicant
+        self._values = {}
+
+    def get(self, field_path):
+        try:
+            return self._values[field_path]
+        except KeyError:
+            pass
+        parts = field_path.split(".") if isinstance(field_path, str) else field_path
+        value = self.applicant
+        for p in parts:
+            if value is None or p not in value:
+                value = None
+                break
+            value = value[p]
+        self._values[field_path] = value
+        return value
+
+
+class SharedLookupEngine(BREEngine):
+    """BREEngine reading applicant fields through a shared FieldValues."""
+
+    def __init__(self, credit_policy, fields, trace=TRACE_OFF):
+        super().__init__(credit_policy, fields.applicant, trace=trace, fields=fields)
+
+
+def evaluate_policies(policies, applicant, fields=None):
+    """
+    Evaluate one applicant against several policies, sharing field lookups.
+    policies: iterable of (policy_id, CompiledPolicy).
+    fields: the field source to share, e.g. the primary decision's
+    resolvers.ResolvedFields; by default a FieldValues on applicant.
+    Yields (policy_id, result, error); exactly one of result/error is None.
+    """
+    if fields is None:
+        fields = FieldValues(applicant)
+    for policy_id, plan in policies:
+        try:
+            yield policy_id, SharedLookupEngine(plan, fields).run(), None
+        except Exception as exc:
+            yield policy_id, None, exc
+
+
+def _decision(result):
+    return {"final_decision": result.get("final_decision"), "reason": result.get("reason")}
+
+
+class ShadowRunner:
+    """
+    Runs shadow (candidate) policies against live applicants on background
+    threads and logs where they disagree with the primary decision.
+
+    submit() only enqueues: the caller's response never waits on shadow
+    work. At most max_pending submissions are queued; beyond that new ones
+    are dropped (and counted) rather than let a slow shadow build a backlog.
+    resolve(policy_id) returns a CompiledPolicy or None and runs on the
+    shadow thread, so it may hit the DB.
+    """
+
+    def __init__(self, resolve, workers=1, max_pending=1000, recent=100):
+        self.resolve = resolve
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bre-shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.evaluated = 0
+        self.differed = 0
+        self.errors = 0
+        self.pairs = {}                     # (primary id, shadow id) -> [runs, differed]
+        self.recent = deque(maxlen=recent)  # latest differences
+
+    def submit(self, policy_id, primary, applicant, shadow_ids, fields=None):
+        """
+        Queue shadow_ids against applicant; primary is the decision that was
+        returned ({"final_decision", "reason"}). fields: the primary's field
+        source, if it resolved fields lazily. Returns False if dropped.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+            self.submitted += 1
+        future = self._pool.submit(self._run, policy_id, _decision(primary), applicant, list(shadow_ids), fields)
+        future.add_done_callback(self._done)
+        return True
+
+    def skip(self):
+        """Count a decision whose shadows could not run (e.g. projected applicant)."""
+        with self._lock:
+            self.skipped += 1
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _resolved(self, shadow_ids):
+        for shadow_id in shadow_ids:
+            try:
+                plan = self.resolve(shadow_id)
+            except Exception:
+                logger.exception("Shadow policy %s failed to load", shadow_id)
+                plan = None
+            if isinstance(plan, CompiledPolicy):
+                yield shadow_id, plan
+            else:
+                with self._lock:
+                    self.errors += 1
+
+    def _run(self, policy_id, primary, applicant, shadow_ids, fields=None):
+        for shadow_id, result, error in evaluate_policies(self._resolved(shadow_ids), applicant, fields):
+            if error is not None:
+                logger.warning("Shadow policy %s failed: %s", shadow_id, error)
+                with self._lock:
+                    self.errors += 1
+                continue
+            shadow = _decision(result)
+            differs = shadow != primary
+            with self._lock:
+                self.evaluated += 1
+                counts = self.pairs.setdefault((policy_id, shadow_id), [0, 0])
+                counts[0] += 1
+                if differs:
+                    counts[1] += 1
+                    self.differed += 1
+            if differs:
+                record = {"policy_id": policy_id, "shadow_policy_id": shadow_id,
+                          "primary": primary, "shadow": shadow}
+                self.recent.append(record)
+                logger.info("Shadow decision differs: %s", json.dumps(record, default=str))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "skipped": self.skipped,
+                "evaluated": self.evaluated,
+                "differed": self.differed,
+                "errors": self.errors,
+                "pairs": [
+                    {"policy_id": p, "shadow_policy_id": s, "runs": runs, "differed": differed}
+                    for (p, s), (runs, differed) in self.pairs.items()
+                ],
+                "recent": list(self.recent),
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
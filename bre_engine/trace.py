@@ -0,0 +1,57 @@
+TRACE_OFF = "off"
+TRACE_DECISION_ONLY = "decision-only"
+TRACE_STRUCTURED = "structured"
+TRACE_VERBOSE = "verbose"
+
+TRACE_LEVELS = (TRACE_OFF, TRACE_DECISION_ONLY, TRACE_STRUCTURED, TRACE_VERBOSE)
+
+# Event codes (first element of every trace event tuple)
+EVENT_CHAIN = 0     # (EVENT_CHAIN, chain_index)
+EVENT_RULE = 1      # (EVENT_RULE, rule_index, passed, branch_index or -1)
+EVENT_MISSING = 2   # (EVENT_MISSING, rule_id)
+
+
+def final_decision_line(final_decision, rejected):
+    if rejected:
+        return "\nFINAL DECISION: ❌ REJECTED"
+    return f"\nFINAL DECISION: ✅ {final_decision}"
+
+
+class ExecutionTrace:
+    """
+    Compact record of one BREEngine run.
+    Events are small tuples of indexes into the compiled policy; the
+    human-readable execution log is only built when render() is called.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.events = []
+        self.final_decision = None
+        self.rejected = False
+
+    def render(self):
+        """Return the execution log as the list of strings BREEngine used to build eagerly."""
+        chains = self.policy.chains
+        rules = self.policy.rules
+        log = ["========== EXECUTING LOAN BRE =========="]
+
+        for event in self.events:
+            kind = event[0]
+            if kind == EVENT_CHAIN:
+                log.append(f"\n=== Executing chain: {chains[event[1]].name} ===")
+            elif kind == EVENT_RULE:
+                rule = rules[event[1]]
+                log.append(f"Evaluating rule: {rule.id} — {rule.name}")
+                if not event[2]:
+                    log.append(f"❌ FAIL: {rule.on_false.reason}")
+                    continue
+                log.append("✅ PASS")
+                if event[3] >= 0:
+                    log.append(f"➡ Branch taken: {rule.on_true.branches[event[3]].name}")
+            elif kind == EVENT_MISSING:
+                log.append(f"⚠ Missing rule: {event[1]}")
+
+        if self.final_decision is not None:
+            log.append(final_decision_line(self.final_decision, self.rejected))
+        return log
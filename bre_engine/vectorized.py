@@ -0,0 +1,270 @@
+from collections import Counter, deque
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for columnar evaluation
+    np = None
+
+from .compiler import CompiledPolicy, Membership, RangeSet, compile_cached, compile_policy
+
+
+ERROR_DECISION = "ERROR"
+_ORDERING_OPERATORS = (">", ">=", "<", "<=")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Columnar evaluation requires numpy (pip install numpy)")
+
+
+# ----------------------------------------------------------------------
+# Column Access
+# ----------------------------------------------------------------------
+
+def _to_columns(table):
+    """
+    Normalise the input into {column name: 1-D ndarray}.
+    Accepts a NumPy structured array, a pyarrow.Table or a dict of sequences.
+    """
+    if isinstance(table, dict):
+        columns = {name: np.asarray(values) for name, values in table.items()}
+    elif hasattr(table, "column_names"):  # pyarrow.Table
+        columns = {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+    elif isinstance(table, np.ndarray) and table.dtype.names:
+        columns = {name: table[name] for name in table.dtype.names}
+    else:
+        raise TypeError("table must be a NumPy structured array, a pyarrow.Table or a dict of columns")
+
+    lengths = {len(col) for col in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    return columns, (lengths.pop() if lengths else 0)
+
+
+def _ambiguous_leaves(field_paths):
+    """Leaf names shared by several of the policy's fields (applicant.income, coapplicant.income)."""
+    counts = Counter(path[-1] for path in field_paths)
+    return {leaf for leaf, n in counts.items() if n > 1}
+
+
+def _lookup_column(columns, cond, ambiguous=()):
+    """
+    Columns are named by full field path (applicant.age) or by leaf name (age).
+    A leaf name shared by several fields (ambiguous) must be given in full.
+    """
+    if cond.field in columns:
+        return columns[cond.field]
+    leaf = cond.path[-1]
+    if leaf in ambiguous and leaf in columns:
+        raise ValueError(f"Column '{leaf}' is ambiguous for '{cond.field}'; "
+                         f"name columns by full field path")
+    return columns.get(leaf)
+
+
+def _null_mask(col):
+    """Rows that the scalar engine would read as None (missing, None or NaN)."""
+    if col.dtype.kind == "f":
+        return np.isnan(col)
+    if col.dtype.kind == "O":
+        return np.fromiter(
+            (v is None or (isinstance(v, float) and v != v) for v in col),
+            dtype=bool, count=len(col)
+        )
+    return np.zeros(len(col), dtype=bool)
+
+
+# ----------------------------------------------------------------------
+# Condition Masks
+# ----------------------------------------------------------------------
+
+def _is_number(value):
+    return isinstance(value, (int, float))
+
+
+def _fast_mask(cond, col, null):
+    """NumPy-native evaluation for numeric / fixed-width string columns; None if not applicable."""
+    value = cond.value
+    kind = col.dtype.kind
+
+    if isinstance(cond.op, Membership) and isinstance(cond.op.lookup, RangeSet):
+        ranges = cond.op.lookup
+        if kind not in "biuf" or not len(ranges):
+            return None
+        starts = np.asarray(ranges.starts)
+        ends = np.asarray(ranges.ends)
+        i = np.searchsorted(starts, col, side="right") - 1
+        hit = (i >= 0) & (col <= ends[np.maximum(i, 0)])
+        passed = ~hit if cond.op.negate else hit
+        # None in range raises in the scalar engine
+        passed[null] = False
+        return passed, null.copy()
+
+    if cond.operator in ("in", "not in"):
+        if not isinstance(value, list):
+            return None
+        if not ((kind in "biuf" and all(_is_number(v) for v in value))
+                or (kind == "U" and all(isinstance(v, str) for v in value))):
+            return None
+        hit = np.isin(col, value)
+        hit[null] = None in value
+        passed = hit if cond.operator == "in" else ~hit
+        return passed, np.zeros(len(col), dtype=bool)
+
+    if not ((kind in "biuf" and _is_number(value)) or (kind == "U" and isinstance(value, str))):
+        return None
+
+    passed = np.asarray(cond.op(col, value), dtype=bool)
+    errors = np.zeros(len(col), dtype=bool)
+    if null.any():
+        if cond.operator in _ORDERING_OPERATORS:
+            # None > 21 raises in the scalar engine
+            passed[null] = False
+            errors[null] = True
+        else:
+            passed[null] = cond.op(None, value)
+    return passed, errors
+
+
+def _slow_mask(cond, col, null):
+    """Element-wise fallback with exact Python semantics (object columns, mixed types)."""
+    n = len(col)
+    passed = np.zeros(n, dtype=bool)
+    errors = np.zeros(n, dtype=bool)
+    value = cond.value
+    for i, v in enumerate(col.tolist()):
+        if null[i]:
+            v = None
+        try:
+            passed[i] = bool(cond.op(v, value))
+        except TypeError:
+            errors[i] = True
+    return passed, errors
+
+
+def condition_mask(cond, col, n):
+    """
+    Evaluate one CompiledCondition over a whole column.
+    Returns (passed, errors) boolean arrays; errors marks rows where the scalar
+    engine would raise (e.g. ordering comparison against a missing value).
+    """
+    if col is None:
+        col = np.full(n, None, dtype=object)
+    null = _null_mask(col)
+    result = _fast_mask(cond, col, null)
+    if result is None:
+        result = _slow_mask(cond, col, null)
+    return result
+
+
+# ----------------------------------------------------------------------
+# Policy Evaluation
+# ----------------------------------------------------------------------
+
+class ColumnarEvaluator:
+    """
+    Evaluates a compiled policy over a table of applicants at once.
+
+    Each condition is evaluated once per table as a column mask. Chains are
+    walked with the same BFS as BREEngine.execute_chain, except every queue
+    entry carries the mask of rows that reached it; restricted to one row the
+    queue order is exactly that row's scalar BFS order, so decisions and
+    reasons match BREEngine.run row for row.
+    """
+
+    def __init__(self, policy, table):
+        _require_numpy()
+        if isinstance(policy, CompiledPolicy):
+            self.policy = policy
+        elif isinstance(policy, str):
+            self.policy = compile_cached(policy)
+        else:
+            self.policy = compile_policy(policy)
+        self.columns, self.n = _to_columns(table)
+        self.decisions = np.full(self.n, self.policy.terminal_decision, dtype=object)
+        self.reasons = np.full(self.n, None, dtype=object)
+        self.alive = np.ones(self.n, dtype=bool)
+        self._masks = {}
+        self._ambiguous = _ambiguous_leaves(self.policy.field_paths)
+
+    def _condition(self, cond):
+        # Identical predicates share a slot, and so one mask
+        key = self.policy.predicate_slots[cond.index]
+        if key not in self._masks:
+            self._masks[key] = condition_mask(
+                cond, _lookup_column(self.columns, cond, self._ambiguous), self.n
+            )
+        return self._masks[key]
+
+    def evaluate_conditions(self, conditions, rows):
+        """Rows (of the given mask) that pass all conditions, short-circuiting like the scalar engine."""
+        passed = rows.copy()
+        for cond in conditions:
+            if not passed.any():
+                break
+            ok, err = self._condition(cond)
+            erred = passed & err
+            if erred.any():
+                self.decisions[erred] = ERROR_DECISION
+                self.reasons[erred] = f"Cannot evaluate {cond.field} {cond.operator} {cond.value!r}"
+                self.alive &= ~erred
+            passed &= ok & ~err
+        return passed
+
+    def execute_chain(self, chain):
+        if chain.entry is None:
+            return
+
+        visited = {}
+        queue = deque([(chain.entry.id, chain.entry, self.alive.copy())])
+
+        while queue:
+            rule_id, rule, mask = queue.popleft()
+            seen = visited.get(rule_id)
+            mask = mask & self.alive if seen is None else mask & self.alive & ~seen
+            if not mask.any():
+                continue
+            visited[rule_id] = mask if seen is None else seen | mask
+
+            if rule is None:
+                continue
+
+            passed = self.evaluate_conditions(rule.conditions, mask)
+            failed = mask & ~passed & self.alive
+            if failed.any():
+                self.decisions[failed] = "REJECTED"
+                self.reasons[failed] = rule.on_false.reason
+                self.alive &= ~failed
+
+            remaining = passed
+            for br in rule.on_true.branches:
+                if not remaining.any():
+                    break
+                taken = self.evaluate_conditions(br.conditions, remaining)
+                if taken.any():
+                    queue.extend((nid, nrule, taken) for nid, nrule in br.targets)
+                remaining = remaining & ~taken & self.alive
+
+            if remaining.any():
+                queue.extend((nid, nrule, remaining) for nid, nrule in rule.on_true.targets)
+
+    def run(self):
+        for chain in self.policy.chains:
+            if not self.alive.any():
+                break
+            self.execute_chain(chain)
+        return {"final_decision": self.decisions, "reason": self.reasons}
+
+
+def evaluate_columnar(policy, table):
+    """
+    Run a policy over a table of applicants.
+    policy: CompiledPolicy (or policy JSON / dict)
+    table: NumPy structured array, pyarrow.Table or dict of columns, one
+           column per condition field (named applicant.age or age)
+    Returns {"final_decision": ndarray, "reason": ndarray}; rows the scalar
+    engine could not evaluate get final_decision "ERROR".
+    """
+    return ColumnarEvaluator(policy, table).run()
@@ -3,16 +3,21 @@ from pydantic import BaseModel
 from pydantic import ValidationError
 import json
 
+from bre_engine import compile_policy
+from bre_engine.patch import SCOPE_POLICY, apply_diff, patch_compiled, rule_spans
+
 # ---- Base Types ----
 
 class Condition(BaseModel):
     field: str
     operator: str
-    value: Union[str, int, float, bool, list]
+    value: Union[str, int, float, bool, list, Dict[str, str]]  # dict: {"ref": "<reference list>"}
 
 class ActionBranch(BaseModel):
     name: str
     condition: Optional[str] = None  # e.g., "employment_type == 'SALARIED'"
+    conditions: Optional[List[Condition]] = None
+    next_rules: Optional[List[str]] = None
     next_ruleset: Optional[str] = None
     next_subgraph: Optional[str] = None
 
@@ -139,4 +144,111 @@ def bre_to_d3(graph: LoanBREGraph) -> Dict[str, List[Dict[str, Any]]]:
                             "label": ""
                         })
 
-    return {"nodes": nodes, "links": links}
\ No newline at end of file
+    return {"nodes": nodes, "links": links}
+
+# ---- Incremental Editing ----
+
+def _plain_rule_links(rule: Rule) -> List[Dict[str, Any]]:
+    """The links bre_to_d3 emits for a rule without on_true branches."""
+    links = []
+    if rule.action.on_true and rule.action.on_true.next_rules:
+        links += [{"source": rule.id, "target": nxt, "label": "pass"} for nxt in rule.action.on_true.next_rules]
+    if rule.action.on_false and rule.action.on_false.next_rules:
+        links += [{"source": rule.id, "target": nxt, "label": ""} for nxt in rule.action.on_false.next_rules]
+    return links
+
+
+def _has_branches(rule: Rule) -> bool:
+    return bool(rule.action.on_true and rule.action.on_true.branches)
+
+
+def patch_d3_rule(d3: Dict[str, List[Dict[str, Any]]], old: Rule, new: Rule) -> bool:
+    """
+    Update a bre_to_d3 graph in place for one edited rule. Returns False when
+    the edit can't be patched locally (id change, branches, rule without
+    links); the caller then rebuilds the graph.
+    """
+    if old.id != new.id or _has_branches(old) or _has_branches(new):
+        return False
+    node = next((n for n in d3["nodes"] if n["id"] == old.id), None)
+    if node is None or node["group"] == "Terminal":
+        return False
+    positions = [i for i, link in enumerate(d3["links"]) if link["source"] == old.id]
+    if not positions or positions[-1] - positions[0] + 1 != len(positions):
+        return False
+    node["name"] = new.name or new.id
+    d3["links"][positions[0]:positions[-1] + 1] = _plain_rule_links(new)
+    return True
+
+
+class PolicyEditor:
+    """
+    A policy kept parsed, validated, compiled and laid out for D3 between
+    edits. apply() takes a diff (the copilot's {path, old, new} entries or
+    RFC 6902 add/remove/replace) and re-validates and recompiles only the
+    rules, rulesets or chains it touched.
+    """
+
+    def __init__(self, policy: Union[str, bytes, Dict[str, Any]]):
+        data = json.loads(policy) if isinstance(policy, (str, bytes, bytearray)) else policy
+        self.data = data
+        self.graph = LoanBREGraph(**data)
+        self.plan = compile_policy(data)
+        self.d3 = bre_to_d3(self.graph)
+        self._spans = rule_spans(data)
+
+    def _validate_scope(self, scope):
+        if scope == SCOPE_POLICY:
+            return LoanBREGraph(**self.data)
+        chain = self.data["chains"][scope[1]]
+        if scope[0] == "chain":
+            return Chain.model_validate(chain)
+        ruleset = chain["rulesets"][scope[2]]
+        if scope[0] == "ruleset":
+            return RuleSet.model_validate(ruleset)
+        return Rule.model_validate(ruleset["rules"][scope[3]])
+
+    def _store_scope(self, scope, model):
+        if scope == SCOPE_POLICY:
+            self.graph = model
+        elif scope[0] == "chain":
+            self.graph.chains[scope[1]] = model
+        elif scope[0] == "ruleset":
+            self.graph.chains[scope[1]].rulesets[scope[2]] = model
+        else:
+            self.graph.chains[scope[1]].rulesets[scope[2]].rules[scope[3]] = model
+
+    def apply(self, diff: List[Dict[str, Any]]):
+        """
+        Apply diff to the policy. All or nothing: raises PolicyPatchError,
+        ValidationError, PolicyCompileError (or whatever else went wrong) and
+        leaves the editor unchanged if any part fails. Returns the touched scopes.
+        """
+        applied = apply_diff(self.data, diff)
+        try:
+            models = {scope: self._validate_scope(scope) for scope in applied.scopes}
+            plan = patch_compiled(self.plan, self.data, self._spans, applied.scopes)
+        except Exception:
+            applied.revert()
+            raise
+
+        patched = True
+        for scope, model in models.items():
+            if scope and scope[0] == "rule":
+                old = self.graph.chains[scope[1]].rulesets[scope[2]].rules[scope[3]]
+                patched = patched and patch_d3_rule(self.d3, old, model)
+            else:
+                patched = False
+            self._store_scope(scope, model)
+        if not patched:
+            self.d3 = bre_to_d3(self.graph)
+
+        self.plan = plan
+        self._spans = rule_spans(self.data)
+        return applied.scopes
+
+    def to_json(self) -> str:
+        return json.dumps(self.data)
+
+    def d3_json(self) -> str:
+        return json.dumps(self.d3, separators=(",", ":"))
@@ -0,0 +1,54 @@
+"""Adding compiled plan column
+
+Revision ID: 4c2d8e1f7a90
+Revises: b995a9f0549d
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from alembic import op
+import logging
+import sqlalchemy as sa
+
+from bre_engine.artifact import build_artifact
+
+
+# revision identifiers, used by Alembic.
+revision = '4c2d8e1f7a90'
+down_revision = 'b995a9f0549d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('credit_policy', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('compiled_plan', sa.LargeBinary(), nullable=True))
+
+    # Store plans for policies already published; later saves keep them current
+    credit_policy = sa.table(
+        'credit_policy',
+        sa.column('id', sa.Integer),
+        sa.column('policyJSON', sa.Text),
+        sa.column('status', sa.String),
+        sa.column('compiled_plan', sa.LargeBinary),
+    )
+    bind = op.get_bind()
+    published = bind.execute(
+        sa.select(credit_policy.c.id, credit_policy.c.policyJSON)
+        .where(credit_policy.c.status == 'PUBLISHED', credit_policy.c.policyJSON.isnot(None))
+    ).all()
+    for policy_id, policy_json in published:
+        try:
+            artifact = build_artifact(policy_json)
+        except ValueError as exc:
+            logging.getLogger('alembic.env').warning(
+                'CreditPolicy %s left without a compiled plan: %s', policy_id, exc)
+            continue
+        if artifact is not None:
+            bind.execute(credit_policy.update()
+                         .where(credit_policy.c.id == policy_id)
+                         .values(compiled_plan=artifact))
+
+
+def downgrade():
+    with op.batch_alter_table('credit_policy', schema=None) as batch_op:
+        batch_op.drop_column('compiled_plan')
@@ -7,6 +7,16 @@ class StatusEnum(enum.Enum):
     PUBLISHED = "published"
     ARCHIVED = "archived"
 
+    @classmethod
+    def coerce(cls, status):
+        """status as a StatusEnum, given the enum, its name ("PUBLISHED", as forms submit it) or its value."""
+        if isinstance(status, cls) or status is None:
+            return status
+        try:
+            return cls[status]
+        except KeyError:
+            return cls(status)
+
 class CreditPolicy(BaseModel):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
@@ -14,6 +24,8 @@ class CreditPolicy(BaseModel):
     policyJSON_d3 = db.Column(db.Text, nullable=True)
     status = db.Column(db.Enum(StatusEnum), nullable=False, default=StatusEnum.DRAFT)
     version = db.Column(db.Integer, nullable=False)
+    # Compiled plan written when the policy is published (bre_engine.artifact)
+    compiled_plan = db.Column(db.LargeBinary, nullable=True)
 
     def __repr__(self):
         return f"<CreditPolicy {self.name}>"
@@ -1,35 +1,185 @@
-from sqlalchemy import event
-from .credit_policy import CreditPolicy
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from flask import current_app, has_app_context
+from .credit_policy import CreditPolicy, StatusEnum
 from . import db
 from bre_models import load_bre_graph_from_json, LoanBREGraph, bre_to_d3
+from bre_engine.artifact import build_artifact
+from bre_engine.cache import policy_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import logging
+import threading
+
+logger = logging.getLogger("nbre")
+
+# D3 graphs keyed by sha256 of policyJSON. Previewing or saving the same
+# policy text again reuses the graph instead of re-validating and re-laying it out.
+D3_CACHE_SIZE = 64
+_d3_cache = OrderedDict()
+_d3_lock = threading.Lock()
+
+# Graphs for saved policies are generated off the request path, after commit
+_d3_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bre-d3")
+_PENDING_D3 = "pending_d3"
+_PENDING_INVALIDATE = "pending_policy_invalidate"
+
+def _store_compiled_plan(target):
+    """Published policies carry their compiled plan, so workers load it instead of compiling."""
+    target.compiled_plan = None
+    if StatusEnum.coerce(target.status) is StatusEnum.PUBLISHED and target.policyJSON:
+        try:
+            target.compiled_plan = build_artifact(target.policyJSON)
+        except ValueError as exc:
+            logger.warning("CreditPolicy %s published without a compiled plan: %s", target.id, exc)
+
+@event.listens_for(CreditPolicy, 'before_insert')
+def before_insert_policy(mapper, connection, target):
+    _store_compiled_plan(target)
 
 @event.listens_for(CreditPolicy, 'after_insert')
 def after_insert_policy(mapper, connection, target):
+    _schedule_d3(target)
     print(f"CreditPolicy created: {target.name} ({target.id})")
 
 @event.listens_for(CreditPolicy, 'before_update')
-def after_update_policy(mapper, connection, target):
-    target.policyJSON_d3 = convert_to_d3js_format(target)
+def before_update_policy(mapper, connection, target):
+    state = inspect(target).attrs
+    if state.policyJSON.history.has_changes():
+        # Reuse a cached graph if we have one, otherwise generate it after
+        # commit; readers keep the previous graph until the new one is written
+        d3_graph_str = cached_d3(target.policyJSON)
+        if d3_graph_str is not None:
+            target.policyJSON_d3 = d3_graph_str
+        else:
+            _schedule_d3(target)
+    if state.policyJSON.history.has_changes() or state.status.history.has_changes():
+        _store_compiled_plan(target)
     print(f"CreditPolicy updating: {target.name} ({target.id})")
 
 @event.listens_for(CreditPolicy, 'after_update')
 def after_update_policy(mapper, connection, target):
+    _invalidate_on_commit(target)
     print(f"CreditPolicy updated: {target.name} ({target.id})")
 
-def convert_to_d3js_from_json(policyData): 
+@event.listens_for(CreditPolicy, 'after_delete')
+def after_delete_policy(mapper, connection, target):
+    _invalidate_on_commit(target)
+    print(f"CreditPolicy deleted: {target.name} ({target.id})")
+
+def _invalidate_on_commit(target):
+    # At flush the change isn't visible yet: a reader could re-cache the old
+    # row, and a rollback would leave a pointless eviction. Drop it on commit.
+    session = object_session(target)
+    if session is None:
+        policy_cache.invalidate(target.id)
+    else:
+        session.info.setdefault(_PENDING_INVALIDATE, set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def after_commit_invalidate(session):
+    for policy_id in session.info.pop(_PENDING_INVALIDATE, ()):
+        policy_cache.invalidate(policy_id)
+
+@event.listens_for(Session, 'after_commit')
+def after_commit_generate_d3(session):
+    pending = session.info.pop(_PENDING_D3, None)
+    if not pending or not has_app_context():
+        # Without an app to write back through, get_policy_d3 generates on read
+        return
+    app = current_app._get_current_object()
+    for policy_id, policy_json in pending.items():
+        future = _d3_executor.submit(_store_d3, app, policy_id, policy_json)
+        future.add_done_callback(lambda f, policy_id=policy_id: _log_d3_failure(f, policy_id))
+
+@event.listens_for(Session, 'after_rollback')
+def after_rollback_discard_d3(session):
+    session.info.pop(_PENDING_D3, None)
+    session.info.pop(_PENDING_INVALIDATE, None)
+
+# ----------------------------------------------------------------------
+# D3 conversion
+# ----------------------------------------------------------------------
+
+def policy_hash(policyData):
+    return hashlib.sha256(policyData.encode("utf-8")).hexdigest()
+
+def cached_d3(policyData):
+    """The cached D3 graph string for this policy text, or None."""
+    if not policyData:
+        return None
+    key = policy_hash(policyData)
+    with _d3_lock:
+        d3_graph_str = _d3_cache.get(key)
+        if d3_graph_str is not None:
+            _d3_cache.move_to_end(key)
+        return d3_graph_str
+
+def convert_to_d3js_from_json(policyData):
+    d3_graph_str = cached_d3(policyData)
+    if d3_graph_str is not None:
+        return d3_graph_str
+
     graph: LoanBREGraph = load_bre_graph_from_json(policyData)
-    print(graph.name)
-    print(graph.chains[0].id)
     d3_graph = bre_to_d3(graph)
-    d3_graph_str = json.dumps(d3_graph, indent=2)
+    d3_graph_str = json.dumps(d3_graph, separators=(",", ":"))
+    remember_d3(policyData, d3_graph_str)
     return d3_graph_str
 
+def remember_d3(policyData, d3_graph_str):
+    """Cache a graph built elsewhere (e.g. patched by PolicyEditor) for this policy text."""
+    with _d3_lock:
+        _d3_cache[policy_hash(policyData)] = d3_graph_str
+        _d3_cache.move_to_end(policy_hash(policyData))
+        while len(_d3_cache) > D3_CACHE_SIZE:
+            _d3_cache.popitem(last=False)
+
 def convert_to_d3js_format(creditPolicy):
-    graph: LoanBREGraph = load_bre_graph_from_json(creditPolicy.policyJSON)
-    print(graph.name)
-    print(graph.chains[0].id)
-    d3_graph = bre_to_d3(graph)
-    d3_graph_str = json.dumps(d3_graph, indent=2)
-    return d3_graph_str
-    
\ No newline at end of file
+    return convert_to_d3js_from_json(creditPolicy.policyJSON)
+
+def get_policy_d3(creditPolicy):
+    """
+    D3 graph for a saved policy: the cached graph of its current text, else
+    the stored column (the previous graph while the background job catches
+    up), else generated (and cached) now.
+    """
+    d3_graph_str = cached_d3(creditPolicy.policyJSON)
+    if d3_graph_str is not None:
+        return d3_graph_str
+    if creditPolicy.policyJSON_d3:
+        return creditPolicy.policyJSON_d3
+    return convert_to_d3js_format(creditPolicy)
+
+def _schedule_d3(target):
+    if not target.policyJSON:
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_D3, {})[target.id] = target.policyJSON
+
+def _store_d3(app, policy_id, policy_json):
+    try:
+        d3_graph_str = convert_to_d3js_from_json(policy_json)
+    except Exception:
+        logger.exception("D3 generation failed for CreditPolicy %s", policy_id)
+        return
+    with app.app_context():
+        # Bulk UPDATE: no mapper events, updated_at left as is, and skipped if
+        # the policy was edited again in the meantime.
+        try:
+            CreditPolicy.query.filter_by(id=policy_id, policyJSON=policy_json).update(
+                {"policyJSON_d3": d3_graph_str, "updated_at": CreditPolicy.updated_at},
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+def _log_d3_failure(future, policy_id):
+    # Nothing waits on these futures; without this a failed write vanishes
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Storing the D3 graph for CreditPolicy %s failed", policy_id, exc_info=exc)
@@ -1,14 +1,33 @@
 import os
-from flask import render_template, request, redirect, url_for, flash, current_app, jsonify
+from flask import render_template, request, redirect, url_for, flash, current_app, jsonify, Response, stream_with_context
 from app import app, db                 # Import existing app and db
 from forms import CreditPolicyForm
-from models.credit_policy import CreditPolicy
+from models.credit_policy import CreditPolicy, StatusEnum
 import google.generativeai as genai
 import json
 import logging, sys
-from bre_engine import BREEngine
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from bre_engine import BREEngine, CompiledPolicy, PolicyCompileError
+from bre_engine.cache import policy_cache
+from bre_engine.batch import evaluator_for, iter_ndjson_lines
+from bre_engine.trace import TRACE_LEVELS, TRACE_OFF, TRACE_VERBOSE
+from bre_engine.codegen import get_decider
+from bre_engine.selectivity import profile_for
+from bre_engine.analyzer import analyze_policy
+from bre_engine.memo import DecisionCache
+from bre_engine.shadow import MAX_SHADOW_POLICIES, ShadowRunner
+from bre_engine.metrics import TimedEngine, metrics
+from bre_engine.parallel import run_chains_parallel
+from bre_engine.resolvers import field_resolvers, load_resolver_modules
+from bre_engine import artifact, projection
+from bre_engine.projection import stream_envelope
 from werkzeug.exceptions import BadRequest, NotFound
-from models.events import convert_to_d3js_format, convert_to_d3js_from_json
+from flask_wtf.csrf import generate_csrf, validate_csrf
+from wtforms.validators import ValidationError
+from models.events import convert_to_d3js_format, convert_to_d3js_from_json, get_policy_d3, remember_d3
+from bre_models import PolicyEditor
 
 # Configure logging once (Flask will inherit this)
 logger = logging.getLogger("nbre")
@@ -25,6 +44,42 @@ if not logger.handlers:
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+if app.config.get("BRE_PROJECTION") and projection.ijson is None:
+    logger.warning("BRE_PROJECTION needs ijson (pip install ijson); parsing whole bodies instead")
+    app.config["BRE_PROJECTION"] = False
+
+# Memoized decisions for re-submitted applicants; disabled when the TTL is 0
+decision_cache = None
+if app.config.get("BRE_DECISION_CACHE_TTL"):
+    decision_cache = DecisionCache(
+        maxsize=app.config["BRE_DECISION_CACHE_SIZE"], ttl=app.config["BRE_DECISION_CACHE_TTL"]
+    )
+
+def _load_shadow_policy(policy_id):
+    with app.app_context():
+        return load_compiled_policy(policy_id)
+
+metrics.configure(app.config["BRE_METRICS_SAMPLE_RATE"])
+policy_cache.ttl = app.config["BRE_POLICY_CACHE_TTL"] or None
+artifact.configure_signing(app.config["BRE_ARTIFACT_KEY"])
+
+# Evaluates shadow_policy_ids on background threads, after the primary response
+shadow_runner = ShadowRunner(
+    _load_shadow_policy,
+    workers=app.config["BRE_SHADOW_WORKERS"],
+    max_pending=app.config["BRE_SHADOW_MAX_PENDING"],
+)
+
+# Modules registering lazy field resolvers on field_resolvers
+load_resolver_modules(app.config["BRE_FIELD_RESOLVERS"])
+
+# Evaluates a decision's chains concurrently, for policies whose lookups block
+chain_pool = None
+if app.config.get("BRE_PARALLEL_CHAINS"):
+    chain_pool = ThreadPoolExecutor(
+        max_workers=app.config["BRE_PARALLEL_CHAINS"], thread_name_prefix="bre-chain"
+    )
+
 @app.route('/creditpolicy')
 def list_policies():
     policies = CreditPolicy.query.all()
@@ -44,54 +99,141 @@ def load_policy_from_db(policy_id):
         # DB not configured or query failed
         return None
 
-
-@app.route("/run_policy", methods=["POST"])
-def run_policy_route():
+def preload_policy_cache():
     """
-    POST /run_policy
-    Body:
-    {
-        "policy_id": 1,
-        "applicant": { ... }               # applicant dict (same shape used by BRE)
-    }
-    Response: application/json
-    {
-      "policy_id": 1,
-      "final_decision": "ELIGIBLE" | "REJECTED",
-      "reason": null | "some reason",
-      "execution_log": [ "...", "..."],
-      "status": "ok"
-    }
+    Load every published policy into policy_cache in one query, from the
+    compiled plans stored at publish time. Call once per worker process on
+    boot (ASGI lifespan startup does; under a pre-forking WSGI server, call
+    it from the post-fork hook). Returns the number of plans cached.
     """
-    # parse JSON body
-    try:
-        payload = request.get_json(force=True)
-    except BadRequest:
-        return jsonify({"status": "error", "message": "Invalid JSON"}), 400
+    with app.app_context():
+        policies = CreditPolicy.query.filter_by(status=StatusEnum.PUBLISHED).all()
+        return policy_cache.preload(policies)
 
-    envelope = payload
 
-    policy_id = envelope.get("policy_id")
-    applicant = envelope.get("applicant")
+def load_compiled_policy(policy_id, lookup_cache=True):
+    """
+    Return the compiled plan for policy_id from the process-wide cache,
+    hitting the DB and compiling only on a miss. Returns None if not found.
+    lookup_cache=False goes straight to the DB (caller already missed).
+    """
+    try:
+        # Cache entries and listener invalidations use the integer primary key
+        policy_id = int(policy_id)
+    except (TypeError, ValueError):
+        return None
+    return policy_cache.get_or_load(policy_id, load_policy_from_db, lookup=lookup_cache)
 
-    if policy_id is None or applicant is None:
-        return jsonify({"status": "error", "message": "envelope must contain policy_id and applicant"}), 400
 
-    # Load policy from DB, fallback to sample file
-    policy_obj = load_policy_from_db(policy_id)
+def check_run_policy_envelope(envelope):
+    """
+    Validate a /run_policy envelope.
+    Returns None when valid, else an (error_body, status) pair.
+    """
+    if not isinstance(envelope, dict):
+        return {"status": "error", "message": "Body must be a JSON object"}, 400
+    if envelope.get("policy_id") is None or envelope.get("applicant") is None:
+        return {"status": "error", "message": "envelope must contain policy_id and applicant"}, 400
+    if envelope.get("trace", TRACE_VERBOSE) not in TRACE_LEVELS:
+        return {"status": "error", "message": f"trace must be one of {', '.join(TRACE_LEVELS)}"}, 400
+    shadow_ids = envelope.get("shadow_policy_ids")
+    if shadow_ids is not None and (
+            not isinstance(shadow_ids, list) or len(shadow_ids) > MAX_SHADOW_POLICIES
+            or any(isinstance(s, bool) or not isinstance(s, int) for s in shadow_ids)):
+        return {"status": "error",
+                "message": f"shadow_policy_ids must be a list of at most {MAX_SHADOW_POLICIES} policy ids"}, 400
+    return None
+
+def resolve_run_policy(policy_id, lookup_cache=True):
+    """
+    Load the policy for a decision: compiled-policy cache, then DB, then the sample file.
+    Returns (policy_obj, None) or (None, (error_body, status)).
+    May block on the DB; needs an app context.
+    """
+    try:
+        policy_obj = load_compiled_policy(policy_id, lookup_cache)
+    except PolicyCompileError as exc:
+        return None, ({"status": "error", "message": "Policy failed to compile", "detail": str(exc)}, 500)
     if policy_obj is None:
         # fallback: sample1.json in project root
         policy_obj = load_sample_policy_from_file("sample1.json")
         if policy_obj is None:
-            return jsonify({"status": "error", "message": "Policy not found and sample1.json missing"}), 404
+            return None, ({"status": "error", "message": "Policy not found and sample1.json missing"}, 404)
+    return policy_obj, None
+
+def bind_fields(applicant):
+    """The decision's lazy field source (see BRE_FIELD_RESOLVERS), or None without resolvers."""
+    return field_resolvers.bind(applicant) if len(field_resolvers) else None
+
+def submit_shadow_runs(envelope, response_body, projected=False, fields=None):
+    """
+    Queue the envelope's shadow policies against the same applicant.
+    fields: the primary decision's bind_fields(), so shadows see the same
+    resolved values (and reuse what it already fetched).
+    Never blocks; call once the primary response is on its way.
+    """
+    shadow_ids = envelope.get("shadow_policy_ids")
+    if not shadow_ids or response_body.get("status") != "ok":
+        return
+    if projected:
+        # The applicant was cut down to the primary policy's fields
+        app.logger.warning("Shadow runs skipped: list shadow_policy_ids before applicant when BRE_PROJECTION is on")
+        shadow_runner.skip()
+        return
+    shadow_runner.submit(envelope["policy_id"], response_body, envelope["applicant"], shadow_ids, fields)
+
+def referenced_paths(policy_obj):
+    """Applicant field paths a resolved policy reads, or None to keep the whole applicant."""
+    if isinstance(policy_obj, CompiledPolicy):
+        if len(field_resolvers):
+            # Resolvers read their own inputs (e.g. applicant.pan) from the applicant too
+            return field_resolvers.with_inputs(policy_obj.field_paths)
+        return policy_obj.field_paths
+    return None
+
+def execute_run_policy(envelope, policy_obj, fields=None):
+    """
+    Run one decision for a validated envelope. CPU only, unless resolvers
+    fetch fields. fields: from bind_fields(), bound here when not given.
+    Returns (response_body, status).
+    """
+    policy_id = envelope["policy_id"]
+    applicant = envelope["applicant"]
+    trace = envelope.get("trace", TRACE_VERBOSE)
+    if fields is None:
+        fields = bind_fields(applicant)
+
+    def evaluate():
+        # Sampled decisions run interpreted, timed per chain and rule
+        timed = metrics.enabled and isinstance(policy_obj, CompiledPolicy) and metrics.sampled()
+        # Lazy fields are fetched through the engine's get_value, which generated code bypasses
+        if trace == TRACE_OFF and isinstance(policy_obj, CompiledPolicy) \
+                and app.config.get("BRE_BACKEND") == "codegen" and not timed and fields is None:
+            # Generated-code backend: same decision, no interpretive dispatch
+            return get_decider(policy_obj)(applicant)
+        selectivity = None
+        if isinstance(policy_obj, CompiledPolicy) and app.config.get("BRE_SELECTIVITY"):
+            selectivity = profile_for(policy_obj)
+        if timed:
+            engine = TimedEngine(policy_obj, applicant, metrics, trace=trace, selectivity=selectivity, fields=fields)
+        else:
+            engine = BREEngine(policy_obj, applicant, trace=trace, selectivity=selectivity, fields=fields)
+        if chain_pool is not None and not timed:
+            return run_chains_parallel(engine, chain_pool)
+        return engine.run()
 
     # instantiate engine and run
     try:
-        engine = BREEngine(policy_obj, applicant)
-        result = engine.run()
+        if decision_cache is not None and isinstance(policy_obj, CompiledPolicy) \
+                and not field_resolvers.reads_any(policy_obj.field_paths):
+            # Retries and refreshes of the same applicant reuse the decision.
+            # Not when resolvers fetch fields: the key can't see what they return.
+            result = decision_cache.get_or_run(policy_obj, applicant, trace, evaluate)
+        else:
+            result = evaluate()
     except Exception as exc:
-        current_app.logger.exception("BRE execution error")
-        return jsonify({"status": "error", "message": "BRE execution failed", "detail": str(exc)}), 500
+        app.logger.exception("BRE execution error")
+        return {"status": "error", "message": "BRE execution failed", "detail": str(exc)}, 500
 
     # Compose response
     response = {
@@ -101,7 +243,196 @@ def run_policy_route():
         "execution_log": result.get("execution_log", []),
         "status": "ok"
     }
-    return jsonify(response), 200
+    if "trace" in result:
+        response["trace"] = result["trace"].events
+    return response, 200
+
+
+@app.route("/run_policy", methods=["POST"])
+def run_policy_route():
+    """
+    POST /run_policy
+    Body:
+    {
+        "policy_id": 1,
+        "applicant": { ... },              # applicant dict (same shape used by BRE)
+        "trace": "verbose",                # optional: off | decision-only | structured | verbose
+        "shadow_policy_ids": [2]           # optional: also run these policies off the request
+    }                                      # path and log where they disagree (/api/shadow/stats)
+    Response: application/json
+    {
+      "policy_id": 1,
+      "final_decision": "ELIGIBLE" | "REJECTED",
+      "reason": null | "some reason",
+      "execution_log": [ "...", "..."],
+      "trace": [ [1, 0, true, -1], ... ],  # only for trace=structured
+      "status": "ok"
+    }
+    The same contract is served without blocking by asgi.py.
+    """
+    resolved = {}
+    if app.config.get("BRE_PROJECTION"):
+        def paths_for(envelope):
+            # policy_id came before the applicant: resolve it now and keep
+            # only the fields that policy reads
+            if envelope.get("policy_id") is None:
+                return None
+            resolved["policy_id"] = envelope["policy_id"]
+            resolved["result"] = resolve_run_policy(envelope["policy_id"])
+            if envelope.get("shadow_policy_ids"):
+                return None   # shadow policies read other fields
+            paths = referenced_paths(resolved["result"][0])
+            resolved["projected"] = paths is not None
+            return paths
+
+        try:
+            payload = stream_envelope(request.stream, paths_for)
+        except ValueError:
+            return jsonify({"status": "error", "message": "Invalid JSON"}), 400
+    else:
+        # parse JSON body
+        try:
+            payload = request.get_json(force=True)
+        except BadRequest:
+            return jsonify({"status": "error", "message": "Invalid JSON"}), 400
+
+    error = check_run_policy_envelope(payload)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    # Load compiled policy (cache, then DB), fallback to sample file
+    if resolved:
+        if resolved["policy_id"] != payload["policy_id"]:
+            return jsonify({"status": "error", "message": "policy_id given more than once"}), 400
+        policy_obj, error = resolved["result"]
+    else:
+        policy_obj, error = resolve_run_policy(payload["policy_id"])
+    if error:
+        return jsonify(error[0]), error[1]
+
+    fields = bind_fields(payload["applicant"])
+    body, status = execute_run_policy(payload, policy_obj, fields)
+    response = jsonify(body)
+    if payload.get("shadow_policy_ids"):
+        # Runs once the response has been sent
+        response.call_on_close(
+            lambda: submit_shadow_runs(payload, body, resolved.get("projected", False), fields)
+        )
+    return response, status
+
+@app.route("/run_policy/batch", methods=["POST"])
+def run_policy_batch_route():
+    """
+    POST /run_policy/batch
+    JSON body:
+    {
+        "policy_id": 1,
+        "applicants": [ { ... }, { ... } ],   # same shape as /run_policy "applicant"
+        "include_log": false                  # optional
+    }
+    NDJSON body (Content-Type: application/x-ndjson): one applicant per line,
+    with policy_id (and optional include_log=true) in the query string.
+    The NDJSON response is streamed back one result per line.
+
+    Results come back in input order. A bad applicant only fails its own item:
+    { "index": 0, "status": "ok", "final_decision": "...", "reason": ... }
+    { "index": 1, "status": "error", "message": "...", "detail": "..." }
+    """
+    ndjson = request.mimetype == "application/x-ndjson"
+    if ndjson:
+        policy_id = request.args.get("policy_id")
+        include_log = request.args.get("include_log", "false").lower() == "true"
+        applicants = None
+    else:
+        try:
+            payload = request.get_json(force=True)
+        except BadRequest:
+            return jsonify({"status": "error", "message": "Invalid JSON"}), 400
+        if not isinstance(payload, dict):
+            return jsonify({"status": "error", "message": "Body must be a JSON object"}), 400
+        policy_id = payload.get("policy_id")
+        applicants = payload.get("applicants")
+        include_log = bool(payload.get("include_log", False))
+        if not isinstance(applicants, list):
+            return jsonify({"status": "error", "message": "envelope must contain an applicants array"}), 400
+
+    if policy_id is None:
+        return jsonify({"status": "error", "message": "policy_id is required"}), 400
+
+    # Load and compile the policy once for the whole batch
+    try:
+        policy_obj = load_compiled_policy(policy_id)
+    except PolicyCompileError as exc:
+        return jsonify({"status": "error", "message": "Policy failed to compile", "detail": str(exc)}), 500
+    if policy_obj is None:
+        return jsonify({"status": "error", "message": "Policy not found"}), 404
+
+    # Lazy fields are fetched in batches across the applicants that need them
+    evaluate = evaluator_for(policy_obj)
+    if ndjson:
+        def generate():
+            for item in evaluate(policy_obj, iter_ndjson_lines(request.stream), include_log):
+                yield json.dumps(item) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    results = list(evaluate(policy_obj, applicants, include_log))
+    return jsonify({
+        "policy_id": policy_id,
+        "count": len(results),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+        "status": "ok"
+    }), 200
+
+@app.route("/api/policy_cache/stats", methods=["GET"])
+def policy_cache_stats():
+    return jsonify(policy_cache.stats()), 200
+
+@app.route("/api/decision_cache/stats", methods=["GET"])
+def decision_cache_stats():
+    if decision_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **decision_cache.stats()}), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Prometheus text exposition of policy load/compile and sampled decision timings."""
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/api/shadow/stats", methods=["GET"])
+def shadow_stats():
+    """Shadow run counters, per primary/shadow pair agreement and the latest differences."""
+    return jsonify(shadow_runner.stats()), 200
+
+@app.route("/api/selectivity/<int:policy_id>", methods=["GET"])
+def selectivity_stats(policy_id):
+    """Per-condition pass/fail counters and current evaluation order for a policy."""
+    policy_obj = load_compiled_policy(policy_id)
+    if policy_obj is None:
+        return jsonify({"status": "error", "message": "Policy not found"}), 404
+    return jsonify({"policy_id": policy_id, "conditions": profile_for(policy_obj).snapshot()}), 200
+
+def flash_policy_findings(cp):
+    """Static analysis feedback for the author, shown when a policy is published."""
+    if cp.status != StatusEnum.PUBLISHED:
+        return
+    try:
+        analysis = analyze_policy(cp.policyJSON or '{}')
+    except (PolicyCompileError, KeyError, TypeError) as exc:
+        flash(f"Published policy does not compile: {exc}", "danger")
+        return
+    for message in analysis.findings():
+        flash(message, "warning" if analysis.sound else "danger")
+
+@app.route('/api/creditpolicy/<int:id>/analysis', methods=['GET'])
+def policy_analysis(id):
+    """Reachability, dead rules, dangling references and cycles of a saved policy."""
+    cp = CreditPolicy.query.get_or_404(id)
+    try:
+        analysis = analyze_policy(cp.policyJSON or '{}')
+    except (PolicyCompileError, KeyError, TypeError) as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    return jsonify({"policy_id": id, "status": "ok", **analysis.to_dict()}), 200
 
 @app.route('/creditpolicy/create', methods=['GET', 'POST'])
 def create_policy():
@@ -131,6 +462,7 @@ def create_policy():
         db.session.add(cp)
         db.session.commit()
         flash("Credit Policy created successfully!", "success")
+        flash_policy_findings(cp)
         return redirect(url_for('list_policies'))
 
     # This block handles GET requests and POSTs that fail validation (including pre-fill from copilot).
@@ -154,7 +486,7 @@ def create_policy():
 def edit_policy(id):
     cp = CreditPolicy.query.get_or_404(id)
     pretty_policy = json.dumps(json.loads(cp.policyJSON or '{}'), indent=2)
-    return render_template('policy/copilot.html', policy=cp, policyJson=pretty_policy)
+    return render_template('policy/copilot.html', policy=cp, policyJson=pretty_policy, csrf_token=generate_csrf())
 
 
 @app.route('/creditpolicy/edit/<int:id>', methods=['GET', 'POST'])
@@ -175,10 +507,76 @@ def copilot_edit_policy(id):
         cp.policyJSON = policy_json
         db.session.commit()
         flash("Credit Policy updated successfully!", "success")
+        flash_policy_findings(cp)
         return redirect(url_for('list_policies'))
 
     pretty_json = json.dumps(json.loads(cp.policyJSON or '{}'), indent=2)
-    return render_template('policy/form.html', form=form, action='Save', policyJSON=pretty_json, policyJSON_d3=cp.policyJSON_d3)
+    return render_template('policy/form.html', form=form, action='Save', policyJSON=pretty_json, policyJSON_d3=get_policy_d3(cp))
+
+# Policies kept parsed between copilot/editor edits, keyed like policy_cache.
+# An editor is taken out while a request edits it, so concurrent edits of the
+# same policy never share one.
+EDITOR_CACHE_SIZE = 8
+_editors = OrderedDict()
+_editors_lock = threading.Lock()
+
+def take_policy_editor(cp):
+    key = policy_cache.key_for(cp)
+    with _editors_lock:
+        entry = _editors.pop(cp.id, None)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    return PolicyEditor(cp.policyJSON or '{}')
+
+def keep_policy_editor(cp, editor):
+    with _editors_lock:
+        _editors[cp.id] = (policy_cache.key_for(cp), editor)
+        while len(_editors) > EDITOR_CACHE_SIZE:
+            _editors.popitem(last=False)
+
+@app.route('/api/creditpolicy/<int:id>/patch', methods=['POST'])
+def patch_policy(id):
+    """
+    Apply a diff (the copilot's {path, old, new} entries, or RFC 6902
+    add/remove/replace) to a saved policy. Only the touched rules, rulesets
+    or chains are re-validated and recompiled.
+    """
+    if app.config.get("WTF_CSRF_ENABLED", True):
+        # Same token the editor's forms carry, sent by copilot.html as a header
+        try:
+            validate_csrf(request.headers.get("X-CSRFToken"))
+        except ValidationError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+    cp = CreditPolicy.query.get_or_404(id)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or not isinstance(body.get("diff"), list):
+        return jsonify({"status": "error", "message": "Body must be a JSON object with a diff list"}), 400
+
+    editor = None
+    try:
+        editor = take_policy_editor(cp)
+        scopes = editor.apply(body["diff"])
+    except ValueError as exc:
+        # PolicyPatchError, pydantic ValidationError, PolicyCompileError, bad stored JSON
+        if editor is not None:
+            keep_policy_editor(cp, editor)
+        return jsonify({"status": "error", "message": str(exc)}), 400
+
+    policy_json = editor.to_json()
+    remember_d3(policy_json, editor.d3_json())
+    cp.policyJSON = policy_json
+    db.session.commit()
+
+    policy_cache.put(cp, compiled=editor.plan)
+    keep_policy_editor(cp, editor)
+    response = {
+        "status": "ok",
+        "scopes": [list(scope) or ["policy"] for scope in scopes],
+        "policyJSON_d3": editor.d3,
+    }
+    if cp.status == StatusEnum.PUBLISHED:
+        response["findings"] = analyze_policy(editor.data).findings()
+    return jsonify(response), 200
 
 @app.route('/creditpolicy/delete/<int:id>', methods=['POST'])
 def delete_policy(id):
@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Route tests run the app against an in-memory database, never mydatabase.db
+os.environ["BRE_DATABASE_URI"] = "sqlite:///:memory:"
+
+with open("tests/sample1.json") as f:
+    SAMPLE_POLICY = f.read()
+
+APPLICANT = {"applicant": {
+    "age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+    "employment_tenure_months": 18, "credit_score": 745, "fraud_flag": False,
+}}
+
+
+@pytest.fixture
+def flask_app(monkeypatch):
+    """The web app with a fresh database holding one published policy (id 1)."""
+    import routes  # noqa: F401 (registers the routes)
+    from app import app, db
+    from bre_engine.cache import policy_cache
+    from models import events
+    from models.credit_policy import CreditPolicy, StatusEnum
+
+    # Background D3 writes go to a per-test executor, drained before and after
+    d3_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bre-d3-test")
+    monkeypatch.setattr(events, "_d3_executor", d3_executor)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(CreditPolicy(name="sample", version=1, status=StatusEnum.PUBLISHED,
+                                    policyJSON=SAMPLE_POLICY))
+        db.session.commit()
+    d3_executor.submit(lambda: None).result()
+    policy_cache.clear()
+    yield app
+    d3_executor.shutdown(wait=True)
+    policy_cache.clear()
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
@@ -0,0 +1,90 @@
+import json
+import random
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.analyzer import analyze_policy, prove_plan, satisfiable
+from bre_engine.compiler import CompiledCondition
+
+
+@pytest.fixture
+def sample_policy():
+    with open("tests/sample1.json") as f:
+        return json.load(f)
+
+
+def rules_of(policy):
+    return {r["id"]: r for c in policy["chains"] for rs in c["rulesets"] for r in rs["rules"]}
+
+
+def test_sample_policy_is_sound(sample_policy):
+    analysis = analyze_policy(json.dumps(sample_policy))
+
+    assert analysis.sound
+    assert analysis.unreachable == []
+    assert analysis.dead_rules == []
+    # risk_adjusted_rate -> eligibility_final is a terminal node, not a dangling rule
+    assert analysis.dangling == []
+    assert analysis.tree_chains == [c["id"] for c in sample_policy["chains"]]
+
+
+def test_findings(sample_policy):
+    rules = rules_of(sample_policy)
+    rules["age_check"]["conditions"].append({"field": "applicant.age", "operator": "<", "value": 18})
+    rules["fraud_check"]["action"]["on_true"] = {"next_rules": ["credit_score_check", "no_such_rule"]}
+    branch = rules["employment_type_check"]["action"]["on_true"]["branches"][0]
+    branch["next_ruleset"] = "no_such_ruleset"
+
+    analysis = analyze_policy(sample_policy)
+
+    assert not analysis.sound
+    assert analysis.dead_rules == ["age_check"]
+    # Nothing after the dead entry rule of the eligibility chain can run
+    assert "nationality_check" in analysis.unreachable
+    assert ("fraud_check", "next_rules", "no_such_rule") in analysis.dangling
+    assert ("employment_type_check", "next_ruleset", "no_such_ruleset") in analysis.dangling
+    assert analysis.cycles == [["credit_score_check", "fraud_check"]]
+    assert "credit_check_chain" not in analysis.tree_chains
+    assert len(analysis.findings()) >= 5
+
+
+def test_satisfiable():
+    def conds(*triples):
+        return [CompiledCondition(*t) for t in triples]
+
+    assert not satisfiable(conds(("a", ">", 65), ("a", "<", 18)))
+    assert not satisfiable(conds(("a", ">=", 5), ("a", "<", 5)))
+    assert not satisfiable(conds(("t", "==", "A"), ("t", "==", "B")))
+    assert not satisfiable(conds(("t", "in", ["A", "B"]), ("t", "not in", ["A", "B"])))
+    assert not satisfiable(conds(("a", ">=", 5), ("a", "<=", 5), ("a", "!=", 5)))
+    assert satisfiable(conds(("a", ">=", 5), ("a", "<=", 5)))
+    assert satisfiable(conds(("a", ">", 1), ("b", "<", 0)))
+    assert satisfiable(conds(("t", "in", ["A", "B"]), ("t", "!=", "A")))
+
+
+def test_proven_plan_runs_identically(sample_policy):
+    rnd = random.Random(3)
+    plain = compile_policy(sample_policy)
+    proven = prove_plan(compile_policy(sample_policy))
+    assert all(chain.tree_shaped for chain in proven.chains)
+
+    for _ in range(300):
+        applicant = {"applicant": {
+            "age": rnd.choice([18, 30, None]),
+            "nationality": rnd.choice(["INDIAN", "OTHER"]),
+            "employment_type": rnd.choice(["SALARIED", "SELF_EMPLOYED", "OTHER"]),
+            "monthly_income": rnd.choice([20000, 40000]),
+            "employment_tenure_months": rnd.choice([3, 12]),
+            "business_vintage_years": rnd.choice([1, 3]),
+            "annual_income": rnd.choice([300000, 800000]),
+            "credit_score": rnd.choice([650, 720, 780]),
+            "fraud_flag": rnd.choice([True, False]),
+        }}
+        try:
+            expected = BREEngine(plain, applicant).run()
+        except TypeError:
+            with pytest.raises(TypeError):
+                BREEngine(proven, applicant).run()
+            continue
+        assert BREEngine(proven, applicant).run() == expected
@@ -0,0 +1,86 @@
+import json
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine import artifact as artifact_module
+from bre_engine.artifact import build_artifact, load_artifact
+from bre_engine.cache import PolicyCache
+from bre_engine.reference import ReferenceLists
+
+
+with open("tests/sample1.json") as f:
+    POLICY_JSON = f.read()
+
+APPLICANT = {"applicant": {
+    "age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+    "employment_tenure_months": 18, "credit_score": 745, "fraud_flag": False,
+}}
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    monkeypatch.setattr(artifact_module, "_signing_key", b"test-key")
+
+
+def test_artifact_round_trip_and_staleness(tmp_path, monkeypatch):
+    artifact = build_artifact(POLICY_JSON)
+    plan = load_artifact(artifact, POLICY_JSON)
+    assert plan is not None
+    assert BREEngine(plan, APPLICANT).run() == BREEngine(compile_policy(POLICY_JSON), APPLICANT).run()
+
+    # Built from other text, truncated, or missing: compile instead
+    edited = json.dumps(json.loads(POLICY_JSON))
+    assert load_artifact(artifact, edited) is None
+    assert load_artifact(artifact[:60], POLICY_JSON) is None
+    assert load_artifact(None, POLICY_JSON) is None
+
+    # Plans reading reference lists are never frozen
+    (tmp_path / "nationalities").write_text('"INDIAN"\n')
+    monkeypatch.setattr("bre_engine.compiler.reference_lists", ReferenceLists(str(tmp_path)))
+    data = json.loads(POLICY_JSON)
+    data["chains"][0]["rulesets"][0]["rules"][1]["conditions"][0].update(
+        operator="in", value={"ref": "nationalities"}
+    )
+    assert build_artifact(json.dumps(data)) is None
+
+
+def test_artifact_payload_must_be_signed(monkeypatch):
+    artifact = build_artifact(POLICY_JSON)
+    header = artifact_module._header(POLICY_JSON)
+    signed = len(header) + 32
+
+    # A payload swapped in by anyone without the key is never unpickled
+    def no_unpickle(data):
+        raise AssertionError("unpickled an unsigned payload")
+
+    forged = artifact[:signed] + pickle.dumps(compile_policy(POLICY_JSON))
+    monkeypatch.setattr(artifact_module.pickle, "loads", no_unpickle)
+    assert load_artifact(forged, POLICY_JSON) is None
+    monkeypatch.setattr(artifact_module, "_signing_key", b"other-key")
+    assert load_artifact(artifact, POLICY_JSON) is None
+    artifact_module.configure_signing("")
+    assert load_artifact(artifact, POLICY_JSON) is None
+    assert build_artifact(POLICY_JSON) is None
+
+
+def test_cache_preload_uses_stored_plans(monkeypatch):
+    import bre_engine.cache as cache_module
+
+    def no_compile(policy_json):
+        raise AssertionError("compiled despite a stored plan")
+
+    stored = SimpleNamespace(id=1, version=3, updated_at=None, status="published",
+                             policyJSON=POLICY_JSON, compiled_plan=build_artifact(POLICY_JSON))
+    broken = SimpleNamespace(id=2, version=1, updated_at=None, status="published",
+                             policyJSON="{", compiled_plan=None)
+    monkeypatch.setattr(cache_module, "compile_policy", no_compile)
+    cache = PolicyCache()
+    assert cache.preload([stored]) == 1
+    plan = cache.get(1)
+    assert plan.version == 3 and BREEngine(plan, APPLICANT).run()["final_decision"] == "ELIGIBLE"
+
+    monkeypatch.undo()
+    assert cache.preload([broken]) == 0
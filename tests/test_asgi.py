@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import APPLICANT
+
+
+def request(method, path, body=b"", content_type=b"application/json"):
+    """Drive one HTTP request through asgi.application; returns (status, headers, body)."""
+    import asgi
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"test"), (b"content-type", content_type),
+                    (b"content-length", str(len(body)).encode())],
+        "server": ("test", 80), "client": ("127.0.0.1", 5000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)   # no disconnect until the response is out
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asyncio.wait_for(asgi.application(scope, receive, send), 10))
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    payload = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return start["status"], dict(start["headers"]), payload
+
+
+def run_policy(envelope):
+    status, _, payload = request("POST", "/run_policy", json.dumps(envelope).encode())
+    return status, json.loads(payload)
+
+
+@pytest.mark.parametrize("blocking", ["chain_pool", "resolvers"])
+def test_blocking_decisions_run_off_the_loop(flask_app, monkeypatch, blocking):
+    import asgi
+    import routes
+
+    threads = []
+
+    def execute(*args):
+        threads.append(threading.current_thread().name)
+        return routes.execute_run_policy(*args)
+
+    monkeypatch.setattr(asgi, "execute_run_policy", execute)
+    pool = ThreadPoolExecutor(max_workers=3)
+    applicant = APPLICANT
+    if blocking == "chain_pool":
+        monkeypatch.setattr(routes, "chain_pool", pool)
+        monkeypatch.setattr(asgi, "chain_pool", pool)
+    else:
+        routes.field_resolvers.register("applicant.credit_score", lambda a: 745)
+        fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+        applicant = {"applicant": fields}
+    try:
+        status, body = run_policy({"policy_id": 1, "applicant": applicant})
+    finally:
+        routes.field_resolvers.clear()
+        pool.shutdown()
+    assert (status, body["final_decision"]) == (200, "ELIGIBLE")
+    assert threads and threads[0].startswith("bre-decision")
+
+
+def test_cpu_only_decisions_stay_on_the_loop(flask_app, monkeypatch):
+    import asgi
+    import routes
+
+    threads = []
+
+    def execute(*args):
+        threads.append(threading.current_thread().name)
+        return routes.execute_run_policy(*args)
+
+    monkeypatch.setattr(asgi, "execute_run_policy", execute)
+    status, body = run_policy({"policy_id": 1, "applicant": APPLICANT})
+    assert (status, body["final_decision"]) == (200, "ELIGIBLE")
+    assert threads == [threading.current_thread().name]
+
+
+def test_async_batch_resolver_under_asgi(flask_app):
+    import routes
+
+    loops = []
+
+    async def credit_scores(applicants):
+        loops.append(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return [745 for _ in applicants]
+
+    routes.field_resolvers.register_batch("applicant.credit_score", credit_scores)
+    try:
+        fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+        status, body = run_policy({"policy_id": 1, "applicant": {"applicant": fields}, "trace": "off"})
+    finally:
+        routes.field_resolvers.clear()
+        routes.field_resolvers.loop = None
+    assert (status, body["final_decision"]) == (200, "ELIGIBLE")
+    # The coroutine ran on the server's own loop
+    assert loops == [threading.current_thread().name]
+
+
+def test_run_policy_errors(flask_app):
+    status, _, payload = request("POST", "/run_policy", b"{")
+    assert (status, json.loads(payload)["message"]) == (400, "Invalid JSON")
+    status, body = run_policy({"policy_id": 1})
+    assert status == 400 and body["status"] == "error"
+
+
+def test_bridged_flask_routes(flask_app):
+    status, headers, payload = request("GET", "/api/policy_cache/stats")
+    assert status == 200 and "hit_rate" in json.loads(payload)
+
+    # Streamed NDJSON response, produced on the WSGI pool
+    body = (json.dumps(APPLICANT) + "\n" + json.dumps({"applicant": {"age": 10}}) + "\n").encode()
+    status, headers, payload = request("POST", "/run_policy/batch?policy_id=1", body, b"application/x-ndjson")
+    assert status == 200 and headers[b"content-type"] == b"application/x-ndjson"
+    assert [json.loads(line)["final_decision"] for line in payload.splitlines()] == ["ELIGIBLE", "REJECTED"]
+
+    status, _, _ = request("GET", "/api/selectivity/99")
+    assert status == 404
+
+
+def test_lifespan_preloads_published_policies(flask_app, monkeypatch):
+    import asgi
+    from bre_engine.cache import policy_cache
+    from bre_engine.shadow import ShadowRunner
+
+    # Shutdown stops these; keep the module's own pools for the other tests
+    for name in ("DB_POOL", "DECISION_POOL", "WSGI_POOL"):
+        monkeypatch.setattr(asgi, name, ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(asgi, "shadow_runner", ShadowRunner(lambda policy_id: None))
+
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    assert policy_cache.stats()["size"] == 0
+    asyncio.run(asgi.application({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert policy_cache.stats()["size"] == 1
+    assert policy_cache.get(1) is not None
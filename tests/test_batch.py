@@ -0,0 +1,110 @@
+import json
+import sys
+import pytest
+
+from bre_engine import compile_policy
+from bre_engine.batch import evaluate_many, iter_ndjson_lines
+
+
+@pytest.fixture
+def compiled_policy():
+    with open("tests/sample1.json") as f:
+        return compile_policy(f.read())
+
+
+def applicant(**overrides):
+    data = {
+        "age": 28,
+        "nationality": "INDIAN",
+        "employment_type": "SALARIED",
+        "monthly_income": 55000,
+        "employment_tenure_months": 18,
+        "credit_score": 745,
+        "fraud_flag": False
+    }
+    data.update(overrides)
+    return {"applicant": data}
+
+
+def test_batch_preserves_order_and_isolates_errors(compiled_policy):
+    lines = [
+        json.dumps(applicant()),
+        "",
+        "{not json",
+        json.dumps(applicant(age=None)),          # None > 21 raises TypeError
+        json.dumps(applicant(monthly_income=20000)),
+    ]
+
+    results = list(evaluate_many(compiled_policy, iter_ndjson_lines(lines)))
+
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert [r["status"] for r in results] == ["ok", "error", "error", "ok"]
+    assert results[0]["final_decision"] == "ELIGIBLE"
+    assert results[3]["reason"] == "Income < 30K"
+    assert "execution_log" not in results[0]
+
+
+def test_batch_runner_matches_in_process_results(compiled_policy):
+    from bre_engine.batch import BatchRunner
+
+    applicants = [applicant(credit_score=score) for score in range(600, 800, 7)]
+    expected = list(evaluate_many(compiled_policy, applicants))
+
+    results = list(BatchRunner(compiled_policy, workers=2, chunk_size=4).run(applicants))
+
+    assert results == expected
+
+
+def test_score_cli_streams_csv_gzip(tmp_path):
+    import csv
+    import gzip
+    from bre_engine.cli import main
+
+    rows = [applicant()["applicant"], applicant(monthly_income=20000)["applicant"], applicant(age="x")["applicant"]]
+    source = tmp_path / "applicants.csv.gz"
+    with gzip.open(source, "wt", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows({k: str(v).lower() if isinstance(v, bool) else v for k, v in row.items()} for row in rows)
+    output = tmp_path / "decisions.ndjson.gz"
+
+    assert main(["score", "--policy", "tests/sample1.json", "--input", str(source), "--output", str(output),
+                 "--csv-prefix", "applicant", "--workers", "1", "--quiet"]) == 0
+
+    with gzip.open(output, "rt") as f:
+        results = [json.loads(line) for line in f]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status"] for r in results] == ["ok", "ok", "error"]
+    assert results[0]["final_decision"] == "ELIGIBLE"
+    assert results[1]["reason"] == "Income < 30K"
+
+
+def test_csv_row_decoder_nests_and_coerces():
+    from bre_engine.cli import CsvRowDecoder
+
+    decode = CsvRowDecoder(["applicant.age", "applicant.name", "applicant.flag", "bureau.score"])
+    assert decode(["28", "007", "false", ""]) == {"applicant": {"age": 28, "name": "007", "flag": False}}
+    assert decode(["2.5e1", "Asha", "null", "-3"]) == \
+        {"applicant": {"age": 25.0, "name": "Asha", "flag": None}, "bureau": {"score": -3}}
+
+
+def test_batch_runner_uses_resolver_modules(compiled_policy, tmp_path, monkeypatch):
+    from bre_engine.batch import BatchRunner
+    from bre_engine.resolvers import field_resolvers
+
+    (tmp_path / "bureau_resolvers.py").write_text(
+        "from bre_engine.resolvers import field_resolvers\n"
+        "field_resolvers.register('applicant.credit_score', lambda a: a['applicant']['age'] * 25)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    applicants = [applicant(age=age, credit_score=None) for age in (25, 28)]
+    for a in applicants:
+        del a["applicant"]["credit_score"]
+    try:
+        for workers in (1, 2):
+            runner = BatchRunner(compiled_policy, workers=workers, resolver_modules="bureau_resolvers")
+            results = list(runner.run(applicants))
+            assert [r["final_decision"] for r in results] == ["REJECTED", "ELIGIBLE"]
+    finally:
+        field_resolvers.clear()
+        monkeypatch.delitem(sys.modules, "bureau_resolvers")
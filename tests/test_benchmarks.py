@@ -0,0 +1,33 @@
+from bre_engine import BREEngine, compile_policy
+from bre_engine.codegen import compile_decider
+from benchmarks.generators import policy_rule_count, synthetic_applicants, synthetic_policy
+
+
+def test_synthetic_policies_compile_and_decide():
+    policy = synthetic_policy(chains=3, rulesets=3, rules=4, conditions=2, fanout=3, fail_rate=0.2)
+    plan = compile_policy(policy)
+    assert len(plan.rules) == policy_rule_count(policy)
+
+    # Both backends agree on the generated population, and it exercises both outcomes
+    decide = compile_decider(plan)
+    decisions = set()
+    for applicant in synthetic_applicants(300, fanout=4):
+        result = BREEngine(plan, applicant, trace="off").run()
+        assert decide(applicant) == result
+        decisions.add(result["final_decision"])
+    assert len(decisions) > 1
+
+
+def test_route_benchmark_outlives_the_policy_cache_ttl(flask_app, monkeypatch):
+    from itertools import count
+
+    from benchmarks.run import bench_route
+    from bre_engine.cache import policy_cache
+
+    ticks = count(step=10)   # every lookup is past a 5 s TTL
+    monkeypatch.setattr(policy_cache, "ttl", 5)
+    monkeypatch.setattr(policy_cache, "clock", lambda: next(ticks))
+    policy = synthetic_policy(chains=2, rulesets=2, rules=3, conditions=1, fanout=2)
+    (result,) = bench_route("small", policy, list(synthetic_applicants(20, fanout=2)))
+    assert result["count"] == 20
+    assert policy_cache.ttl == 5
@@ -103,4 +103,18 @@ def test_bre_engine_rejects_low_income(sample_policy, applicant_low_income):
 
     log_output = "\n".join(result["execution_log"])
     assert "Income Check" in log_output
-    assert "Income < 30K" in log_output
\ No newline at end of file
+    assert "Income < 30K" in log_output
+
+def test_bre_engine_trace_levels(sample_policy, applicant_low_income):
+    """Structured traces render to the same text as the verbose log."""
+    verbose = BREEngine(sample_policy, applicant_low_income).run()
+    structured = BREEngine(sample_policy, applicant_low_income, trace="structured").run()
+    decision_only = BREEngine(sample_policy, applicant_low_income, trace="decision-only").run()
+    off = BREEngine(sample_policy, applicant_low_income, trace="off").run()
+
+    assert structured["trace"].render() == verbose["execution_log"]
+    assert decision_only["execution_log"] == ["\nFINAL DECISION: ❌ REJECTED"]
+    assert off["execution_log"] == []
+    for result in (structured, decision_only, off):
+        assert result["final_decision"] == "REJECTED"
+        assert result["reason"] == "Income < 30K"
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from bre_engine import CompiledPolicy
+from bre_engine.cache import PolicyCache
+
+
+class CreditPolicy:
+    def __init__(self, id, policyJSON, version=1):
+        self.id = id
+        self.policyJSON = policyJSON
+        self.version = version
+        self.updated_at = datetime(2025, 10, 26)
+
+
+@pytest.fixture
+def sample_policy_json():
+    with open("tests/sample1.json") as f:
+        return f.read()
+
+
+def test_cache_hits_after_first_load(sample_policy_json):
+    cache = PolicyCache(maxsize=4)
+    loads = []
+
+    def loader(policy_id):
+        loads.append(policy_id)
+        return CreditPolicy(policy_id, sample_policy_json)
+
+    first = cache.get_or_load(1, loader)
+    second = cache.get_or_load(1, loader)
+
+    assert isinstance(first, CompiledPolicy)
+    assert first is second
+    assert loads == [1]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_invalidate_and_lru_eviction(sample_policy_json):
+    cache = PolicyCache(maxsize=2)
+    for policy_id in (1, 2):
+        cache.put(CreditPolicy(policy_id, sample_policy_json))
+
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    cache.put(CreditPolicy(3, sample_policy_json))
+    cache.get(2)
+    cache.put(CreditPolicy(4, sample_policy_json))   # evicts 3, the least recently used
+
+    assert cache.get(3) is None
+    assert cache.get(2) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_revalidates_after_ttl(sample_policy_json):
+    now = [0.0]
+    cache = PolicyCache(ttl=5, clock=lambda: now[0])
+    row = CreditPolicy(1, sample_policy_json)
+    plan = cache.get_or_load(1, lambda policy_id: row)
+
+    now[0] = 4.0
+    assert cache.get(1) is plan
+    # Past the TTL the row is re-read; unchanged, the plan is reused without compiling
+    now[0] = 6.0
+    assert cache.get(1) is None
+    assert cache.get_or_load(1, lambda policy_id: row, lookup=False) is plan
+    assert cache.get(1) is plan
+
+    # Edited by another process: the reloaded row carries a new key
+    now[0] = 12.0
+    edited = CreditPolicy(1, sample_policy_json, version=2)
+    fresh = cache.get_or_load(1, lambda policy_id: edited)
+    assert fresh is not plan and fresh.version == 2
+    assert cache.stats()["revalidations"] == 2
@@ -0,0 +1,82 @@
+import json
+import random
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.codegen import compile_decider, get_decider
+
+
+# -------------------------------------------------------------------
+# Differential harness: generated code vs BREEngine on random applicants
+# -------------------------------------------------------------------
+FIELD_VALUES = {
+    "age": [18, 21, 22, 35, None, "30"],
+    "nationality": ["INDIAN", "OTHER", None],
+    "employment_type": ["SALARIED", "SELF_EMPLOYED", "OTHER"],
+    "monthly_income": [10000, 30000, 55000],
+    "employment_tenure_months": [3, 6, 24],
+    "business_vintage_years": [1, 2, 5, None],
+    "annual_income": [100000, 500000, 900000],
+    "credit_score": [650, 700, 749, 800],
+    "fraud_flag": [True, False],
+}
+
+
+def random_applicant(rnd):
+    applicant = {}
+    for name, values in FIELD_VALUES.items():
+        if rnd.random() < 0.95:
+            applicant[name] = rnd.choice(values)
+    return {"applicant": applicant}
+
+
+def outcome(fn, applicant):
+    try:
+        return fn(applicant)
+    except Exception as exc:
+        return type(exc)
+
+
+def assert_equivalent(plan, n=500, seed=11):
+    decide = compile_decider(plan)
+    rnd = random.Random(seed)
+    for _ in range(n):
+        applicant = random_applicant(rnd)
+        expected = outcome(lambda a: BREEngine(plan, a, trace="off").run(), applicant)
+        assert outcome(decide, applicant) == expected, applicant
+
+
+@pytest.fixture
+def sample_policy():
+    with open("tests/sample1.json") as f:
+        return json.load(f)
+
+
+def test_codegen_matches_engine_on_sample_policy(sample_policy):
+    assert_equivalent(compile_policy(sample_policy))
+
+
+def test_codegen_matches_engine_on_mutated_policies(sample_policy):
+    """Missing rules, cycles, list operators and multi-condition branches."""
+    rules = {r["id"]: r for c in sample_policy["chains"] for rs in c["rulesets"] for r in rs["rules"]}
+    rules["fraud_check"]["action"]["on_true"]["next_rules"] = ["age_check", "does_not_exist"]
+    rules["nationality_check"]["conditions"][0].update(operator="in", value=["INDIAN", "NRI"])
+    rules["age_check"]["conditions"].append(
+        {"field": "applicant.fraud_flag", "operator": "not in", "value": [True]})
+    branch = rules["employment_type_check"]["action"]["on_true"]["branches"][0]
+    branch["conditions"].append({"field": "applicant.credit_score", "operator": ">=", "value": 700})
+
+    assert_equivalent(compile_policy(sample_policy), seed=5)
+
+
+def test_get_decider_is_cached_per_plan(sample_policy):
+    plan = compile_policy(sample_policy)
+    assert get_decider(plan) is get_decider(plan)
+    assert "def decide(d):" in get_decider(plan).source
+
+
+def test_codegen_from_validated_graph(sample_policy):
+    bre_models = pytest.importorskip("bre_models")
+    graph = bre_models.LoanBREGraph(**sample_policy)
+    assert_equivalent(compile_policy(graph.model_dump(exclude_unset=True)), n=100)
+    compile_decider(graph)
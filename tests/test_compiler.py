@@ -0,0 +1,142 @@
+import json
+import pytest
+
+from bre_engine import BREEngine, CompiledPolicy, PolicyCompileError, compile_policy
+
+
+@pytest.fixture
+def sample_policy_json():
+    with open("tests/sample1.json") as f:
+        return f.read()
+
+
+def make_applicant(**overrides):
+    applicant = {
+        "age": 28,
+        "nationality": "INDIAN",
+        "employment_type": "SALARIED",
+        "monthly_income": 55000,
+        "employment_tenure_months": 18,
+        "business_vintage_years": None,
+        "annual_income": None,
+        "credit_score": 745,
+        "fraud_flag": False
+    }
+    applicant.update(overrides)
+    return {"applicant": applicant}
+
+
+def test_compiled_plan_is_reusable(sample_policy_json):
+    """One compiled plan runs against many applicants with independent logs."""
+    plan = compile_policy(sample_policy_json)
+    assert isinstance(plan, CompiledPolicy)
+
+    eligible = BREEngine(plan, make_applicant()).run()
+    rejected = BREEngine(plan, make_applicant(credit_score=640)).run()
+
+    assert eligible["final_decision"] == "ELIGIBLE"
+    assert rejected["final_decision"] == "REJECTED"
+    assert rejected["reason"] == "Credit score < 700"
+    assert "Credit score < 700" not in "\n".join(eligible["execution_log"])
+
+
+def test_compiled_plan_resolves_references(sample_policy_json):
+    plan = compile_policy(json.loads(sample_policy_json))
+
+    age_check = plan.rule_index["age_check"]
+    assert age_check.conditions[0].path == ("applicant", "age")
+    assert age_check.on_true.targets == (("nationality_check", plan.rule_index["nationality_check"]),)
+
+    # risk_adjusted_rate points at the terminal node, which is not a rule
+    assert plan.rule_index["risk_adjusted_rate"].on_true.targets == (("eligibility_final", None),)
+    assert plan.chains[0].entry is age_check
+
+
+def test_unknown_operator_fails_compilation(sample_policy_json):
+    policy = json.loads(sample_policy_json)
+    policy["chains"][0]["rulesets"][0]["rules"][0]["conditions"][0]["operator"] = "REGEX_MATCH"
+
+    with pytest.raises(PolicyCompileError):
+        compile_policy(policy)
+
+
+def test_duplicate_rule_ids_fail_compilation(sample_policy_json):
+    policy = json.loads(sample_policy_json)
+    rules = policy["chains"][1]["rulesets"][0]["rules"]
+    rules.append(dict(rules[0]))
+
+    with pytest.raises(PolicyCompileError, match="credit_score_check"):
+        compile_policy(policy)
+
+
+def test_identical_predicates_share_a_slot(sample_policy_json):
+    from bre_engine.codegen import compile_decider
+
+    data = json.loads(sample_policy_json)
+    salaried = {"field": "applicant.employment_type", "operator": "==", "value": "SALARIED"}
+    # Re-test the routing predicate in a later rule
+    data["chains"][1]["rulesets"][0]["rules"][0]["conditions"].append(salaried)
+    data["chains"][0]["rulesets"][0]["rules"][0]["conditions"].append(
+        {"field": "applicant.nationality", "operator": "in", "value": ["INDIAN", "NRI"]})
+    plan = compile_policy(data)
+
+    salaried_slots = {plan.predicate_slots[c.index] for c in plan.conditions
+                      if (c.field, c.operator, c.value) == ("applicant.employment_type", "==", "SALARIED")}
+    assert salaried_slots == {0} and plan.shared_predicates == 1
+    assert len(set(plan.predicate_slots)) == len(plan.conditions) - 1
+
+    lookups = []
+
+    class CountingEngine(BREEngine):
+        def get_value(self, field_path):
+            lookups.append(field_path)
+            return super().get_value(field_path)
+
+    applicant = make_applicant()
+    result = CountingEngine(plan, applicant, trace="off").run()
+    assert result["final_decision"] == "ELIGIBLE"
+    assert lookups.count(("applicant", "employment_type")) == 1
+    assert compile_decider(plan)(applicant) == result
+
+    for employment in ("SALARIED", "SELF_EMPLOYED", None):
+        applicant = make_applicant(employment_type=employment, business_vintage_years=3, annual_income=600000)
+        unshared = BREEngine(plan, applicant, trace="off")
+        unshared.predicate_results = None   # evaluate every occurrence
+        expected = unshared.run()
+        assert BREEngine(plan, applicant, trace="off").run() == expected
+        assert compile_decider(plan)(applicant) == expected
+
+
+def test_plan_nodes_are_compact_and_shared_across_versions(sample_policy_json):
+    import pickle
+
+    first = compile_policy(sample_policy_json)
+    second = compile_policy(sample_policy_json)
+    for rule_a, rule_b in zip(first.rules, second.rules):
+        assert not hasattr(rule_a, "__dict__")
+        assert rule_a.id is rule_b.id
+        for cond_a, cond_b in zip(rule_a.conditions, rule_b.conditions):
+            assert not hasattr(cond_a, "__dict__")
+            assert cond_a.path is cond_b.path
+
+    restored = pickle.loads(pickle.dumps(first))
+    for overrides in ({}, {"credit_score": 640}, {"employment_type": "SELF_EMPLOYED", "business_vintage_years": 3, "annual_income": 600000}):
+        applicant = make_applicant(**overrides)
+        assert BREEngine(restored, applicant).run() == BREEngine(first, applicant).run()
+
+
+def test_engine_reuses_the_plan_of_a_policy_version(sample_policy_json):
+    from types import SimpleNamespace
+
+    saved = SimpleNamespace(id=7, version=1, updated_at=None, policyJSON=sample_policy_json)
+    first = BREEngine(saved, make_applicant())
+    assert BREEngine(saved, make_applicant()).policy is first.policy
+    assert BREEngine(SimpleNamespace(policyJSON=sample_policy_json), make_applicant()).policy is not None
+
+    # Same id and version, edited text (e.g. unsaved): compiled afresh
+    data = json.loads(sample_policy_json)
+    data["chains"][0]["rulesets"][0]["rules"][0]["conditions"][0]["value"] = 30
+    saved.policyJSON = json.dumps(data)
+    edited = BREEngine(saved, make_applicant())
+    assert edited.policy is not first.policy
+    assert edited.run()["final_decision"] == "REJECTED"
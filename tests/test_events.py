@@ -0,0 +1,120 @@
+from conftest import SAMPLE_POLICY
+
+
+def test_policy_cache_invalidated_on_commit_only(flask_app):
+    from app import db
+    from bre_engine.cache import policy_cache
+    from models.credit_policy import CreditPolicy
+
+    with flask_app.app_context():
+        policy = db.session.get(CreditPolicy, 1)
+        plan = policy_cache.put(policy)
+
+        policy.version = 2
+        db.session.flush()
+        # Flushed but not committed: other readers still see version 1
+        assert policy_cache.get(1) is plan
+        db.session.rollback()
+        assert policy_cache.get(1) is plan
+
+        policy = db.session.get(CreditPolicy, 1)
+        policy.version = 2
+        db.session.commit()
+        assert policy_cache.get(1) is None
+
+        policy_cache.put(policy)
+        db.session.delete(policy)
+        db.session.commit()
+        assert policy_cache.get(1) is None
+
+
+def wait_for_d3():
+    from models import events
+
+    events._d3_executor.submit(lambda: None).result()
+
+
+def test_d3_cache_hit_and_miss(monkeypatch):
+    from models import events
+
+    builds = []
+    real = events.load_bre_graph_from_json
+    monkeypatch.setattr(events, "load_bre_graph_from_json", lambda data: builds.append(1) or real(data))
+    policy_json = SAMPLE_POLICY.replace("eligibility_chain", "eligibility_chain_d3")
+
+    first = events.convert_to_d3js_from_json(policy_json)
+    assert events.cached_d3(policy_json) == first
+    assert events.convert_to_d3js_from_json(policy_json) == first
+    assert builds == [1]
+    assert events.cached_d3(policy_json + " ") is None
+
+
+def test_d3_generated_after_commit_and_on_read(flask_app):
+    from app import db
+    from models import events
+    from models.credit_policy import CreditPolicy, StatusEnum
+
+    with flask_app.app_context():
+        policy = CreditPolicy(name="d3", version=1, status=StatusEnum.DRAFT,
+                              policyJSON=SAMPLE_POLICY.replace("risk_chain", "risk_chain_bg"))
+        db.session.add(policy)
+        db.session.commit()
+        policy_id = policy.id
+        wait_for_d3()
+        db.session.expire_all()
+        stored = db.session.get(CreditPolicy, policy_id).policyJSON_d3
+        assert stored == events.convert_to_d3js_from_json(policy.policyJSON)
+
+        # Not written yet (or the write failed): generated on read
+        unsaved = CreditPolicy(name="x", version=1, policyJSON=SAMPLE_POLICY, policyJSON_d3=None)
+        assert events.get_policy_d3(unsaved) == events.convert_to_d3js_from_json(SAMPLE_POLICY)
+        unsaved = CreditPolicy(name="x", version=1, policyJSON=SAMPLE_POLICY.replace("Fraud", "Fraud v2"),
+                               policyJSON_d3="{}")
+        assert events.get_policy_d3(unsaved) == "{}"
+
+
+def test_failed_background_d3_write_is_logged(flask_app, monkeypatch, caplog):
+    from app import db
+    from models.credit_policy import CreditPolicy, StatusEnum
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    # The worker's bulk update goes through the query class
+    monkeypatch.setattr(CreditPolicy.query_class, "update", fail)
+    with flask_app.app_context():
+        policy = CreditPolicy(name="d3", version=1, status=StatusEnum.DRAFT,
+                              policyJSON=SAMPLE_POLICY.replace("pricing_chain", "pricing_chain_fail"))
+        db.session.add(policy)
+        db.session.commit()
+        wait_for_d3()
+        policy_id = policy.id
+    failures = [r for r in caplog.records if r.getMessage().startswith("Storing the D3 graph")]
+    assert [r.getMessage() for r in failures] == [f"Storing the D3 graph for CreditPolicy {policy_id} failed"]
+    assert failures[0].exc_info[1].args == ("disk full",)
+
+
+def test_previous_d3_graph_kept_until_the_new_one_is_written(flask_app):
+    import threading
+    from app import db
+    from models import events
+    from models.credit_policy import CreditPolicy
+
+    with flask_app.app_context():
+        policy = db.session.get(CreditPolicy, 1)
+        previous = policy.policyJSON_d3
+        assert previous
+
+        release = threading.Event()
+        events._d3_executor.submit(release.wait)   # hold the background write
+        try:
+            policy.policyJSON = SAMPLE_POLICY.replace('"Age Check"', '"Age Check v2"')
+            db.session.commit()
+            db.session.expire_all()
+            assert db.session.get(CreditPolicy, 1).policyJSON_d3 == previous
+        finally:
+            release.set()
+        wait_for_d3()
+        db.session.expire_all()
+        policy = db.session.get(CreditPolicy, 1)
+        assert policy.policyJSON_d3 == events.convert_to_d3js_from_json(policy.policyJSON) != previous
@@ -0,0 +1,76 @@
+import json
+import random
+
+import pytest
+
+from bre_engine import BREEngine, PolicyCompileError, compile_policy
+from bre_engine.codegen import compile_decider
+from bre_engine.compiler import Membership, RangeSet, ValueSet, in_ranges
+from bre_engine.reference import ReferenceLists
+
+
+def membership_policy(pincodes, ranges):
+    def rule(rule_id, cond, reason, next_rule=None):
+        return {"id": rule_id, "name": rule_id, "conditions": [cond], "action": {
+            "on_true": {"next_rules": [next_rule]} if next_rule else {},
+            "on_false": {"decision": "REJECTED", "reason": reason}}}
+    return {"id": "p", "name": "p", "terminal_nodes": [{"id": "t", "decision": "APPROVED"}], "chains": [
+        {"id": "c", "name": "c", "rulesets": [{"id": "rs", "name": "rs", "rules": [
+            rule("pincode", {"field": "applicant.pincode", "operator": "in", "value": pincodes},
+                 "Pincode not serviced", "employer"),
+            rule("employer", {"field": "applicant.employer", "operator": "not in", "value": ["ACME", "SHADY"]},
+                 "Employer blocked", "income"),
+            rule("income", {"field": "applicant.income", "operator": "not in range", "value": ranges},
+                 "Income band excluded"),
+        ]}]}]}
+
+
+def test_value_set_matches_list_semantics():
+    values = [1, "a", None, True, 2.5, [1, 2], {"k": 1}] + list(range(100, 130))
+    lookup = ValueSet(values)
+    for probe in [1, 1.0, True, "a", "b", None, 2.5, [1, 2], [2, 1], {"k": 1}, {}, 115, 200]:
+        assert (probe in lookup) == (probe in values)
+
+
+def test_range_set_matches_linear_scan():
+    rnd = random.Random(3)
+    ranges = [[lo, lo + rnd.randrange(20)] for lo in (rnd.randrange(1000) for _ in range(200))]
+    lookup = RangeSet(ranges)
+    for probe in list(range(-5, 1030)) + [0.5, 999.99, True]:
+        assert (probe in lookup) == in_ranges(probe, ranges)
+    with pytest.raises(TypeError):
+        None in lookup
+    with pytest.raises(PolicyCompileError):
+        compile_policy(membership_policy([1], [[5, 1]]))
+
+
+def test_large_lists_compile_to_lookups(tmp_path, monkeypatch):
+    pincodes = list(range(110000, 110000 + 5000, 3))
+    (tmp_path / "pincodes").write_text("\n".join(json.dumps(p) for p in pincodes) + "\n")
+    lists = ReferenceLists(str(tmp_path))
+    monkeypatch.setattr("bre_engine.compiler.reference_lists", lists)
+
+    inline = compile_policy(membership_policy(pincodes, [[0, 9999], [50000, 60000]]))
+    referenced = compile_policy(membership_policy({"ref": "pincodes"}, [[0, 9999], [50000, 60000]]))
+    assert isinstance(inline.rules[0].conditions[0].op, Membership)
+    assert referenced.rules[0].conditions[0].value == {"ref": "pincodes"}
+    # Short lists keep the plain scan
+    assert not isinstance(inline.rules[1].conditions[0].op, Membership)
+    # Loaded once and shared while the file is unchanged
+    assert lists.load("pincodes", ValueSet) is referenced.rules[0].conditions[0].op.lookup
+
+    rnd = random.Random(9)
+    applicants = [{"applicant": {
+        "pincode": rnd.choice([110000, 110003, 110001, 114998, None]),
+        "employer": rnd.choice(["ACME", "OTHER"]),
+        "income": rnd.choice([5000, 20000, 55000, 70000]),
+    }} for _ in range(200)]
+    decide = compile_decider(inline)
+    for applicant in applicants:
+        expected = BREEngine(inline, applicant, trace="off").run()
+        assert BREEngine(referenced, applicant, trace="off").run() == expected
+        assert decide(applicant) == expected
+
+
+    with pytest.raises(PolicyCompileError):
+        compile_policy(membership_policy({"ref": "missing"}, []))
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.memo import DecisionCache, applicant_fingerprint
+
+
+@pytest.fixture
+def plan():
+    with open("tests/sample1.json") as f:
+        return compile_policy(f.read())
+
+
+def make_applicant(**overrides):
+    applicant = {
+        "age": 28,
+        "nationality": "INDIAN",
+        "employment_type": "SALARIED",
+        "monthly_income": 55000,
+        "employment_tenure_months": 18,
+        "credit_score": 745,
+        "fraud_flag": False,
+    }
+    applicant.update(overrides)
+    return {"applicant": applicant}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fingerprint_ignores_unread_fields(plan):
+    base = applicant_fingerprint(plan, make_applicant())
+    assert applicant_fingerprint(plan, make_applicant(request_id="abc", phone="123")) == base
+    assert applicant_fingerprint(plan, make_applicant(credit_score=746)) != base
+    # A missing field and an explicit null are the same to the engine
+    assert applicant_fingerprint(plan, make_applicant(annual_income=None)) == base
+
+
+def test_memo_hits_expire_and_copy(plan):
+    clock = Clock()
+    cache = DecisionCache(maxsize=2, ttl=60, clock=clock)
+    calls = []
+
+    def run_for(applicant):
+        def run():
+            calls.append(1)
+            return BREEngine(plan, applicant, trace="verbose").run()
+        return run
+
+    first = cache.get_or_run(plan, make_applicant(), "verbose", run_for(make_applicant()))
+    first["execution_log"].append("mutated by caller")
+    again = cache.get_or_run(plan, make_applicant(retry=2), "verbose", run_for(make_applicant()))
+    assert len(calls) == 1
+    assert again == BREEngine(plan, make_applicant(), trace="verbose").run()
+
+    clock.now = 61
+    cache.get_or_run(plan, make_applicant(), "verbose", run_for(make_applicant()))
+    assert len(calls) == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+def test_memo_bypasses_structured_and_errors(plan):
+    cache = DecisionCache()
+    applicant = make_applicant()
+    result = cache.get_or_run(plan, applicant, "structured", lambda: BREEngine(plan, applicant, trace="structured").run())
+    assert "trace" in result
+
+    def boom():
+        raise TypeError("bad payload")
+
+    for _ in range(2):
+        with pytest.raises(TypeError):
+            cache.get_or_run(plan, make_applicant(age="x"), "off", boom)
+    stats = cache.stats()
+    assert stats["bypassed"] == 1
+    assert stats["size"] == 0 and stats["misses"] == 2
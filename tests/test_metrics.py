@@ -0,0 +1,43 @@
+import json
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.metrics import Metrics, TimedEngine
+
+
+@pytest.fixture
+def plan():
+    with open("tests/sample1.json") as f:
+        plan = compile_policy(f.read())
+    plan.version = 3
+    return plan
+
+
+APPLICANT = {"applicant": {
+    "age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+    "employment_tenure_months": 18, "credit_score": 745, "fraud_flag": False,
+}}
+
+
+def test_timed_engine_records_rules_and_chains(plan):
+    metrics = Metrics(sample_rate=1.0)
+    rejected = {"applicant": {**APPLICANT["applicant"], "credit_score": 640}}
+    for applicant in (APPLICANT, rejected):
+        assert TimedEngine(plan, applicant, metrics, trace="off").run() == \
+            BREEngine(plan, applicant, trace="off").run()
+
+    text = metrics.render()
+    labels = 'policy="loan_origination_graph",version="3"'
+    assert f'bre_decisions_total{{{labels},decision="ELIGIBLE"}} 1' in text
+    assert f'bre_decision_seconds_count{{{labels}}} 2' in text
+    assert f'bre_rule_evaluations_total{{{labels},rule="credit_score_check",outcome="pass"}} 2' in text
+    assert f'bre_rule_evaluations_total{{{labels},rule="credit_score_check",outcome="fail"}} 1' in text
+    assert f'bre_rule_seconds_bucket{{{labels},rule="credit_score_check",le="+Inf"}} 3' in text
+    assert f'bre_chain_seconds_count{{{labels},chain="eligibility_chain"}} 2' in text
+
+
+def test_sampling(plan):
+    assert not Metrics().sampled()
+    draws = iter([0.5, 0.05, 0.2])
+    metrics = Metrics(sample_rate=0.1, rand=lambda: next(draws))
+    assert [metrics.sampled() for _ in range(3)] == [False, True, False]
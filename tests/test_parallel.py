@@ -0,0 +1,62 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.parallel import run_chains_parallel
+
+
+@pytest.fixture(scope="module")
+def plan():
+    with open("tests/sample1.json") as f:
+        return compile_policy(json.load(f))
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+APPLICANTS = [
+    {"applicant": {"age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+                   "employment_tenure_months": 18, "credit_score": 745, "fraud_flag": False}},
+    {"applicant": {"age": 17, "nationality": "INDIAN", "credit_score": 500, "fraud_flag": True}},
+    {"applicant": {"age": 30, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+                   "employment_tenure_months": 18, "credit_score": 600, "fraud_flag": False}},
+    {"applicant": {"age": 30}},
+]
+
+
+@pytest.mark.parametrize("trace", ["off", "decision-only", "verbose"])
+def test_parallel_matches_sequential(plan, pool, trace):
+    for applicant in APPLICANTS:
+        expected = BREEngine(plan, applicant, trace=trace).run()
+        assert run_chains_parallel(BREEngine(plan, applicant, trace=trace), pool) == expected
+
+
+class SlowLookupEngine(BREEngine):
+    """credit_score waits on an external service until released."""
+
+    release = None
+
+    def get_value(self, field_path):
+        if tuple(field_path) == ("applicant", "credit_score"):
+            self.release.wait(5)
+        return super().get_value(field_path)
+
+
+def test_failed_chain_cancels_later_chains(plan, pool):
+    engine = SlowLookupEngine(plan, APPLICANTS[1], trace="verbose")
+    engine.release = threading.Event()
+    start = time.monotonic()
+    try:
+        # eligibility_chain rejects at once; the risk and pricing chains are abandoned
+        result = run_chains_parallel(engine, pool)
+    finally:
+        engine.release.set()
+    assert time.monotonic() - start < 1
+    assert result == BREEngine(plan, APPLICANTS[1]).run()
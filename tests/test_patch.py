@@ -0,0 +1,128 @@
+import copy
+import json
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.patch import PolicyPatchError, apply_diff, parse_path
+from bre_models import LoanBREGraph, PolicyEditor, bre_to_d3
+
+
+@pytest.fixture
+def sample_policy():
+    with open("tests/sample1.json") as f:
+        return json.load(f)
+
+
+def random_applicants(n=300, seed=5):
+    rnd = random.Random(seed)
+    return [{"applicant": {
+        "age": rnd.choice([18, 25, 40]),
+        "nationality": rnd.choice(["INDIAN", "OTHER"]),
+        "employment_type": rnd.choice(["SALARIED", "SELF_EMPLOYED"]),
+        "monthly_income": rnd.choice([20000, 40000]),
+        "employment_tenure_months": rnd.choice([3, 12]),
+        "business_vintage_years": rnd.choice([1, 3]),
+        "annual_income": rnd.choice([300000, 800000]),
+        "credit_score": rnd.choice([650, 720, 780]),
+        "fraud_flag": rnd.choice([True, False]),
+    }} for _ in range(n)]
+
+
+def assert_matches_full_rebuild(editor):
+    """The incrementally maintained state equals building everything from scratch."""
+    data = json.loads(editor.to_json())
+    assert editor.graph == LoanBREGraph(**data)
+    assert editor.d3 == bre_to_d3(LoanBREGraph(**data))
+    plan = compile_policy(data)
+    assert [r.index for r in editor.plan.rules] == list(range(len(plan.rules)))
+    for applicant in random_applicants():
+        assert BREEngine(editor.plan, applicant).run() == BREEngine(plan, applicant).run()
+
+
+def test_parse_path_forms():
+    assert parse_path("/chains/0/rulesets/1/rules/2/conditions/0/value") == \
+        ("chains", "0", "rulesets", "1", "rules", "2", "conditions", "0", "value")
+    assert parse_path("chains[0].rulesets[1].rules[age_check].name") == \
+        ("chains", "0", "rulesets", "1", "rules", "age_check", "name")
+
+
+def test_copilot_rule_edit_touches_one_rule(sample_policy):
+    editor = PolicyEditor(copy.deepcopy(sample_policy))
+    old_plan = editor.plan
+
+    scopes = editor.apply([
+        {"path": "chains[1].rulesets[0].rules[credit_score_check].conditions[0].value", "old": 700, "new": 750},
+        {"path": "chains[1].rulesets[0].rules[0].name", "old": "Credit Score Check", "new": "Score >= 750"},
+    ])
+
+    assert scopes == {("rule", 1, 0, 0)}
+    assert editor.plan is not old_plan
+    assert old_plan.rule_index["credit_score_check"].conditions[0].value == 700
+    assert editor.plan.rule_index["credit_score_check"].conditions[0].value == 750
+    assert_matches_full_rebuild(editor)
+
+
+def test_structural_edits(sample_policy):
+    editor = PolicyEditor(copy.deepcopy(sample_policy))
+    old_plan = editor.plan
+    new_rule = {
+        "id": "income_cap_check",
+        "name": "Income cap",
+        "conditions": [{"field": "applicant.monthly_income", "operator": "<", "value": 1000000}],
+        "action": {"on_true": {"next_rules": ["salaried_tenure_check"]},
+                   "on_false": {"decision": "REJECTED", "reason": "Income too high"}},
+    }
+    editor.apply([
+        {"op": "add", "path": "/chains/0/rulesets/2/rules/1", "value": new_rule},
+        {"op": "replace", "path": "/chains/0/rulesets/2/rules/0/action/on_true/next_rules", "value": ["income_cap_check"]},
+        {"op": "remove", "path": "/chains/1/rulesets/0/rules/1"},
+    ])
+    assert "fraud_check" not in editor.plan.rule_index
+    # Conditions after the inserted rule shifted; the old plan's numbering is intact
+    assert [c.index for c in old_plan.conditions] == list(range(len(old_plan.conditions)))
+    assert [c.index for c in editor.plan.conditions] == list(range(len(editor.plan.conditions)))
+    assert_matches_full_rebuild(editor)
+
+    editor.apply([{"path": "terminal_nodes[0].decision", "old": "ELIGIBLE", "new": "APPROVED"}])
+    assert editor.plan.terminal_decision == "APPROVED"
+    assert_matches_full_rebuild(editor)
+
+
+def test_failed_diff_leaves_editor_unchanged(sample_policy, monkeypatch):
+    editor = PolicyEditor(copy.deepcopy(sample_policy))
+    before = editor.to_json()
+    plan = editor.plan
+
+    with pytest.raises(PolicyPatchError):
+        editor.apply([
+            {"path": "chains[0].rulesets[0].rules[0].conditions[0].value", "old": 21, "new": 18},
+            {"path": "chains[1].rulesets[0].rules[0].conditions[0].value", "old": 999, "new": 750},
+        ])
+    with pytest.raises(ValidationError):
+        editor.apply([{"op": "remove", "path": "/chains/0/rulesets/0/rules/0/conditions"}])
+    # Unexpected errors revert too, whether applying the diff or recompiling
+    with pytest.raises(TypeError):
+        editor.apply([
+            {"path": "chains[0].name", "old": "Eligibility Chain", "new": "x"},
+            {"path": ["chains", 0, {"key": "unhashable"}], "new": 1},
+        ])
+    monkeypatch.setattr("bre_models.patch_compiled", lambda *args: {}["missing"])
+    with pytest.raises(KeyError):
+        editor.apply([{"path": "chains[0].name", "old": "Eligibility Chain", "new": "x"}])
+    monkeypatch.undo()
+
+    assert editor.to_json() == before
+    assert editor.plan is plan
+    assert_matches_full_rebuild(editor)
+
+
+def test_apply_diff_reports_widest_scope(sample_policy):
+    applied = apply_diff(sample_policy, [
+        {"op": "replace", "path": "/chains/0/rulesets/0/rules/0/name", "value": "x"},
+        {"op": "remove", "path": "/chains/0/rulesets/0/rules/1"},
+        {"op": "replace", "path": "/chains/2/name", "value": "y"},
+    ])
+    assert applied.scopes == {("ruleset", 0, 0), ("chain", 2)}
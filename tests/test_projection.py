@@ -0,0 +1,76 @@
+import io
+import json
+import random
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.projection import field_trie, project
+
+
+@pytest.fixture
+def plan():
+    with open("tests/sample1.json") as f:
+        return compile_policy(f.read())
+
+
+def bureau_applicant(rnd):
+    applicant = {
+        "age": rnd.choice([18, 30, None]),
+        "nationality": rnd.choice(["INDIAN", "OTHER"]),
+        "employment_type": rnd.choice(["SALARIED", "SELF_EMPLOYED"]),
+        "monthly_income": rnd.choice([20000, 40000.5]),
+        "employment_tenure_months": rnd.choice([3, 12]),
+        "credit_score": rnd.choice([650, 720, 780]),
+        "fraud_flag": rnd.choice([True, False]),
+        "bureau": {"accounts": [{"id": i, "history": [rnd.randint(0, 3) for _ in range(12)]} for i in range(20)]},
+    }
+    if rnd.random() < 0.2:
+        del applicant["age"]
+    return {"applicant": applicant, "documents": ["x" * 100] * 5}
+
+
+def outcome(plan, applicant):
+    try:
+        return BREEngine(plan, applicant).run()
+    except TypeError as exc:
+        return type(exc)
+
+
+def test_field_trie_keeps_prefix_paths_whole():
+    trie = field_trie([("a", "b", "c"), ("a", "b"), ("a", "d")])
+    assert trie == {"a": {"b": None, "d": None}}
+
+
+def test_projection_keeps_decisions(plan):
+    rnd = random.Random(8)
+    for _ in range(200):
+        applicant = bureau_applicant(rnd)
+        projected = project(applicant, plan.field_paths)
+        assert "bureau" not in projected["applicant"] and "documents" not in projected
+        assert outcome(plan, projected) == outcome(plan, applicant)
+
+    # Non-object intermediates are kept as is, so lookups fail the same way
+    for odd in ({"applicant": "SALARIED"}, {"applicant": [1, 2]}, {"applicant": None}, {}):
+        assert outcome(plan, project(odd, plan.field_paths)) == outcome(plan, odd)
+
+
+def test_stream_envelope_matches_project(plan):
+    pytest.importorskip("ijson")
+    from bre_engine.projection import stream_envelope
+
+    rnd = random.Random(9)
+    for _ in range(50):
+        applicant = bureau_applicant(rnd)
+        body = json.dumps({"policy_id": 1, "applicant": applicant, "trace": "off"}).encode()
+        envelope = stream_envelope(io.BytesIO(body), lambda env: plan.field_paths)
+        assert envelope == {"policy_id": 1, "applicant": project(applicant, plan.field_paths), "trace": "off"}
+
+    # Without a policy_id before the applicant nothing is projected
+    body = json.dumps({"applicant": applicant, "policy_id": 1}).encode()
+    seen = []
+    envelope = stream_envelope(io.BytesIO(body), lambda env: seen.append(dict(env)))
+    assert envelope == {"applicant": applicant, "policy_id": 1} and seen == [{}]
+
+    with pytest.raises(ValueError):
+        stream_envelope(io.BytesIO(b'{"policy_id": 1, "applicant": {'), lambda env: plan.field_paths)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.parallel import run_chains_parallel
+from bre_engine.resolvers import FieldResolvers, evaluate_batch_async
+
+
+@pytest.fixture(scope="module")
+def plan():
+    with open("tests/sample1.json") as f:
+        return compile_policy(json.load(f))
+
+
+RISK = {"credit_score": 745, "fraud_flag": False}
+ELIGIBLE = {"age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+            "employment_tenure_months": 18}
+UNDERAGE = {"age": 17, "nationality": "INDIAN"}
+
+
+def full(applicant):
+    return {"applicant": {**applicant, **RISK}}
+
+
+def test_resolver_runs_once_and_only_when_needed(plan):
+    calls = []
+    resolvers = FieldResolvers()
+
+    def credit_score(applicant):
+        calls.append(applicant["applicant"]["age"])
+        return RISK["credit_score"]
+
+    resolvers.register("applicant.credit_score", credit_score)
+    resolvers.register("applicant.fraud_flag", lambda a: RISK["fraud_flag"])
+
+    for applicant in (ELIGIBLE, UNDERAGE):
+        data = {"applicant": dict(applicant)}
+        result = BREEngine(plan, data, fields=resolvers.bind(data)).run()
+        assert result == BREEngine(plan, full(applicant)).run()
+    # credit_score is read by two rules but fetched once; never for the rejected applicant
+    assert calls == [28]
+
+    # Values already supplied by the caller win
+    data = {"applicant": {**ELIGIBLE, "credit_score": 500}}
+    assert resolvers.bind(data).get("applicant.credit_score") == 500
+    assert calls == [28]
+
+
+def test_concurrent_chains_share_a_fetch(plan):
+    calls = []
+    lock = threading.Lock()
+    resolvers = FieldResolvers()
+
+    def credit_score(applicant):
+        with lock:
+            calls.append(1)
+        return RISK["credit_score"]
+
+    resolvers.register("applicant.credit_score", credit_score)
+    data = {"applicant": {**ELIGIBLE, "fraud_flag": False}}
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        result = run_chains_parallel(BREEngine(plan, data, fields=resolvers.bind(data)), pool)
+    assert result == BREEngine(plan, full(ELIGIBLE)).run()
+    assert calls == [1]
+
+
+def test_batched_async_resolvers(plan):
+    batches = []
+    resolvers = FieldResolvers()
+
+    async def bureau_many(applicants):
+        batches.append(len(applicants))
+        await asyncio.sleep(0)
+        return [RISK["credit_score"] for _ in applicants]
+
+    resolvers.register_batch("applicant.credit_score", bureau_many)
+    resolvers.register("applicant.fraud_flag", lambda a: RISK["fraud_flag"])
+
+    applicants = [{"applicant": dict(a)} for a in (ELIGIBLE, UNDERAGE, ELIGIBLE)] + [5]
+    outcomes = asyncio.run(evaluate_batch_async(plan, applicants, resolvers))
+
+    expected = [BREEngine(plan, full(a), trace="off").run() for a in (ELIGIBLE, UNDERAGE, ELIGIBLE)]
+    assert [result for result, _ in outcomes[:3]] == expected
+    assert all(error is None for _, error in outcomes[:3])
+    assert outcomes[3][0] is None and outcomes[3][1] is not None
+    # One batch for both eligible applicants; the rejected one never fetched
+    assert batches == [2]
+    # A single decision falls back to a one-applicant batch
+    data = {"applicant": dict(ELIGIBLE)}
+    assert resolvers.bind(data).get("applicant.credit_score") == 745
+    assert batches == [2, 1]
+
+
+def test_async_resolver_refuses_to_block_a_running_loop():
+    resolvers = FieldResolvers()
+
+    async def credit_scores(applicants):
+        return [745 for _ in applicants]
+
+    resolvers.register_batch("applicant.credit_score", credit_scores)
+
+    async def decide_on_loop():
+        return resolvers.bind({"applicant": {}}).get("applicant.credit_score")
+
+    with pytest.raises(RuntimeError, match="off the event loop"):
+        asyncio.run(decide_on_loop())
+
+
+def test_batch_rounds_run_off_the_event_loop(plan):
+    rounds = []
+
+    class Rounds(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            rounds.append(fn)
+            return super().submit(fn, *args, **kwargs)
+
+    resolvers = FieldResolvers()
+
+    async def credit_scores(applicants):
+        return [RISK["credit_score"] for _ in applicants]
+
+    resolvers.register_batch("applicant.credit_score", credit_scores)
+    applicants = [{"applicant": {**ELIGIBLE, "fraud_flag": False}}]
+    with Rounds(max_workers=1) as executor:
+        outcomes = asyncio.run(evaluate_batch_async(plan, applicants, resolvers, executor=executor))
+    assert outcomes[0][0] == BREEngine(plan, full(ELIGIBLE), trace="off").run()
+    # Waiting on credit_score, then again from the start with it fetched
+    assert len(rounds) == 2
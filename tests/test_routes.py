@@ -0,0 +1,218 @@
+import json
+
+from conftest import APPLICANT, SAMPLE_POLICY
+
+
+def test_run_policy(client):
+    response = client.post("/run_policy", json={"policy_id": 1, "applicant": APPLICANT, "trace": "off"})
+    assert response.status_code == 200
+    assert response.json["final_decision"] == "ELIGIBLE"
+
+    assert client.post("/run_policy", data="{", content_type="application/json").status_code == 400
+    response = client.post("/run_policy", json={"policy_id": 1})
+    assert response.status_code == 400
+    response = client.post("/run_policy", json={"policy_id": 1, "applicant": APPLICANT, "trace": "loud"})
+    assert response.status_code == 400
+
+
+def test_run_policy_batch(client):
+    response = client.post("/run_policy/batch", json={"policy_id": 1, "applicants": [APPLICANT, 5]})
+    assert response.status_code == 200
+    assert response.json["count"] == 2 and response.json["errors"] == 1
+    assert [r["status"] for r in response.json["results"]] == ["ok", "error"]
+
+    body = json.dumps(APPLICANT) + "\n\n" + json.dumps({"applicant": {"age": 10}}) + "\n"
+    response = client.post("/run_policy/batch?policy_id=1", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [(r["index"], r["final_decision"]) for r in lines] == [(0, "ELIGIBLE"), (1, "REJECTED")]
+
+    assert client.post("/run_policy/batch", json=[1]).status_code == 400
+    assert client.post("/run_policy/batch", json={"policy_id": 1}).status_code == 400
+    assert client.post("/run_policy/batch", json={"applicants": []}).status_code == 400
+    assert client.post("/run_policy/batch", json={"policy_id": 99, "applicants": []}).status_code == 404
+
+
+def test_selectivity_stats(client):
+    client.post("/run_policy", json={"policy_id": 1, "applicant": APPLICANT})
+    response = client.get("/api/selectivity/1")
+    assert response.status_code == 200
+    assert response.json["policy_id"] == 1 and response.json["conditions"]
+    assert client.get("/api/selectivity/99").status_code == 404
+
+
+def test_shadow_stats(client, monkeypatch):
+    import routes
+    from bre_engine.shadow import ShadowRunner
+
+    runner = ShadowRunner(routes._load_shadow_policy)
+    monkeypatch.setattr(routes, "shadow_runner", runner)
+    envelope = {"policy_id": 1, "applicant": APPLICANT, "shadow_policy_ids": [1, 99]}
+    response = client.post("/run_policy", json=envelope)
+    assert response.status_code == 200
+    response.close()   # shadow runs are queued once the response is closed
+    runner.shutdown()
+
+    stats = client.get("/api/shadow/stats").json
+    assert (stats["submitted"], stats["evaluated"], stats["differed"], stats["errors"]) == (1, 1, 0, 1)
+
+    envelope["shadow_policy_ids"] = "2"
+    assert client.post("/run_policy", json=envelope).status_code == 400
+    envelope["shadow_policy_ids"] = list(range(20))
+    assert client.post("/run_policy", json=envelope).status_code == 400
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    from bre_engine.metrics import metrics
+
+    monkeypatch.setattr(metrics, "sample_rate", 1.0)
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.clear()
+    try:
+        client.post("/run_policy", json={"policy_id": 1, "applicant": APPLICANT, "trace": "off"})
+        response = client.get("/metrics")
+    finally:
+        metrics.clear()
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.data.decode()
+    assert "bre_metrics_sample_rate 1.0" in text
+    assert 'bre_decisions_total{policy="' in text and 'decision="ELIGIBLE"} 1' in text
+    assert 'bre_policy_load_seconds_count{policy_id="1"} 1' in text
+    assert client.post("/metrics").status_code == 405
+
+
+def test_decision_cache_skips_policies_reading_resolved_fields(client, monkeypatch):
+    import routes
+    from bre_engine.memo import DecisionCache
+
+    scores = {"A1": 745, "B2": 500}
+    monkeypatch.setattr(routes, "decision_cache", DecisionCache(ttl=60))
+    routes.field_resolvers.register("applicant.credit_score", lambda a: scores[a["applicant"]["pan"]])
+    try:
+        decisions = []
+        for pan in ("A1", "B2"):
+            fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+            envelope = {"policy_id": 1, "applicant": {"applicant": {**fields, "pan": pan}}, "trace": "off"}
+            decisions.append(client.post("/run_policy", json=envelope).json["final_decision"])
+    finally:
+        routes.field_resolvers.clear()
+    # Same raw fields the policy reads, different bureau scores behind the pan
+    assert decisions == ["ELIGIBLE", "REJECTED"]
+    assert routes.decision_cache.stats()["hits"] == 0
+
+
+def test_projection_keeps_resolver_inputs(flask_app, client, monkeypatch):
+    import routes
+
+    seen = []
+
+    def credit_score(applicant):
+        seen.append(applicant["applicant"].get("pan"))
+        return 745
+
+    monkeypatch.setitem(flask_app.config, "BRE_PROJECTION", True)
+    fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+    body = {"policy_id": 1, "applicant": {"applicant": {**fields, "pan": "A1", "notes": "x" * 100}}}
+    try:
+        routes.field_resolvers.register("applicant.credit_score", credit_score, inputs=["applicant.pan"])
+        assert client.post("/run_policy", json=body).json["final_decision"] == "ELIGIBLE"
+        assert ("applicant", "pan") not in routes.policy_cache.get(1).field_paths
+        assert ("applicant", "pan") in routes.referenced_paths(routes.policy_cache.get(1))
+
+        # Undeclared inputs: the applicant is kept whole
+        routes.field_resolvers.register("applicant.credit_score", credit_score)
+        assert routes.referenced_paths(routes.policy_cache.get(1)) is None
+        assert client.post("/run_policy", json=body).json["final_decision"] == "ELIGIBLE"
+    finally:
+        routes.field_resolvers.clear()
+    assert seen == ["A1", "A1"]
+
+
+def test_shadow_runs_share_resolved_fields(client, monkeypatch):
+    import routes
+    from bre_engine.shadow import ShadowRunner
+
+    calls = []
+    runner = ShadowRunner(routes._load_shadow_policy)
+    monkeypatch.setattr(routes, "shadow_runner", runner)
+    routes.field_resolvers.register("applicant.credit_score", lambda a: calls.append(1) or 745)
+    try:
+        fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+        envelope = {"policy_id": 1, "applicant": {"applicant": fields}, "shadow_policy_ids": [1]}
+        response = client.post("/run_policy", json=envelope)
+        assert response.json["final_decision"] == "ELIGIBLE"
+        response.close()
+        runner.shutdown()
+    finally:
+        routes.field_resolvers.clear()
+    stats = runner.stats()
+    # The shadow saw the resolved score (no false diff) without fetching it again
+    assert (stats["evaluated"], stats["differed"]) == (1, 0)
+    assert calls == [1]
+
+
+def test_policy_published_through_the_form_stores_its_plan(client, flask_app, monkeypatch):
+    from models import db
+    from models.credit_policy import CreditPolicy
+
+    monkeypatch.setitem(flask_app.config, "WTF_CSRF_ENABLED", False)
+    form = {"name": "form", "version": "1", "status": "PUBLISHED", "policyJSON": SAMPLE_POLICY}
+    assert client.post("/creditpolicy/create", data=form).status_code == 302
+    with flask_app.app_context():
+        assert db.session.get(CreditPolicy, 2).compiled_plan is not None
+
+    form = {"name": "sample", "version": "2", "status": "DRAFT", "policyJSON": SAMPLE_POLICY}
+    assert client.post("/creditpolicy/edit/1", data=form).status_code == 302
+    with flask_app.app_context():
+        assert db.session.get(CreditPolicy, 1).compiled_plan is None
+    form["status"] = "PUBLISHED"
+    assert client.post("/creditpolicy/edit/1", data=form).status_code == 302
+    with flask_app.app_context():
+        assert db.session.get(CreditPolicy, 1).compiled_plan is not None
+
+
+def test_batch_endpoint_fetches_resolved_fields_in_batches(client):
+    import routes
+
+    batches = []
+    scores = {"A1": 745, "B2": 500}
+
+    async def credit_scores(applicants):
+        batches.append([a["applicant"]["pan"] for a in applicants])
+        return [scores[a["applicant"]["pan"]] for a in applicants]
+
+    fields = {k: v for k, v in APPLICANT["applicant"].items() if k != "credit_score"}
+    applicants = [{"applicant": {**fields, "pan": pan}} for pan in ("A1", "B2")]
+    applicants.insert(1, {"applicant": {**fields, "age": 17, "pan": "C3"}})
+    routes.field_resolvers.register_batch("applicant.credit_score", credit_scores)
+    try:
+        response = client.post("/run_policy/batch", json={"policy_id": 1, "applicants": applicants + [5]})
+        body = "\n".join(json.dumps(a) for a in applicants)
+        streamed = client.post("/run_policy/batch?policy_id=1", data=body, content_type="application/x-ndjson")
+        single = client.post("/run_policy", json={"policy_id": 1, "applicant": applicants[2], "trace": "off"})
+    finally:
+        routes.field_resolvers.clear()
+
+    decisions = [r.get("final_decision") for r in response.json["results"]]
+    assert decisions == ["ELIGIBLE", "REJECTED", "REJECTED", None]
+    assert [json.loads(line)["final_decision"] for line in streamed.data.decode().splitlines()] == decisions[:3]
+    # Same decision as /run_policy; one fetch per batch, the underage applicant never fetched
+    assert single.json["final_decision"] == "REJECTED"
+    assert batches == [["A1", "B2"], ["A1", "B2"], ["B2"]]
+
+
+def test_policy_patch_requires_a_csrf_token(client):
+    import re
+
+    page = client.get("/creditpolicy/copilot/1").data.decode()
+    token = re.search(r'<meta name="csrf-token" content="([^"]+)">', page).group(1)
+    diff = {"diff": [{"path": "chains[1].rulesets[0].rules[credit_score_check].conditions[0].value",
+                      "old": 700, "new": 750}]}
+
+    response = client.post("/api/creditpolicy/1/patch", json=diff)
+    assert response.status_code == 400 and "CSRF" in response.json["message"]
+    assert client.post("/api/creditpolicy/1/patch", json=diff, headers={"X-CSRFToken": "forged"}).status_code == 400
+
+    response = client.post("/api/creditpolicy/1/patch", json=diff, headers={"X-CSRFToken": token})
+    assert response.status_code == 200 and response.json["status"] == "ok"
@@ -0,0 +1,90 @@
+import json
+import random
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.selectivity import SelectivityProfile
+
+
+@pytest.fixture
+def policy():
+    with open("tests/sample1.json") as f:
+        data = json.load(f)
+    # Fold the fraud check into the age rule: it rejects most applicants and is cheap
+    age_rule = data["chains"][0]["rulesets"][0]["rules"][0]
+    age_rule["conditions"] = [
+        {"field": "applicant.age", "operator": ">", "value": 21},
+        {"field": "applicant.nationality", "operator": "in", "value": ["INDIAN", "NRI", "OCI"]},
+        {"field": "applicant.fraud_flag", "operator": "==", "value": False},
+    ]
+    return compile_policy(data)
+
+
+def applicants(n, seed=3):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        applicant = {
+            "age": rnd.choice([30, 40, None]),
+            "nationality": rnd.choice(["INDIAN", "OTHER"]),
+            "employment_type": "SALARIED",
+            "monthly_income": 50000,
+            "employment_tenure_months": 12,
+            "credit_score": 720,
+            "fraud_flag": rnd.random() < 0.9,
+        }
+        if rnd.random() < 0.05:
+            applicant = "malformed"
+        yield {"applicant": applicant}
+
+
+def outcome(engine):
+    try:
+        result = engine.run()
+        return result["final_decision"], result["reason"]
+    except Exception as exc:
+        return type(exc)
+
+
+def test_reordering_keeps_results_and_moves_selective_condition_first(policy):
+    profile = SelectivityProfile(policy, reorder_every=50)
+
+    for applicant in applicants(1000):
+        expected = outcome(BREEngine(policy, applicant, trace="off"))
+        assert outcome(BREEngine(policy, applicant, trace="off", selectivity=profile)) == expected
+
+    age_rule = policy.rule_index["age_check"]
+    ordered, _ = profile.order[age_rule.index]
+    # The ordering comparison may raise on None, so it stays first;
+    # the fraud flag (fails ~90%) now runs before nationality.
+    assert [c.field for c in ordered] == ["applicant.age", "applicant.fraud_flag", "applicant.nationality"]
+
+    rows = [r for r in profile.snapshot() if r["rule"] == "age_check"]
+    assert rows[2]["failed"] > rows[1]["failed"]
+    assert rows[2]["position"] == 1
+
+
+def test_reordering_never_fetches_lazy_fields_early():
+    from bre_engine.resolvers import FieldResolvers
+
+    with open("tests/sample1.json") as f:
+        data = json.load(f)
+    data["chains"][0]["rulesets"][0]["rules"][0]["conditions"] = [
+        {"field": "applicant.age", "operator": ">", "value": 21},
+        {"field": "applicant.bureau.hit", "operator": "==", "value": True},
+        {"field": "applicant.bureau.fraud", "operator": "==", "value": False},
+    ]
+    plan = compile_policy(data)
+    profile = SelectivityProfile(plan)
+    profile.failed[plan.rules[0].conditions[2].index] = 100   # fraud now runs before hit
+    profile.reorder()
+    assert plan.rules[0].index in profile.order
+
+    calls = []
+    resolvers = FieldResolvers()
+    resolvers.register("applicant.bureau", lambda a: calls.append(1) or {"hit": True, "fraud": False})
+    for age, fetches in ((10, 0), (30, 1)):
+        applicant = {"applicant": {"age": age}}
+        engine = BREEngine(plan, applicant, selectivity=profile, fields=resolvers.bind(applicant))
+        engine.execute_rule(plan.rules[0])
+        # The underage applicant fails on age before any rule condition reads the bureau
+        assert len(calls) == fetches
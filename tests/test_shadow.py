@@ -0,0 +1,64 @@
+import copy
+import json
+import threading
+
+import pytest
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.shadow import FieldValues, ShadowRunner, evaluate_policies
+
+
+@pytest.fixture
+def policies():
+    with open("tests/sample1.json") as f:
+        data = json.load(f)
+    candidate = copy.deepcopy(data)
+    candidate["chains"][1]["rulesets"][0]["rules"][0]["conditions"][0]["value"] = 800
+    return {1: compile_policy(data), 2: compile_policy(candidate)}
+
+
+APPLICANT = {"applicant": {
+    "age": 28, "nationality": "INDIAN", "employment_type": "SALARIED", "monthly_income": 55000,
+    "employment_tenure_months": 18, "credit_score": 745, "fraud_flag": False,
+}}
+
+
+def test_shared_lookups_give_engine_results(policies):
+    results = list(evaluate_policies(policies.items(), APPLICANT))
+    assert [(pid, result) for pid, result, _ in results] == \
+        [(pid, BREEngine(plan, APPLICANT, trace="off").run()) for pid, plan in policies.items()]
+
+    fields = FieldValues(APPLICANT)
+    assert fields.get(("applicant", "age")) == 28
+    assert fields.get("applicant.missing.deeper") is None
+
+
+def test_shadow_runner_logs_differences(policies):
+    runner = ShadowRunner(policies.get)
+    primary = BREEngine(policies[1], APPLICANT).run()
+    assert runner.submit(1, primary, APPLICANT, [1, 2, 3])
+    runner.shutdown()
+
+    stats = runner.stats()
+    assert (stats["evaluated"], stats["differed"], stats["errors"]) == (2, 1, 1)
+    assert stats["recent"] == [{
+        "policy_id": 1, "shadow_policy_id": 2,
+        "primary": {"final_decision": "ELIGIBLE", "reason": None},
+        "shadow": {"final_decision": "REJECTED", "reason": "Credit score < 700"},
+    }]
+
+
+def test_shadow_runner_drops_instead_of_queueing(policies):
+    release = threading.Event()
+
+    def slow_resolve(policy_id):
+        release.wait()
+        return policies[policy_id]
+
+    runner = ShadowRunner(slow_resolve, max_pending=1)
+    primary = {"final_decision": "ELIGIBLE", "reason": None}
+    assert runner.submit(1, primary, APPLICANT, [2])
+    assert not runner.submit(1, primary, APPLICANT, [2])
+    release.set()
+    runner.shutdown()
+    assert runner.stats()["dropped"] == 1
@@ -0,0 +1,77 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bre_engine import BREEngine, compile_policy
+from bre_engine.vectorized import evaluate_columnar
+
+
+FIELDS = {
+    "age": lambda r: r.choice([18, 21, 22, 35, 60, None]),
+    "nationality": lambda r: r.choice(["INDIAN", "OTHER"]),
+    "employment_type": lambda r: r.choice(["SALARIED", "SELF_EMPLOYED", "OTHER"]),
+    "monthly_income": lambda r: r.choice([10000, 30000, 55000]),
+    "employment_tenure_months": lambda r: r.choice([3, 6, 24]),
+    "business_vintage_years": lambda r: r.choice([1, 2, 5]),
+    "annual_income": lambda r: r.choice([100000, 500000, 900000]),
+    "credit_score": lambda r: r.choice([650, 700, 749, 800]),
+    "fraud_flag": lambda r: r.choice([True, False]),
+}
+
+
+def test_columnar_matches_scalar_engine():
+    with open("tests/sample1.json") as f:
+        plan = compile_policy(f.read())
+
+    rnd = random.Random(7)
+    rows = [{name: gen(rnd) for name, gen in FIELDS.items()} for _ in range(500)]
+    columns = {f"applicant.{name}": [row[name] for row in rows] for name in FIELDS}
+
+    result = evaluate_columnar(plan, columns)
+
+    for i, row in enumerate(rows):
+        try:
+            expected = BREEngine(plan, {"applicant": row}).run()
+        except TypeError:
+            assert result["final_decision"][i] == "ERROR"
+            continue
+        assert result["final_decision"][i] == expected["final_decision"]
+        assert result["reason"][i] == expected["reason"]
+
+
+def test_range_and_set_lookups_match_scalar_engine():
+    rule = lambda rid, cond, nxt=None: {"id": rid, "conditions": [cond], "action": {
+        "on_true": {"next_rules": [nxt]} if nxt else {}, "on_false": {"reason": rid}}}
+    policy = compile_policy({"id": "p", "name": "p", "terminal_nodes": [], "chains": [{"id": "c", "name": "c", "rulesets": [
+        {"id": "rs", "name": "rs", "rules": [
+            rule("pincode", {"field": "pincode", "operator": "in", "value": list(range(0, 400, 7))}, "income"),
+            rule("income", {"field": "income", "operator": "in range", "value": [[0, 100], [90, 250.5], [400, 500]]}),
+        ]}]}]})
+    rnd = random.Random(2)
+    rows = [{"pincode": rnd.randrange(60), "income": rnd.choice([-1, 0, 99, 250.5, 251, 450, float("nan")])}
+            for _ in range(300)]
+    columnar = evaluate_columnar(policy, {k: np.array([r[k] for r in rows]) for k in ("pincode", "income")})
+    for i, row in enumerate(rows):
+        income = None if row["income"] != row["income"] else row["income"]
+        try:
+            expected = BREEngine(policy, {**row, "income": income}, trace="off").run()["reason"]
+        except TypeError:
+            expected = "Cannot evaluate income in range [[0, 100], [90, 250.5], [400, 500]]"
+        assert columnar["reason"][i] == expected
+
+
+def test_shared_leaf_names_need_full_column_names():
+    rule = lambda rid, field, nxt=None: {"id": rid, "conditions": [{"field": field, "operator": ">=", "value": 100}],
+                                         "action": {"on_true": {"next_rules": [nxt]} if nxt else {},
+                                                    "on_false": {"reason": rid}}}
+    policy = compile_policy({"id": "p", "name": "p", "terminal_nodes": [], "chains": [{"id": "c", "name": "c", "rulesets": [
+        {"id": "rs", "name": "rs", "rules": [
+            rule("applicant", "applicant.income", "coapplicant"),
+            rule("coapplicant", "coapplicant.income"),
+        ]}]}]})
+    with pytest.raises(ValueError, match="'income' is ambiguous"):
+        evaluate_columnar(policy, {"income": np.array([150, 50])})
+
+    columns = {"applicant.income": np.array([150, 150]), "coapplicant.income": np.array([150, 50])}
+    assert list(evaluate_columnar(policy, columns)["reason"]) == [None, "coapplicant"]